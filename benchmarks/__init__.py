@@ -0,0 +1,5 @@
+"""Benchmark suite for torchsearch (not part of the default test run).
+
+    python -m benchmarks                          # standalone runner
+    python -m pytest benchmarks/bench_suite.py    # same cases under pytest
+"""
@@ -0,0 +1,32 @@
+"""pytest entry point for the benchmark suite.
+
+The file name does not match test_*.py, so a plain `pytest` run skips it; run
+it explicitly with `python -m pytest benchmarks/bench_suite.py`. Set
+TORCHSEARCH_BENCH_MARGIN / TORCHSEARCH_BENCH_BASELINE to change the gate.
+Results are written to benchmarks/results.json at the end of the session.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.cases import CASES  # noqa: E402
+from benchmarks.harness import DEFAULT_OUTPUT, check, env_baseline, env_margin, load_baseline, run_case, write_results  # noqa: E402
+
+_RESULTS = {}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _write_results():
+    yield
+    if _RESULTS:
+        write_results(DEFAULT_OUTPUT, _RESULTS)
+
+
+@pytest.mark.parametrize("case", CASES, ids=[c.name for c in CASES])
+def test_benchmark(case):
+    result = _RESULTS[case.name] = run_case(case)
+    msg = check(case.name, result["best"], load_baseline(env_baseline()), env_margin())
+    assert msg is None, msg
@@ -0,0 +1,170 @@
+"""Benchmark cases: mapping lookups, command rendering, detector latency, import time.
+
+Each case's setup() is a context manager yielding the zero-argument callable to
+time; anything it patches (detector commands, temp mapping files) is restored
+on exit.
+"""
+from __future__ import annotations
+
+import json
+import random
+import subprocess
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, NamedTuple, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from core import command_builder, detector  # noqa: E402
+from core.api import prepare_batch  # noqa: E402
+from core.installer import generate_pip_command  # noqa: E402
+from core.mapper import VersionIndex, get_index, get_recommendations  # noqa: E402
+
+BULK_SIZE = 10_000
+LARGE_MAJORS, LARGE_MINORS = 200, 50      # 10k keys in the synthetic mapping
+
+REC = {"torch": "2.4.1", "torchvision": "0.19.1", "torchaudio": "2.4.1", "pip_tag": "cu121"}
+
+NVCC_OUT = "Cuda compilation tools, release 12.1, V12.1.105"
+FAKE_NVCC = {
+    "fast": [sys.executable, "-c", f"print({NVCC_OUT!r})"],
+    "slow": [sys.executable, "-c", f"import time; time.sleep(0.2); print({NVCC_OUT!r})"],
+    "hang": [sys.executable, "-c", "import time; time.sleep(30)"],
+}
+FAKE_SMI = [sys.executable, "-c", "print('535.104.05')"]
+DETECT_TIMEOUT = 0.5
+
+
+class Case(NamedTuple):
+    name: str
+    setup: Callable[[], "contextmanager"]
+    repeat: int = 5
+    number: Optional[int] = None    # None: auto-calibrate
+
+
+def _inputs(n: int, pool) -> list:
+    rng = random.Random(0)
+    return [rng.choice(pool) for _ in range(n)]
+
+
+SMALL_POOL = ["10.2", "11.3", "11.6.124", "11.7", "11.8.89", "12.0", "12.1.105", "12.2", "12.4.131", "12.6", "9.0", None]
+
+
+@contextmanager
+def _large_mapping() -> Iterator[str]:
+    data = {
+        f"{major}.{minor}": {"torch": f"{major}.{minor}.0", "torchvision": "0.1.0", "torchaudio": "0.1.0", "pip_tag": f"cu{major}{minor}"}
+        for major in range(1, LARGE_MAJORS + 1) for minor in range(0, LARGE_MINORS * 2, 2)
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "versions_large.json"
+        path.write_text(json.dumps(data))
+        yield str(path)
+
+
+def _large_pool():
+    rng = random.Random(1)
+    return [f"{rng.randint(1, LARGE_MAJORS)}.{rng.randint(0, LARGE_MINORS * 2)}.{rng.randint(0, 200)}" for _ in range(256)]
+
+
+@contextmanager
+def lookup_small():
+    get_index()
+    inputs = _inputs(1024, SMALL_POOL)
+    yield lambda: [get_recommendations(v) for v in inputs]
+
+
+@contextmanager
+def lookup_large():
+    with _large_mapping() as path:
+        index = get_index(path)
+        inputs = _inputs(1024, _large_pool())
+        yield lambda: [index.lookup(v) for v in inputs]
+
+
+@contextmanager
+def build_index_large():
+    with _large_mapping() as path:
+        data = json.loads(Path(path).read_text())
+        yield lambda: VersionIndex(data)
+
+
+@contextmanager
+def bulk_small():
+    inputs = _inputs(BULK_SIZE, SMALL_POOL)
+    yield lambda: prepare_batch(inputs)
+
+
+@contextmanager
+def bulk_large():
+    with _large_mapping() as path:
+        inputs = _inputs(BULK_SIZE, _large_pool())
+        yield lambda: prepare_batch(inputs, versions_path=path)
+
+
+@contextmanager
+def pip_command():
+    yield lambda: generate_pip_command(REC, extras=["numpy"])
+
+
+@contextmanager
+def builder_commands():
+    def render():
+        pip = command_builder.build_install_command("2.4.1", "0.19.1", "2.4.1", "cu121")
+        conda = command_builder.build_conda_command("2.4.1", "0.19.1", "2.4.1", "cu121")
+        return command_builder.format_result_message("12.1", "2.4.1", "0.19.1", "2.4.1", "cu121", pip, conda)
+    yield render
+
+
+@contextmanager
+def _fake_detector(nvcc):
+    saved = (detector.NVCC_CMD, detector.SMI_DRIVER_CMD, detector._probe_torch_static)
+    detector.NVCC_CMD, detector.SMI_DRIVER_CMD = nvcc, FAKE_SMI
+    detector._probe_torch_static = lambda: None
+    try:
+        yield
+    finally:
+        detector.NVCC_CMD, detector.SMI_DRIVER_CMD, detector._probe_torch_static = saved
+
+
+def _detect_case(kind: str, concurrent: bool):
+    @contextmanager
+    def setup():
+        with _fake_detector(FAKE_NVCC[kind]):
+            if concurrent:
+                yield lambda: detector.get_cuda_version_concurrent(deadline=DETECT_TIMEOUT)
+            else:
+                yield lambda: detector.get_cuda_version(timeout=DETECT_TIMEOUT)
+    return setup
+
+
+def _import_case(module: Optional[str]):
+    @contextmanager
+    def setup():
+        code = f"import {module}" if module else "pass"
+        cmd = [sys.executable, "-c", code]
+        yield lambda: subprocess.run(cmd, cwd=REPO_ROOT, check=True)
+    return setup
+
+
+CASES = [
+    Case("mapper.lookup.small", lookup_small),
+    Case("mapper.lookup.large", lookup_large),
+    Case("mapper.index_build.large", build_index_large),
+    Case("mapper.bulk.small", bulk_small, repeat=3),
+    Case("mapper.bulk.large", bulk_large, repeat=3),
+    Case("installer.pip_command", pip_command),
+    Case("command_builder.render", builder_commands),
+    Case("detector.sequential.fast", _detect_case("fast", False), number=1),
+    Case("detector.sequential.slow", _detect_case("slow", False), number=1, repeat=3),
+    Case("detector.sequential.hang", _detect_case("hang", False), number=1, repeat=3),
+    Case("detector.concurrent.fast", _detect_case("fast", True), number=1),
+    Case("detector.concurrent.hang", _detect_case("hang", True), number=1, repeat=3),
+    Case("import.interpreter", _import_case(None), number=1),
+    Case("import.core_cli", _import_case("core.cli"), number=1),
+    Case("import.core_api", _import_case("core.api"), number=1),
+]
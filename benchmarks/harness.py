@@ -0,0 +1,132 @@
+"""Timing, baseline comparison and the command line runner for the benchmark suite.
+
+Every case (see benchmarks/cases.py) is a context manager yielding the callable
+to time. Fast callables are auto-calibrated so that one repeat lasts at least
+MIN_TIME; slow ones (detector probes, subprocess imports) run a fixed number
+of times. The best repeat is reported as seconds per call and compared with
+the stored baseline: a case regresses when best > baseline * (1 + margin).
+
+Usage:
+    python -m benchmarks [-k PATTERN] [--output results.json]
+                         [--baseline benchmarks/baseline.json] [--margin 0.5] [--update-baseline]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_BASELINE = HERE / "baseline.json"
+DEFAULT_OUTPUT = HERE / "results.json"
+DEFAULT_MARGIN = 0.5
+MIN_TIME = 0.05
+
+
+def env_margin() -> float:
+    return float(os.environ.get("TORCHSEARCH_BENCH_MARGIN", DEFAULT_MARGIN))
+
+
+def env_baseline() -> Path:
+    return Path(os.environ.get("TORCHSEARCH_BENCH_BASELINE", DEFAULT_BASELINE))
+
+
+def measure(fn: Callable[[], object], repeat: int = 5, number: Optional[int] = None, min_time: float = MIN_TIME) -> Dict:
+    """Time fn; returns {"best", "median"} in seconds per call plus the loop sizes used."""
+    if number is None:
+        number = 1
+        while True:
+            t0 = time.perf_counter()
+            for _ in range(number):
+                fn()
+            if time.perf_counter() - t0 >= min_time or number >= 1 << 24:
+                break
+            number *= 4
+    per_call = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        per_call.append((time.perf_counter() - t0) / number)
+    return {"best": min(per_call), "median": statistics.median(per_call), "number": number, "repeat": repeat}
+
+
+def run_case(case) -> Dict:
+    with case.setup() as fn:
+        return measure(fn, repeat=case.repeat, number=case.number)
+
+
+def load_baseline(path: Path) -> Dict[str, float]:
+    try:
+        return json.loads(Path(path).read_text()).get("results", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def check(name: str, best: float, baseline: Dict[str, float], margin: float) -> Optional[str]:
+    """Return a failure message if best exceeds the baseline by more than margin."""
+    ref = baseline.get(name)
+    if ref is None or best <= ref * (1 + margin):
+        return None
+    return f"{name}: {_fmt(best)} vs baseline {_fmt(ref)} (+{(best / ref - 1) * 100:.0f}%, margin {margin * 100:.0f}%)"
+
+
+def _fmt(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def write_results(path: Path, results: Dict[str, Dict]) -> None:
+    doc = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": {name: r["best"] for name, r in results.items()},
+        "details": results,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(doc, indent=2, sort_keys=True) + "\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .cases import CASES
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="torchsearch benchmark suite")
+    parser.add_argument("-k", dest="pattern", help="only run cases whose name contains PATTERN")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help=f"results JSON (default: {DEFAULT_OUTPUT.name})")
+    parser.add_argument("--baseline", type=Path, default=env_baseline())
+    parser.add_argument("--margin", type=float, default=env_margin(), help="allowed slowdown, 0.5 = +50%% (default)")
+    parser.add_argument("--update-baseline", action="store_true", help="write these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(args.baseline)
+    results: Dict[str, Dict] = {}
+    failures = []
+    for case in CASES:
+        if args.pattern and args.pattern not in case.name:
+            continue
+        r = results[case.name] = run_case(case)
+        msg = check(case.name, r["best"], baseline, args.margin)
+        ref = baseline.get(case.name)
+        print(f"{case.name:<34} {_fmt(r['best']):>10}  (median {_fmt(r['median'])}, x{r['number']})"
+              f"{'' if ref is None else f'  baseline {_fmt(ref)}'}{'  REGRESSION' if msg else ''}")
+        if msg:
+            failures.append(msg)
+
+    write_results(args.output, results)
+    if args.update_baseline:
+        merged = dict(baseline, **{n: r["best"] for n, r in results.items()})
+        write_results(args.baseline, {n: {"best": v} for n, v in merged.items()})
+        print(f"baseline updated: {args.baseline}")
+        return 0
+    for msg in failures:
+        print("FAIL:", msg, file=sys.stderr)
+    return 1 if failures else 0
@@ -1,7 +1,32 @@
-"""Core utilities for torchsearch: detector, mapper, installer exports."""
-from .detector import get_cuda_version
-from .mapper import load_versions, get_recommendations
-from .installer import generate_pip_command
-from .version_mapper import get_torch_versions
+"""Core utilities for torchsearch: detector, mapper, installer exports.
 
-__all__ = ["get_cuda_version", "load_versions", "get_recommendations", "get_torch_versions", "generate_pip_command"]
+Exports are resolved lazily through module-level __getattr__, so importing
+`core` (or running `python -m core`) only loads the submodules actually used.
+"""
+from importlib import import_module
+
+_EXPORTS = {
+    "get_cuda_version": ".detector",
+    "load_versions": ".mapper",
+    "get_recommendations": ".mapper",
+    "get_torch_versions": ".version_mapper",
+    "generate_pip_command": ".installer",
+    "generate_lockfile": ".installer",
+    "detect_and_prepare": ".api",
+    "prepare_batch": ".api",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
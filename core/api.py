@@ -5,28 +5,50 @@ based on detected or provided CUDA version.
 """
 from __future__ import annotations
 
-from typing import Optional, Dict, Any
+import re
+from typing import Optional, Dict, Any, Iterable, List
 
-from .detector import get_cuda_version
+from . import metrics
+from .compat import get_engine, recommend_for_driver, select_build_for_gpus
+from .detector import get_compute_capabilities_cached, get_cuda_version
+from .mapper import normalize_cuda_version
 from .version_mapper import get_torch_versions
 from .installer import generate_pip_command
 
+BATCH_COLUMNS = ("detected_version", "torch", "torchvision", "torchaudio", "pip_tag", "install_command")
 
-def detect_and_prepare(cuda_override: Optional[str] = None, versions_path: Optional[str] = None, extras: Optional[list] = None) -> Dict[str, Any]:
+
+def detect_and_prepare(cuda_override: Optional[str] = None, versions_path: Optional[str] = None, extras: Optional[list] = None,
+                       compute_capabilities: Optional[List[str]] = None) -> Dict[str, Any]:
     """Detect CUDA (or use override), get recommendation, and build install command.
 
     Args:
         cuda_override: if provided, skip detection and use this CUDA version string.
         versions_path: optional path to versions.json
         extras: optional list of extra pip install tokens to append
+        compute_capabilities: GPU compute capabilities (e.g. ["8.6"]); detected
+            (NVML or nvidia-smi, cached per host) when None and no override is given
 
     Returns:
         dict with keys:
           - source: where the version came from ("override"|"torch"|"nvcc"|...)
           - detected_version: normalized version string or None
+          - driver_version: NVIDIA driver version when only nvidia-smi was found, else None
           - recommendation: normalized recommendation dict or None
           - install_command: generated pip command string or None
+          - compute_capabilities: list of GPU compute capabilities used for build selection
+          - warnings: list of messages, e.g. GPUs only covered by PTX JIT compilation,
+            or a note that the build was switched to one with native kernels
+
+    Each stage is timed through core.metrics spans ("detect" per strategy,
+    "load_versions", "map", "command", and "detect_and_prepare" overall).
     """
+    with metrics.span("detect_and_prepare", override=bool(cuda_override)):
+        return _detect_and_prepare(cuda_override, versions_path, extras, compute_capabilities)
+
+
+def _detect_and_prepare(cuda_override, versions_path, extras, compute_capabilities) -> Dict[str, Any]:
+    driver_version = driver_cuda = None
     if cuda_override:
         source = "override"
         detected_version = cuda_override
@@ -34,17 +56,113 @@ def detect_and_prepare(cuda_override: Optional[str] = None, versions_path: Optio
         det = get_cuda_version()
         source = det.get("source")
         detected_version = det.get("version")
+        if source == "nvidia-smi" and not detected_version:
+            driver_version = driver_from_detection(det)
+            driver_cuda = det.get("max_cuda")
+
+    with metrics.span("map") as s:
+        if detected_version:
+            rec = get_torch_versions(detected_version, versions_path=versions_path)
+        elif driver_version or driver_cuda:
+            # no toolkit/runtime version, but the driver bounds which builds can run
+            s.label(by="driver")
+            rec = recommend_for_driver(driver_version, versions_path=versions_path, max_cuda=driver_cuda)
+        else:
+            rec = None
+        if not rec:
+            s.fail()
 
-    rec = get_torch_versions(detected_version, versions_path=versions_path)
+    if compute_capabilities is None:
+        compute_capabilities = [] if cuda_override or not source else get_compute_capabilities_cached()
+    warnings: List[str] = []
+    if rec and compute_capabilities and rec.get("pip_tag"):
+        # prefer a build with native kernels for every GPU over one that needs PTX JIT
+        runtime = detected_version or driver_cuda or get_engine(versions_path).max_runtime_for_driver(driver_version)
+        rec, warnings = select_build_for_gpus(runtime, compute_capabilities, rec, versions_path=versions_path)
 
     install_cmd = None
     if rec:
-        install_cmd = generate_pip_command(rec, extras=extras)
+        with metrics.span("command"):
+            install_cmd = generate_pip_command(rec, extras=extras)
 
     return {
         "source": source,
         "detected_version": detected_version,
+        "driver_version": driver_version,
         "recommendation": rec,
         "install_command": install_cmd,
+        "compute_capabilities": compute_capabilities,
+        "warnings": warnings,
     }
 
+
+def driver_from_detection(det: Dict[str, Any]) -> Optional[str]:
+    """Driver version from a driver-only detector result ("raw" holds one line per GPU)."""
+    raw = (det.get("raw") or "").strip()
+    first = raw.splitlines()[0].strip() if raw else ""
+    m = re.match(r"\d+(?:\.\d+)+", first)
+    return m.group(0) if m else None
+
+
+def _numpy_for(values):
+    """Return the numpy module if values is a numpy array, else None (numpy stays optional)."""
+    if type(values).__module__ != "numpy":
+        return None
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def prepare_batch(cuda_versions: Iterable[Optional[str]], versions_path: Optional[str] = None, extras: Optional[list] = None) -> Dict[str, Any]:
+    """Resolve many raw CUDA version strings at once.
+
+    Inputs are deduplicated first, each unique version is normalized and resolved
+    once, and the results are scattered back into columns aligned with the input.
+
+    Args:
+        cuda_versions: sequence (or NumPy array) of raw CUDA version strings; None allowed
+        versions_path: optional path to versions.json
+        extras: optional list of extra pip install tokens to append
+
+    Returns:
+        dict mapping each name in BATCH_COLUMNS to a column of len(cuda_versions).
+        Columns are lists, or object arrays when the input is a NumPy array.
+        Entries are None where no recommendation is available.
+    """
+    np = _numpy_for(cuda_versions)
+    if np is not None:
+        uniq, inverse = np.unique(np.asarray(cuda_versions).astype(str), return_inverse=True)
+        uniq = uniq.tolist()
+    else:
+        positions: Dict[Any, int] = {}
+        inverse = [positions.setdefault(v, len(positions)) for v in cuda_versions]
+        uniq = list(positions)
+
+    # resolve each distinct normalized version exactly once
+    resolved: Dict[Optional[str], tuple] = {}
+    rows: List[tuple] = []
+    for raw in uniq:
+        norm = normalize_cuda_version(raw)
+        row = resolved.get(norm)
+        if row is None:
+            rec = get_torch_versions(norm, versions_path=versions_path) if norm else None
+            if rec:
+                cmd = generate_pip_command(rec, extras=extras)
+                row = (norm, rec["torch"], rec["torchvision"], rec["torchaudio"], rec["pip_tag"], cmd)
+            else:
+                row = (norm, None, None, None, None, None)
+            resolved[norm] = row
+        rows.append(row)
+
+    out: Dict[str, Any] = {}
+    for col, name in enumerate(BATCH_COLUMNS):
+        uniq_col = [row[col] for row in rows]
+        if np is not None:
+            arr = np.empty(len(uniq_col), dtype=object)
+            arr[:] = uniq_col
+            out[name] = arr[inverse]
+        else:
+            out[name] = [uniq_col[i] for i in inverse]
+    return out
@@ -0,0 +1,28 @@
+"""Daemon-thread jobs shared by the detector and the UI.
+
+A probe that hangs (a stuck nvcc, a driver call that never returns) must not
+keep the interpreter alive or block a worker pool, so each job gets its own
+daemon thread and reports through a concurrent.futures.Future.
+"""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable
+
+
+def run_daemon(fn: Callable[[], Any], name: str = "torchsearch-probe") -> Future:
+    """Run fn on a daemon thread and return a Future for its result.
+
+    The thread cannot be cancelled; callers that lose interest simply drop the Future.
+    """
+    fut: Future = Future()
+
+    def runner():
+        try:
+            fut.set_result(fn())
+        except BaseException as e:
+            fut.set_exception(e)
+
+    threading.Thread(target=runner, name=name, daemon=True).start()
+    return fut
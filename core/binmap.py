@@ -0,0 +1,281 @@
+"""Compiled binary form of versions.json, read through mmap.
+
+Layout (little-endian):
+
+    header     magic "TSVM", format version, counts, section offsets, and the
+               source JSON's size / mtime_ns / sha256 prefix (freshness check)
+    strings    interned UTF-8 string table; a string is referenced by
+               (offset u32, length u16), offset 0xFFFFFFFF meaning null
+    records    fixed-width: torch, torchvision, torchaudio, pip_tag, arch_list
+               string refs (arch_list stored space-separated)
+    exact      (key ref, record u32) sorted by key bytes: exact-key lookups
+    numeric    (major u16, minor u16, record u32) sorted: nearest-minor fallback
+
+BinaryIndex answers lookups with bisects over the mapped file, so loading it
+parses nothing and several processes share one page-cache copy. Lookup rules
+match core.mapper.VersionIndex exactly.
+
+Usage:
+    python -m core.binmap build [data/versions.json] [-o data/versions.bin]
+    python -m core.binmap show data/versions.bin
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .cache import atomic_write_bytes
+from .mapper import DEFAULT_DATA_PATH, _parse_key, copy_record, normalize_cuda_version
+
+MAGIC = b"TSVM"
+FORMAT_VERSION = 2
+FIELDS = ("torch", "torchvision", "torchaudio", "pip_tag", "arch_list")
+_LIST_FIELDS = frozenset({"arch_list"})
+NULL = 0xFFFFFFFF
+
+# magic, version, flags, records, exact keys, numeric keys, source size, source mtime_ns,
+# source sha256[:16], strings off/size, records off, exact off, numeric off
+_HEADER = struct.Struct("<4sHHIIIQq16sIIIII")
+_REF = struct.Struct("<IH")
+_RECORD = struct.Struct("<" + "IH" * len(FIELDS))
+_EXACT = struct.Struct("<IHI")
+_NUMERIC = struct.Struct("<HHI")
+
+
+class BinaryMapError(ValueError):
+    """Raised for files that are not a valid compiled mapping."""
+
+
+def binary_path_for(json_path) -> Path:
+    return Path(json_path).with_suffix(".bin")
+
+
+def _source_fingerprint(path: Path) -> Tuple[int, int, bytes]:
+    data = path.read_bytes()
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns, hashlib.sha256(data).digest()[:16]
+
+
+def compile_mapping(data: Dict[str, Dict], source: Optional[Tuple[int, int, bytes]] = None) -> bytes:
+    """Serialize a versions mapping (JSON object order is kept for numeric duplicates)."""
+    strings = bytearray()
+    interned: Dict[str, Tuple[int, int]] = {}
+
+    def ref(s) -> Tuple[int, int]:
+        if s is None:
+            return NULL, 0
+        s = str(s)
+        r = interned.get(s)
+        if r is None:
+            raw = s.encode("utf-8")
+            if len(raw) > 0xFFFF:
+                raise BinaryMapError(f"string too long: {s[:40]!r}...")
+            r = interned[s] = (len(strings), len(raw))
+            strings.extend(raw)
+        return r
+
+    records = bytearray()
+    exact: List[Tuple[bytes, Tuple[int, int], int]] = []
+    numeric: Dict[Tuple[int, int], int] = {}
+    for i, (key, rec) in enumerate(data.items()):
+        values = [" ".join(rec[f]) if f in _LIST_FIELDS and rec.get(f) is not None else rec.get(f) for f in FIELDS]
+        records += _RECORD.pack(*(v for value in values for v in ref(value)))
+        exact.append((key.encode("utf-8"), ref(key), i))
+        parsed = _parse_key(key)
+        if parsed is not None and parsed not in numeric and max(parsed) <= 0xFFFF:
+            numeric[parsed] = i
+    exact.sort(key=lambda e: e[0])
+
+    exact_bytes = b"".join(_EXACT.pack(off, ln, i) for _, (off, ln), i in exact)
+    numeric_bytes = b"".join(_NUMERIC.pack(major, minor, i) for (major, minor), i in sorted(numeric.items()))
+    strings_off = _HEADER.size
+    records_off = strings_off + len(strings)
+    exact_off = records_off + len(records)
+    numeric_off = exact_off + len(exact_bytes)
+    size, mtime_ns, digest = source or (0, 0, b"\0" * 16)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(data), len(exact), len(numeric), size, mtime_ns, digest,
+                          strings_off, len(strings), records_off, exact_off, numeric_off)
+    return header + bytes(strings) + bytes(records) + exact_bytes + numeric_bytes
+
+
+def build(json_path=None, out_path=None) -> Path:
+    """Compile json_path (default: bundled versions.json) next to it as .bin, atomically."""
+    src = Path(json_path) if json_path else DEFAULT_DATA_PATH
+    out = Path(out_path) if out_path else binary_path_for(src)
+    data = json.loads(src.read_bytes())
+    if not isinstance(data, dict):
+        raise BinaryMapError(f"{src}: expected a JSON object")
+    atomic_write_bytes(out, compile_mapping(data, _source_fingerprint(src)))
+    return out
+
+
+class BinaryIndex:
+    """Read-only, mmap-backed mapping with the VersionIndex lookup interface."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise BinaryMapError(f"{self.path}: empty file") from e
+        if len(self._mm) < _HEADER.size:
+            raise BinaryMapError(f"{self.path}: truncated header")
+        (magic, version, _flags, self.record_count, self.exact_count, self.numeric_count,
+         self.source_size, self.source_mtime_ns, self.source_digest, self._strings, strings_size,
+         self._records, self._exact, self._numeric) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise BinaryMapError(f"{self.path}: not a torchsearch mapping (v{FORMAT_VERSION})")
+        if self._numeric + self.numeric_count * _NUMERIC.size != len(self._mm):
+            raise BinaryMapError(f"{self.path}: size does not match header")
+        self._data: Optional[Dict[str, Dict]] = None
+        # decoded records, filled on demand (lookups hit a handful of records)
+        self._decoded: Dict[int, Dict] = {}
+
+    def is_fresh_for(self, json_path) -> bool:
+        """True if the file was compiled from json_path's current content."""
+        try:
+            st = os.stat(json_path)
+        except OSError:
+            return True   # shipped without its source (e.g. frozen builds)
+        if st.st_size != self.source_size:
+            return False
+        if st.st_mtime_ns == self.source_mtime_ns:
+            return True
+        # same size, different mtime (copied / extracted): compare content
+        return _source_fingerprint(Path(json_path))[2] == self.source_digest
+
+    def _str(self, off: int, ln: int) -> Optional[str]:
+        if off == NULL:
+            return None
+        start = self._strings + off
+        return self._mm[start:start + ln].decode("utf-8")
+
+    def _record(self, i: int) -> Dict:
+        rec = self._decoded.get(i)
+        if rec is None:
+            v = _RECORD.unpack_from(self._mm, self._records + i * _RECORD.size)
+            rec = {field: self._str(v[2 * j], v[2 * j + 1]) for j, field in enumerate(FIELDS)}
+            for field in _LIST_FIELDS:
+                if rec[field] is not None:
+                    rec[field] = rec[field].split()
+            self._decoded[i] = rec
+        return rec
+
+    def _exact_find(self, key: bytes) -> Optional[int]:
+        lo, hi = 0, self.exact_count
+        mm, base, size, strings = self._mm, self._exact, _EXACT.size, self._strings
+        while lo < hi:
+            mid = (lo + hi) // 2
+            off, ln, rec = _EXACT.unpack_from(mm, base + mid * size)
+            probe = mm[strings + off:strings + off + ln]
+            if probe == key:
+                return rec
+            if probe < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def _numeric_at(self, i: int) -> Tuple[int, int, int]:
+        return _NUMERIC.unpack_from(self._mm, self._numeric + i * _NUMERIC.size)
+
+    def _numeric_find(self, major: int, minor: int) -> Optional[int]:
+        # first entry >= (major, minor)
+        lo, hi = 0, self.numeric_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._numeric_at(mid)[:2] < (major, minor):
+                lo = mid + 1
+            else:
+                hi = mid
+        nxt = self._numeric_at(lo) if lo < self.numeric_count else None
+        if nxt is not None and nxt[:2] == (major, minor):
+            return nxt[2]
+        prev = self._numeric_at(lo - 1) if lo > 0 else None
+        lower = prev if prev is not None and prev[0] == major else None
+        higher = nxt if nxt is not None and nxt[0] == major else None
+        if lower is None and higher is None:
+            return None
+        if lower is None:
+            return higher[2]
+        if higher is None:
+            return lower[2]
+        # nearest minor within the same major; on a tie prefer the higher minor
+        return higher[2] if higher[1] - minor <= minor - lower[1] else lower[2]
+
+    def lookup(self, cuda_version: Optional[str]) -> Dict:
+        norm = normalize_cuda_version(cuda_version)
+        if not norm:
+            return {}
+        i = self._exact_find(norm.encode("ascii"))
+        if i is None:
+            major, minor = (int(x) for x in norm.split("."))
+            i = self._numeric_find(major, minor)
+            if i is None:
+                return {}
+        # a copy, like VersionIndex.lookup: the decoded records are memoized
+        return copy_record(self._record(i))
+
+    @property
+    def data(self) -> Dict[str, Dict]:
+        """The full mapping as dicts (decoded once, on first use)."""
+        if self._data is None:
+            keys = {}
+            for i in range(self.exact_count):
+                off, ln, rec = _EXACT.unpack_from(self._mm, self._exact + i * _EXACT.size)
+                keys[rec] = self._str(off, ln)
+            self._data = {keys[i]: self._record(i) for i in range(self.record_count)}
+        return self._data
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+def load_binary_index(json_path) -> Optional[BinaryIndex]:
+    """The compiled index next to json_path if it exists and is current, else None."""
+    bin_path = binary_path_for(json_path)
+    if not bin_path.exists():
+        return None
+    try:
+        index = BinaryIndex(bin_path)
+    except (OSError, BinaryMapError):
+        return None
+    if not index.is_fresh_for(json_path):
+        index.close()
+        return None
+    return index
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m core.binmap", description="Compile versions.json into an mmap-able binary.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_build = sub.add_parser("build", help="compile a versions.json")
+    p_build.add_argument("json", nargs="?", help=f"source (default: {DEFAULT_DATA_PATH})")
+    p_build.add_argument("-o", "--output", help="output path (default: same name with .bin)")
+    p_show = sub.add_parser("show", help="print a compiled file's header and mapping")
+    p_show.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "build":
+        print(build(args.json, args.output))
+        return 0
+    try:
+        index = BinaryIndex(args.path)
+    except (OSError, BinaryMapError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(json.dumps({"records": index.record_count, "numeric_keys": index.numeric_count,
+                      "source_size": index.source_size, "data": index.data}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
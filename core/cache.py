@@ -0,0 +1,119 @@
+"""Small on-disk cache helpers shared by the detector and network code.
+
+Files live under the per-user cache directory (override with TORCHSEARCH_CACHE_DIR).
+All writes go through a temp file + os.replace so readers never see partial data.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def user_cache_dir() -> Path:
+    """Return the torchsearch cache directory for the current user (not created)."""
+    override = os.environ.get("TORCHSEARCH_CACHE_DIR")
+    if override:
+        return Path(override)
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or str(Path.home() / "AppData" / "Local")
+    elif sys.platform == "darwin":
+        base = str(Path.home() / "Library" / "Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "torchsearch"
+
+
+def cache_disabled() -> bool:
+    return os.environ.get("TORCHSEARCH_NO_CACHE", "").strip() not in ("", "0")
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write data to path atomically (temp file in the same directory, then rename)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class JsonFileCache:
+    """A tiny key -> JSON value store in one file, with per-read TTL checks.
+
+    The parsed document is memoized in-process and only re-read when the file's
+    mtime or size changes, so a warm get() is a single stat().
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._doc: Dict[str, Any] = {}
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            st = self.path.stat()
+        except OSError:
+            self._stamp, self._doc = None, {}
+            return self._doc
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp != self._stamp:
+            try:
+                doc = json.loads(self.path.read_bytes())
+            except (OSError, ValueError):
+                doc = {}
+            self._stamp, self._doc = stamp, doc if isinstance(doc, dict) else {}
+        return self._doc
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[Any]:
+        with self._lock:
+            entry = self._load().get(key)
+        if not isinstance(entry, dict) or "v" not in entry:
+            return None
+        if ttl is not None and time.time() - float(entry.get("t", 0)) > ttl:
+            return None
+        return entry["v"]
+
+    def set(self, key: str, value: Any) -> None:
+        self.update({key: value})
+
+    def update(self, items: Dict[str, Any], drop: Optional[Callable[[str], bool]] = None,
+               max_entries: Optional[int] = None) -> None:
+        """Store several keys with a single rewrite of the file.
+
+        Existing keys for which drop(key) is true are removed first (superseded
+        entries); with max_entries, the oldest entries beyond it are evicted.
+        """
+        with self._lock:
+            doc = dict(self._load())
+            if drop is not None:
+                doc = {k: v for k, v in doc.items() if not drop(k)}
+            now = time.time()
+            for key, value in items.items():
+                doc[key] = {"t": now, "v": value}
+            if max_entries is not None and len(doc) > max_entries:
+                newest = sorted(doc, key=lambda k: doc[k].get("t", 0) if isinstance(doc[k], dict) else 0)[-max_entries:]
+                doc = {k: doc[k] for k in newest}
+            try:
+                atomic_write_bytes(self.path, json.dumps(doc, ensure_ascii=False).encode("utf-8"))
+            except OSError:
+                # an unwritable cache dir must never break detection
+                return
+            try:
+                st = self.path.stat()
+                self._doc, self._stamp = doc, (st.st_mtime_ns, st.st_size)
+            except OSError:
+                self._doc, self._stamp = doc, None
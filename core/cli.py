@@ -0,0 +1,118 @@
+"""Non-interactive command line entry point: `python -m core`.
+
+Examples:
+    python -m core --cuda 11.8                 # human-readable summary
+    python -m core --cuda 12.1 --format pip    # just the pip command
+    python -m core --detect --format json      # auto-detect, JSON output
+    python -m core --cuda 12.1 --format lock --wheelhouse ./wheels > requirements.lock
+
+Only the modules a given invocation needs are imported: a plain lookup loads
+the mapper and command builders, never tkinter or subprocess, and json only
+when reading versions.json or printing JSON.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from typing import List, Optional
+
+FORMATS = ("text", "json", "pip", "conda", "lock")
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m core", description="Recommend torch/torchvision/torchaudio versions for a CUDA version.")
+    src = parser.add_mutually_exclusive_group()
+    src.add_argument("--cuda", help="CUDA version, e.g. 11.8 (default: auto-detect)")
+    src.add_argument("--detect", action="store_true", help="auto-detect the CUDA version")
+    parser.add_argument("--format", choices=FORMATS, default="text", help="output format (default: text)")
+    parser.add_argument("--versions", help="path to versions.json")
+    parser.add_argument("--extra", action="append", default=[], help="extra pip install token (repeatable)")
+    parser.add_argument("--refresh", action="store_true", help="ignore cached detection results")
+    parser.add_argument("--compute-cap", action="append", default=None, metavar="X.Y",
+                        help="GPU compute capability to cover natively (repeatable; default: detected when auto-detecting)")
+    parser.add_argument("--wheelhouse", help="directory of downloaded wheels to hash (required for --format lock)")
+    args = parser.parse_args(argv)
+    if args.format == "lock" and not args.wheelhouse:
+        parser.error("--format lock requires --wheelhouse")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+
+    source = "override"
+    cuda = args.cuda
+    rec = None
+    caps = args.compute_cap
+    if not cuda:
+        from .api import driver_from_detection
+        from .detector import get_cuda_version_cached
+
+        det = get_cuda_version_cached(refresh=args.refresh)
+        source, cuda = det.get("source"), det.get("version")
+        driver = driver_from_detection(det) if source == "nvidia-smi" and not cuda else None
+        if driver:
+            from .compat import get_engine, recommend_for_driver
+
+            driver_cuda = det.get("max_cuda")
+            rec = recommend_for_driver(driver, versions_path=args.versions, max_cuda=driver_cuda)
+            cuda = driver_cuda or get_engine(args.versions).max_runtime_for_driver(driver)
+        if not cuda:
+            print("未能检测到 CUDA 版本，请使用 --cuda 手动指定。", file=sys.stderr)
+            return 1
+        if caps is None:
+            from .detector import get_compute_capabilities_cached
+
+            caps = get_compute_capabilities_cached(refresh=args.refresh)
+
+    if rec is None:
+        from .version_mapper import get_torch_versions
+
+        rec = get_torch_versions(cuda, versions_path=args.versions)
+    if not rec:
+        print(f"暂不支持 CUDA {cuda} 的版本映射。", file=sys.stderr)
+        return 1
+
+    warnings = []
+    if caps and rec.get("pip_tag"):
+        from .compat import select_build_for_gpus
+
+        rec, warnings = select_build_for_gpus(cuda, caps, rec, versions_path=args.versions)
+        for msg in warnings:
+            print(f"警告: {msg}", file=sys.stderr)
+
+    if args.format == "lock":
+        from .installer import LockfileError, generate_lockfile
+
+        try:
+            sys.stdout.write(generate_lockfile(rec, args.wheelhouse))
+        except LockfileError as e:
+            print(e, file=sys.stderr)
+            return 1
+        return 0
+
+    from .command_builder import build_conda_command, format_result_message
+    from .installer import generate_pip_command
+
+    pip_cmd = generate_pip_command(rec, extras=args.extra)
+    conda_cmd = build_conda_command(rec["torch"], rec["torchvision"], rec["torchaudio"], rec["pip_tag"])
+
+    if args.format == "pip":
+        print(pip_cmd)
+    elif args.format == "conda":
+        print(conda_cmd)
+    elif args.format == "json":
+        import json
+
+        print(json.dumps({
+            "source": source,
+            "detected_version": cuda,
+            "recommendation": rec,
+            "install_command": pip_cmd,
+            "conda_command": conda_cmd,
+            "compute_capabilities": caps or [],
+            "warnings": warnings,
+        }, ensure_ascii=False))
+    else:
+        print(format_result_message(cuda, rec["torch"], rec["torchvision"], rec["torchaudio"], rec["pip_tag"], pip_cmd, conda_cmd).strip())
+    return 0
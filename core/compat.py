@@ -0,0 +1,298 @@
+"""Range-based compatibility between NVIDIA drivers, CUDA runtimes and wheel tags.
+
+Data lives in `data/compat.json`:
+  - "drivers": minimum driver version (per OS) for each CUDA runtime release,
+    i.e. a step function driver -> maximum supported runtime;
+  - "tags": optional runtime range for a cu tag. Tags not listed run on
+    [their own runtime, end of that major] (CUDA minor-version compatibility).
+
+CompatEngine compiles these into sorted arrays and an interval index so that
+"max runtime for driver 535.x", "all cu tags valid for runtime 12.3" and "best
+torch build runnable on driver 535.x" are bisect lookups, not scans.
+
+Records in versions.json may also carry an "arch_list" in TORCH_CUDA_ARCH_LIST
+form (["7.5", "8.0", "8.6", "9.0+PTX"]). A GPU is covered natively when the
+build has SASS for its major at an equal or lower minor; a "+PTX" entry at or
+below its capability only covers it through driver JIT compilation, which can
+take minutes on first CUDA use. select_build_for_gpus() prefers builds that
+cover every GPU natively and reports JIT-only or missing coverage.
+"""
+from __future__ import annotations
+
+import json
+import re
+import sys
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+from .mapper import VersionIndex, get_index, normalize_cuda_version
+from .wheels import version_key
+
+DEFAULT_COMPAT_PATH = Path(__file__).resolve().parent.parent / "data" / "compat.json"
+
+T = TypeVar("T")
+Version = Tuple[int, ...]
+
+
+def parse_version(text: Optional[str]) -> Optional[Version]:
+    """"535.104.05" -> (535, 104, 5); None when there is no leading number."""
+    m = re.match(r"\s*(\d+(?:\.\d+)*)", str(text or ""))
+    return tuple(int(x) for x in m.group(1).split(".")) if m else None
+
+
+def tag_runtime(tag: Optional[str]) -> Optional[Version]:
+    """"cu121" -> (12, 1); None for CPU or unknown tags."""
+    m = re.fullmatch(r"cu(\d+)(\d)", tag or "")
+    return (int(m.group(1)), int(m.group(2))) if m else None
+
+
+def _fmt(v: Version) -> str:
+    return ".".join(str(x) for x in v)
+
+
+def parse_arch(entry: str) -> Optional[Tuple[Version, bool, bool]]:
+    """Arch list entry -> (arch, has SASS, has PTX).
+
+    "8.6" -> ((8, 6), True, False); "9.0+PTX" -> ((9, 0), True, True);
+    "sm_86" and "compute_90" (PTX only) are accepted too.
+    """
+    text = str(entry).strip()
+    m = re.fullmatch(r"(\d+)\.(\d+)(\+PTX)?", text, re.IGNORECASE)
+    if m:
+        return (int(m.group(1)), int(m.group(2))), True, bool(m.group(3))
+    m = re.fullmatch(r"(sm|compute)_(\d+)(\d)", text)
+    if m:
+        sass = m.group(1) == "sm"
+        return (int(m.group(2)), int(m.group(3))), sass, not sass
+    return None
+
+
+def arch_coverage(arch_list: Sequence[str], capability: str) -> Optional[str]:
+    """How a build with arch_list runs on a GPU: "native", "ptx" (JIT only) or None."""
+    cc = parse_version(capability)
+    if cc is None:
+        return None
+    cc = cc[:2]
+    ptx = False
+    for entry in arch_list:
+        parsed = parse_arch(entry)
+        if parsed is None:
+            continue
+        arch, sass, has_ptx = parsed
+        # SASS runs on later minors of the same major; PTX JIT-compiles for anything newer
+        if sass and arch[0] == cc[0] and arch[1] <= cc[1]:
+            return "native"
+        if has_ptx and arch <= cc:
+            ptx = True
+    return "ptx" if ptx else None
+
+
+class IntervalIndex(Generic[T]):
+    """Static stabbing index over closed intervals [lo, hi].
+
+    Interval endpoints split the axis into elementary segments; each segment
+    stores the payloads covering it, so a stabbing query is one bisect.
+    """
+
+    def __init__(self, intervals: Sequence[Tuple[Version, Version, T]]):
+        bounds = sorted({lo for lo, _, _ in intervals} | {self._after(hi) for _, hi, _ in intervals})
+        self._bounds = bounds
+        self._segments: List[List[T]] = [[] for _ in bounds]
+        for lo, hi, payload in intervals:
+            end = self._after(hi)
+            for i in range(bisect_right(bounds, lo) - 1, len(bounds)):
+                if bounds[i] >= end:
+                    break
+                self._segments[i].append(payload)
+
+    @staticmethod
+    def _after(v: Version) -> Version:
+        # smallest version strictly greater than v at v's precision
+        return v[:-1] + (v[-1] + 1,)
+
+    def stab(self, point: Version) -> List[T]:
+        i = bisect_right(self._bounds, point) - 1
+        return list(self._segments[i]) if i >= 0 else []
+
+
+class CompatEngine:
+    """Driver / runtime / cu-tag queries over compat.json and a versions mapping."""
+
+    def __init__(self, compat_data: Dict, versions: VersionIndex):
+        self.versions = versions
+        self._drivers: Dict[str, Tuple[List[Version], List[Version]]] = {}
+        rows = sorted(compat_data.get("drivers", []), key=lambda r: parse_version(r["cuda"]))
+        for os_name in ("linux", "windows"):
+            pairs = sorted((parse_version(r[os_name]), parse_version(r["cuda"])) for r in rows if r.get(os_name))
+            # keep the step function monotonic: a newer runtime never needs an older driver
+            mins, runtimes = [], []
+            for drv, rt in pairs:
+                if runtimes and rt <= runtimes[-1]:
+                    continue
+                mins.append(drv)
+                runtimes.append(rt)
+            self._drivers[os_name] = (mins, runtimes)
+
+        overrides = compat_data.get("tags", {})
+        tags = {rec.get("pip_tag") for rec in versions.data.values() if isinstance(rec, dict)} | set(overrides)
+        self.tag_ranges: Dict[str, Tuple[Version, Version]] = {}
+        for tag in sorted(t for t in tags if tag_runtime(t)):
+            o = overrides.get(tag, {})
+            lo = parse_version(o.get("min_runtime")) or tag_runtime(tag)
+            hi = parse_version(o.get("max_runtime")) or (lo[0], 99)
+            self.tag_ranges[tag] = (lo, hi)
+        self._tag_index: IntervalIndex[str] = IntervalIndex([(lo, hi, tag) for tag, (lo, hi) in self.tag_ranges.items()])
+
+        # builds sorted by required runtime, with a running "best torch so far",
+        # so the best build under a runtime cap is prefix_best[bisect(cap)]
+        builds = []
+        for key, rec in versions.data.items():
+            if not isinstance(rec, dict) or not rec.get("torch"):
+                continue
+            need = self.tag_ranges.get(rec.get("pip_tag"), (None,))[0]
+            if need is not None:
+                builds.append((need, rec))
+        builds.sort(key=lambda b: b[0])
+        self._build_needs = [need for need, _ in builds]
+        self._prefix_best: List[Dict] = []
+        best = None
+        for need, rec in builds:
+            if best is None or (version_key(rec["torch"]), need) >= (version_key(best["torch"]), self.tag_ranges[best["pip_tag"]][0]):
+                best = rec
+            self._prefix_best.append(best)
+
+    def max_runtime_for_driver(self, driver: str, os_name: Optional[str] = None) -> Optional[str]:
+        """Newest CUDA runtime the given driver version supports, e.g. "535.104.05" -> "12.2"."""
+        d = parse_version(driver)
+        if d is None:
+            return None
+        mins, runtimes = self._drivers[os_name or ("windows" if sys.platform.startswith("win") else "linux")]
+        i = bisect_right(mins, d) - 1
+        return _fmt(runtimes[i]) if i >= 0 else None
+
+    def tags_for_runtime(self, runtime: str) -> List[str]:
+        """All cu tags whose builds run on the given CUDA runtime version."""
+        v = parse_version(runtime)
+        return sorted(self._tag_index.stab(v[:2]), key=lambda t: self.tag_ranges[t][0]) if v else []
+
+    def best_build_for_runtime(self, runtime: str) -> Optional[Dict]:
+        """Newest torch build whose tag needs at most `runtime` (from the versions mapping)."""
+        v = parse_version(runtime)
+        if v is None:
+            return None
+        i = bisect_right(self._build_needs, v[:2]) - 1
+        return self._prefix_best[i] if i >= 0 else None
+
+    def best_build_for_driver(self, driver: str, os_name: Optional[str] = None) -> Optional[Dict]:
+        """Newest torch build runnable on the given driver version."""
+        runtime = self.max_runtime_for_driver(driver, os_name)
+        return self.best_build_for_runtime(runtime) if runtime else None
+
+    def best_native_build(self, runtime: str, capabilities: Sequence[str]) -> Optional[Dict]:
+        """Newest build runnable on `runtime` whose arch_list natively covers every capability."""
+        tags = set(self.tags_for_runtime(runtime))
+        best = None
+        for rec in self.versions.data.values():
+            if not isinstance(rec, dict) or rec.get("pip_tag") not in tags or not rec.get("arch_list"):
+                continue
+            if any(arch_coverage(rec["arch_list"], cc) != "native" for cc in capabilities):
+                continue
+            if best is None or (version_key(rec["torch"]), self.tag_ranges[rec["pip_tag"]][0]) > \
+                    (version_key(best["torch"]), self.tag_ranges[best["pip_tag"]][0]):
+                best = rec
+        return best
+
+
+# compat path -> (file stamp, engine)
+_ENGINES: Dict[str, Tuple[Optional[Tuple[int, int]], CompatEngine]] = {}
+
+
+def load_compat(path: Optional[str] = None) -> Dict:
+    p = Path(path) if path else DEFAULT_COMPAT_PATH
+    if not p.exists():
+        return {}
+    with p.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_engine(versions_path: Optional[str] = None, compat_path: Optional[str] = None) -> CompatEngine:
+    """Cached CompatEngine; rebuilt when the underlying versions index is rebuilt."""
+    versions = get_index(versions_path)
+    p = Path(compat_path) if compat_path else DEFAULT_COMPAT_PATH
+    try:
+        st = p.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = None
+    cached = _ENGINES.get(str(p))
+    if cached is not None and cached[0] == stamp and cached[1].versions is versions:
+        return cached[1]
+    engine = CompatEngine(load_compat(str(p)), versions)
+    _ENGINES[str(p)] = (stamp, engine)
+    return engine
+
+
+def recommend_for_driver(driver: Optional[str], versions_path: Optional[str] = None,
+                         max_cuda: Optional[str] = None) -> Optional[Dict]:
+    """Normalized recommendation (get_torch_versions shape) for a driver-only host.
+
+    max_cuda is the runtime limit the driver itself reports (NVML); it is used
+    instead of the driver -> runtime table when given.
+    """
+    engine = get_engine(versions_path)
+    if max_cuda:
+        rec = engine.best_build_for_runtime(max_cuda)
+    else:
+        rec = engine.best_build_for_driver(driver) if driver else None
+    if not rec:
+        return None
+    return {k: rec.get(k) for k in ("torch", "torchvision", "torchaudio", "pip_tag")}
+
+
+def _normalized(rec: Dict) -> Dict:
+    return {k: rec.get(k) for k in ("torch", "torchvision", "torchaudio", "pip_tag")}
+
+
+def select_build_for_gpus(cuda_version: str, capabilities: Sequence[str], rec: Optional[Dict] = None,
+                          versions_path: Optional[str] = None) -> Tuple[Optional[Dict], List[str]]:
+    """Pick the build for cuda_version that runs natively on every GPU; returns (recommendation, warnings).
+
+    rec is the current recommendation (default: the mapping's record for
+    cuda_version). It is kept when it covers all GPUs natively or when builds
+    carry no arch data; otherwise the newest fully native build runnable on
+    the same runtime replaces it and a note names the switch, and if there is
+    none the warnings explain which GPUs would rely on PTX JIT or are not
+    supported at all.
+    """
+    engine = get_engine(versions_path)
+    current = engine.versions.lookup(cuda_version)
+    if rec is None:
+        rec = _normalized(current) if current else None
+    if rec is None or not capabilities:
+        return rec, []
+    # rec may come from elsewhere (e.g. a driver-based pick): find its record by build identity
+    arch_list = next((r.get("arch_list") for r in (current, *engine.versions.data.values()) if isinstance(r, dict)
+                      and r.get("torch") == rec.get("torch") and r.get("pip_tag") == rec.get("pip_tag")), None)
+    if not arch_list:
+        return rec, []
+    coverage = {cc: arch_coverage(arch_list, cc) for cc in capabilities}
+    if all(c == "native" for c in coverage.values()):
+        return rec, []
+
+    build = f"torch {rec.get('torch')}+{rec.get('pip_tag')}"
+    runtime = normalize_cuda_version(cuda_version)
+    better = engine.best_native_build(runtime, capabilities) if runtime else None
+    if better is not None:
+        lacking = sorted(cc for cc, c in coverage.items() if c != "native")
+        return _normalized(better), [f"switched from {build} to torch {better.get('torch')}+{better.get('pip_tag')}: "
+                                     f"the former has no native kernels for compute capability {', '.join(lacking)}"]
+    jit = sorted({cc for cc, c in coverage.items() if c == "ptx"})
+    missing = sorted({cc for cc, c in coverage.items() if c is None})
+    warnings = []
+    if jit:
+        warnings.append(f"{build} has no native kernels for compute capability {', '.join(jit)}; "
+                        "first CUDA use will JIT-compile PTX (can take minutes)")
+    if missing:
+        warnings.append(f"{build} does not support compute capability {', '.join(missing)}")
+    return rec, warnings
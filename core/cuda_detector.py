@@ -1,10 +1,11 @@
 import subprocess
 import re
 
-def get_nvcc_version():
+def get_nvcc_version(timeout=5.0):
     try:
-        result = subprocess.run(['nvcc', '--version'], capture_output=True, text=True, check=True)
+        # bounded: a hung nvcc (stale NFS mount, broken driver) must not hang the caller
+        result = subprocess.run(['nvcc', '--version'], capture_output=True, text=True, check=True, timeout=timeout)
         match = re.search(r'release (\d+\.\d+)', result.stdout)
         return match.group(1) if match else None
-    except (subprocess.CalledProcessError, FileNotFoundError, Exception):
-        return None
\ No newline at end of file
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError, Exception):
+        return None
@@ -1,18 +1,54 @@
 """CUDA detection utilities.
 
 Provides get_cuda_version() which tries multiple strategies:
- - import torch and read torch.version.cuda
+ - read the installed torch's CUDA build from its files/metadata (no import),
+   or import torch and read torch.version.cuda when requested
  - run nvcc --version
- - run nvidia-smi as a hint
+ - query the driver as a hint (NVML in-process when available, else nvidia-smi)
 
 Returns a dict like:
  {"source":"torch"|"nvcc"|None, "version":"11.8", "raw": "..."}
+
+get_cuda_version_concurrent() / get_cuda_version_async() run the same probes in
+parallel under a single overall deadline.
+
+get_cuda_version_cached() / get_gpu_status_cached() keep results on disk keyed
+by a cheap host fingerprint (driver, nvcc location, CUDA env vars, site-packages
+mtimes), so warm calls spawn no processes. Failed probes are not cached.
+
+Where libnvidia-ml can be loaded (see core.nvml), driver, GPU status and compute
+capability queries are answered in-process instead of spawning nvidia-smi.
 """
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import importlib.metadata
+import importlib.util
+import os
+import queue
 import re
+import shutil
+import signal
 import subprocess
-from typing import Optional
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import metrics
+from .background import run_daemon
+from .cache import JsonFileCache, cache_disabled, user_cache_dir
+
+
+NVCC_CMD = ["nvcc", "--version"]
+SMI_DRIVER_CMD = ["nvidia-smi", "--query-gpu=driver_version", "--format=csv,noheader"]
+
+# probe names in priority order; a lower index wins when several succeed
+PROBE_ORDER = ("torch", "nvcc", "nvidia-smi")
+
+_NOT_FOUND = {"source": None, "version": None, "raw": "", "error": "Unable to detect CUDA version"}
 
 
 def _run_cmd(cmd, timeout: float = 2.0) -> str:
@@ -33,18 +69,8 @@ def _parse_nvcc_output(output: str) -> Optional[str]:
     return None
 
 
-def get_cuda_version(timeout: float = 2.0) -> dict:
-    """Attempt to detect CUDA version.
-
-    Priority:
-      1. import torch -> torch.version.cuda
-      2. nvcc --version
-      3. nvidia-smi driver hint + nvcc fallback
-
-    Returns dict:
-      {"source": "torch"|"nvcc"|None, "version": "11.8"|None, "raw": "...", "error": "..."}
-    """
-    # 1) Try torch if installed
+def _probe_torch() -> Optional[dict]:
+    """Read the CUDA build version from torch, or None if torch is unusable."""
     try:
         import torch
 
@@ -65,34 +91,331 @@ def get_cuda_version(timeout: float = 2.0) -> dict:
     except Exception:
         # torch not installed or import failed
         pass
+    return None
 
-    # 2) Try nvcc
-    nvcc_out = _run_cmd(["nvcc", "--version"], timeout=timeout)
-    parsed = _parse_nvcc_output(nvcc_out)
+
+_TORCH_VERSION_PY_RE = re.compile(r"^cuda\s*(?::[^=\n]*)?=\s*['\"]([^'\"]+)['\"]", re.MULTILINE)
+_LOCAL_CU_RE = re.compile(r"\+cu(\d{2,})")
+
+
+def _cu_tag_to_version(digits: str) -> str:
+    # "121" -> "12.1", "118" -> "11.8", "90" -> "9.0"
+    return f"{digits[:-1]}.{digits[-1]}"
+
+
+def _probe_torch_static() -> Optional[dict]:
+    """Read torch's CUDA build without importing torch.
+
+    Uses torch/version.py located through importlib.util.find_spec, then the
+    "+cuXXX" local version of the installed distribution. If torch is already
+    imported, its attributes are read directly since that costs nothing.
+    """
+    if sys.modules.get("torch") is not None:
+        return _probe_torch()
+
+    try:
+        spec = importlib.util.find_spec("torch")
+    except (ImportError, ValueError):
+        spec = None
+    if spec is None:
+        return None
+
+    for loc in spec.submodule_search_locations or []:
+        try:
+            text = (Path(loc) / "version.py").read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            continue
+        m = _TORCH_VERSION_PY_RE.search(text)
+        if m:
+            ver = m.group(1)
+            mm = re.match(r"(\d+\.\d+)", ver)
+            return {"source": "torch", "version": mm.group(1) if mm else ver, "raw": ver}
+
+    try:
+        dist_version = importlib.metadata.version("torch")
+    except importlib.metadata.PackageNotFoundError:
+        return None
+    m = _LOCAL_CU_RE.search(dist_version)
+    if m:
+        return {"source": "torch", "version": _cu_tag_to_version(m.group(1)), "raw": dist_version}
+    return None
+
+
+def _probe_torch_any(import_torch: bool = False) -> Optional[dict]:
+    res = _probe_torch_static()
+    if res is None and import_torch:
+        res = _probe_torch()
+    return res
+
+
+def _nvcc_result(output: str) -> Optional[dict]:
+    parsed = _parse_nvcc_output(output)
     if parsed:
-        return {"source": "nvcc", "version": parsed, "raw": nvcc_out}
+        return {"source": "nvcc", "version": parsed, "raw": output}
+    return None
 
-    # 3) Try nvidia-smi as hint (driver version); still attempt nvcc via 'where' on windows or just return driver info
-    nvs_out = _run_cmd(["nvidia-smi", "--query-gpu=driver_version --format=csv,noheader"], timeout=timeout)
-    if nvs_out.strip():
-        # we have a driver but not nvcc; return driver note
-        return {"source": "nvidia-smi", "version": None, "raw": nvs_out.strip()}
 
-    return {"source": None, "version": None, "raw": "", "error": "Unable to detect CUDA version"}
+def _smi_result(output: str, max_cuda: Optional[str] = None) -> Optional[dict]:
+    if output.strip():
+        # we have a driver but not nvcc; return driver note (max_cuda: newest runtime it supports, if known)
+        return {"source": "nvidia-smi", "version": None, "raw": output.strip(), "max_cuda": max_cuda}
+    return None
 
 
-def get_gpu_status(timeout: float = 2.0) -> str:
-    """Return a short human-readable GPU status string using nvidia-smi.
+def _nvml_driver_output() -> Optional[Tuple[str, Optional[str]]]:
+    """Driver version per GPU (one per line, as nvidia-smi prints it) and the newest CUDA runtime
+    the driver supports; None when NVML is unavailable."""
+    from .nvml import NvmlError, get_nvml
 
-    Example output (multi-line):
-      GPU0: NVIDIA GeForce RTX 3080, mem 10240MiB used 1234MiB, util 12%
+    nv = get_nvml()
+    if nv is None:
+        return None
+    try:
+        output = "\n".join([nv.driver_version()] * nv.device_count())
+    except NvmlError:
+        return None
+    try:
+        max_cuda: Optional[str] = nv.cuda_driver_version()
+    except (NvmlError, AttributeError):
+        max_cuda = None
+    return output, max_cuda
 
-    If nvidia-smi not available or no GPUs, returns an informative message.
+
+def _driver_output(timeout: float) -> Tuple[str, Optional[str]]:
+    out = _nvml_driver_output()
+    return (_run_cmd(SMI_DRIVER_CMD, timeout=timeout), None) if out is None else out
+
+
+def _probe(strategy: str, fn: Callable[[], Optional[dict]]) -> Optional[dict]:
+    """Run one detection strategy inside a metrics span (status "failure" when it finds nothing)."""
+    with metrics.span("detect", strategy=strategy) as s:
+        res = fn()
+        if not res:
+            s.fail()
+    return res
+
+
+def get_cuda_version(timeout: float = 2.0, import_torch: bool = False) -> dict:
+    """Attempt to detect CUDA version.
+
+    Priority:
+      1. installed torch build (torch/version.py or "+cuXXX" metadata, no import);
+         with import_torch=True, fall back to import torch -> torch.version.cuda
+      2. nvcc --version
+      3. nvidia-smi driver hint + nvcc fallback
+
+    Returns dict:
+      {"source": "torch"|"nvcc"|None, "version": "11.8"|None, "raw": "...", "error": "..."}
+    The nvidia-smi hint also carries "max_cuda", the newest CUDA runtime the
+    driver supports ("12.2"), when NVML reports it.
     """
-    out = _run_cmd(["nvidia-smi", "--query-gpu=name,memory.total,memory.used,utilization.gpu", "--format=csv,noheader,nounits"], timeout=timeout)
-    if not out.strip():
-        return "无法获取 GPU 信息 (nvidia-smi 不可用或没有 NVIDIA GPU)"
-    lines = [l.strip() for l in out.strip().splitlines() if l.strip()]
+    # 1) Try torch if installed
+    res = _probe("torch", lambda: _probe_torch_any(import_torch))
+    if res:
+        return res
+
+    # 2) Try nvcc
+    res = _probe("nvcc", lambda: _nvcc_result(_run_cmd(NVCC_CMD, timeout=timeout)))
+    if res:
+        return res
+
+    # 3) Try nvidia-smi as hint (driver version)
+    res = _probe("nvidia-smi", lambda: _smi_result(*_driver_output(timeout)))
+    if res:
+        return res
+
+    return dict(_NOT_FOUND)
+
+
+def _popen_kwargs() -> dict:
+    """Start children in their own process group so the whole group can be killed."""
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def _kill_group(proc) -> None:
+    if proc.returncode is not None:
+        return
+    try:
+        if os.name == "nt":
+            proc.kill()
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+
+def _pick(results: Dict[str, Optional[dict]]) -> Optional[dict]:
+    """Return the highest-priority success once every higher-priority probe has failed."""
+    for name in PROBE_ORDER:
+        if name not in results:
+            return None
+        if results[name]:
+            return results[name]
+    return None
+
+
+def get_cuda_version_concurrent(deadline: float = 2.0, import_torch: bool = False) -> dict:
+    """Like get_cuda_version but runs all probes in parallel.
+
+    Returns as soon as the highest-priority answer is known, and never later than
+    `deadline` seconds after the call. Outstanding child processes are killed
+    (whole process group) before returning.
+    """
+    end = time.monotonic() + deadline
+    done: "queue.Queue[tuple]" = queue.Queue()
+    procs: List[subprocess.Popen] = []
+    closed = threading.Event()
+
+    def run_cmd(cmd, to_result):
+        def probe():
+            try:
+                proc = subprocess.Popen(
+                    cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, **_popen_kwargs()
+                )
+            except Exception:
+                return None
+            procs.append(proc)
+            if closed.is_set():
+                # the caller already returned; don't leave this child behind
+                _kill_group(proc)
+            try:
+                out, err = proc.communicate(timeout=max(0.0, end - time.monotonic()))
+            except Exception:
+                _kill_group(proc)
+                proc.communicate()
+                return None
+            return to_result((out or "") + (err or ""))
+        return probe
+
+    smi_cmd = run_cmd(SMI_DRIVER_CMD, _smi_result)
+
+    def smi():
+        out = _nvml_driver_output()
+        return smi_cmd() if out is None else _smi_result(*out)
+
+    probes = {
+        "torch": lambda: _probe_torch_any(import_torch),
+        "nvcc": run_cmd(NVCC_CMD, _nvcc_result),
+        "nvidia-smi": smi,
+    }
+    for name, fn in probes.items():
+        run_daemon(lambda name=name, fn=fn: _probe(name, fn)).add_done_callback(
+            lambda f, name=name: done.put((name, None if f.exception() else f.result()))
+        )
+
+    results: Dict[str, Optional[dict]] = {}
+    best = None
+    try:
+        while len(results) < len(probes):
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                name, res = done.get(timeout=remaining)
+            except queue.Empty:
+                break
+            results[name] = res
+            best = _pick(results)
+            if best:
+                break
+    finally:
+        closed.set()
+        for proc in list(procs):
+            _kill_group(proc)
+
+    if best:
+        return best
+    # deadline hit: fall back to the best answer available so far
+    for name in PROBE_ORDER:
+        if results.get(name):
+            return results[name]
+    return dict(_NOT_FOUND)
+
+
+async def _run_cmd_async(cmd, procs: list) -> str:
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, **_popen_kwargs()
+        )
+    except Exception:
+        return ""
+    procs.append(proc)
+    out, err = await proc.communicate()
+    return (out or b"").decode(errors="replace") + (err or b"").decode(errors="replace")
+
+
+async def get_cuda_version_async(deadline: float = 2.0, import_torch: bool = False) -> dict:
+    """asyncio variant of get_cuda_version_concurrent for use inside event loops."""
+    end = time.monotonic() + deadline
+    procs: list = []
+
+    async def nvcc():
+        return _nvcc_result(await _run_cmd_async(NVCC_CMD, procs))
+
+    async def smi():
+        out = await asyncio.wrap_future(run_daemon(_nvml_driver_output))
+        if out is None:
+            out = (await _run_cmd_async(SMI_DRIVER_CMD, procs), None)
+        return _smi_result(*out)
+
+    tasks = {
+        asyncio.wrap_future(run_daemon(lambda: _probe_torch_any(import_torch))): "torch",
+        asyncio.ensure_future(nvcc()): "nvcc",
+        asyncio.ensure_future(smi()): "nvidia-smi",
+    }
+    results: Dict[str, Optional[dict]] = {}
+    best = None
+    pending = set(tasks)
+    try:
+        while pending:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            finished, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            if not finished:
+                break
+            for task in finished:
+                results[tasks[task]] = None if task.cancelled() or task.exception() else task.result()
+            best = _pick(results)
+            if best:
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+        for proc in procs:
+            _kill_group(proc)
+        # reap killed children so the event loop does not keep their transports open
+        if procs:
+            await asyncio.wait([asyncio.ensure_future(p.wait()) for p in procs], timeout=1.0)
+
+    if best:
+        return best
+    for name in PROBE_ORDER:
+        if results.get(name):
+            return results[name]
+    return dict(_NOT_FOUND)
+
+
+GPU_QUERY_CMD = ["nvidia-smi", "--query-gpu=name,memory.total,memory.used,utilization.gpu", "--format=csv,noheader,nounits"]
+
+_SMI_DRIVER_RE = re.compile(r"Driver Version:\s*([\d.]+)")
+_SMI_CUDA_RE = re.compile(r"CUDA Version:\s*(\d+\.\d+)")
+# a GPU row of the default nvidia-smi table: "|   0  NVIDIA A100-SXM4-80GB   On  | ..."
+_SMI_TABLE_GPU_RE = re.compile(r"^\|\s+(\d+)\s+(.+?)\s+(?:On|Off)\s+\|", re.MULTILINE)
+
+
+def _parse_smi_header(output: str) -> tuple:
+    """Return (driver_version, max_cuda_version) from the nvidia-smi table header, or Nones."""
+    d = _SMI_DRIVER_RE.search(output)
+    c = _SMI_CUDA_RE.search(output)
+    return (d.group(1) if d else None, c.group(1) if c else None)
+
+
+def _parse_gpu_lines(output: str) -> List[str]:
+    """Format GPU rows from `nvidia-smi --query-gpu=name,...` CSV output (or plain table rows)."""
+    lines = [l.strip() for l in output.strip().splitlines() if l.strip()]
     parsed = []
     for idx, line in enumerate(lines):
         # each line: name, total, used, util
@@ -102,4 +425,167 @@ def get_gpu_status(timeout: float = 2.0) -> str:
             parsed.append(f"GPU{idx}: {name}, mem {total} MiB used {used} MiB, util {util} %")
         else:
             parsed.append(f"GPU{idx}: {line}")
-    return "\n".join(parsed)
+    return parsed
+
+
+def _parse_gpu_names(output: str) -> List[str]:
+    """Extract GPU names from either query CSV lines or the default nvidia-smi table."""
+    names = [m.group(2) for m in _SMI_TABLE_GPU_RE.finditer(output)]
+    if names:
+        return names
+    for line in output.splitlines():
+        parts = [p.strip() for p in line.split(',')]
+        if len(parts) >= 4 and all(p.replace('.', '', 1).isdigit() for p in parts[1:4]):
+            names.append(parts[0])
+    return names
+
+
+def _nvml_devices():
+    from .nvml import NvmlError, get_nvml
+
+    nv = get_nvml()
+    if nv is None:
+        return None
+    try:
+        return nv.devices()
+    except NvmlError:
+        return None
+
+
+def _nvml_gpu_lines() -> Optional[List[str]]:
+    devices = _nvml_devices()
+    if not devices:
+        return None
+    return [f"GPU{d.index}: {d.name}, mem {d.memory_total} MiB used {d.memory_used} MiB, "
+            f"util {'N/A' if d.utilization is None else d.utilization} %" for d in devices]
+
+
+GPU_STATUS_UNAVAILABLE = "无法获取 GPU 信息 (nvidia-smi 不可用或没有 NVIDIA GPU)"
+
+
+def get_gpu_status(timeout: float = 2.0) -> str:
+    """Return a short human-readable GPU status string using nvidia-smi.
+
+    Example output (multi-line):
+      GPU0: NVIDIA GeForce RTX 3080, mem 10240MiB used 1234MiB, util 12%
+
+    If nvidia-smi not available or no GPUs, returns an informative message.
+    NVML is used instead of nvidia-smi when available.
+    """
+    lines = _nvml_gpu_lines()
+    if lines:
+        return "\n".join(lines)
+    out = _run_cmd(GPU_QUERY_CMD, timeout=timeout)
+    if not out.strip():
+        return GPU_STATUS_UNAVAILABLE
+    return "\n".join(_parse_gpu_lines(out))
+
+
+GPU_CC_CMD = ["nvidia-smi", "--query-gpu=compute_cap", "--format=csv,noheader"]
+_CC_RE = re.compile(r"^\s*(\d+\.\d+)\s*$", re.MULTILINE)
+
+
+def _parse_compute_caps(output: str) -> List[str]:
+    """One "major.minor" per GPU; drivers without the compute_cap field print an error instead."""
+    return _CC_RE.findall(output)
+
+
+def get_compute_capabilities(timeout: float = 2.0) -> List[str]:
+    """Compute capability of each GPU, in nvidia-smi order (e.g. ["8.6", "8.6"]); [] when unknown."""
+    devices = _nvml_devices()
+    if devices and all(d.compute_cap for d in devices):
+        return [d.compute_cap for d in devices]
+    return _parse_compute_caps(_run_cmd(GPU_CC_CMD, timeout=timeout))
+
+
+DETECT_CACHE_TTL = 24 * 3600.0
+# memory use and utilization change by the second; the cache only spares back-to-back spawns
+GPU_STATUS_TTL = 5.0
+_SITE_DIRS = ("site-packages", "dist-packages")
+_FINGERPRINT_ENV = ("CUDA_HOME", "CUDA_PATH", "PATH", "LD_LIBRARY_PATH", "CONDA_PREFIX", "VIRTUAL_ENV")
+_detect_cache: Optional[JsonFileCache] = None
+
+
+def _get_detect_cache() -> JsonFileCache:
+    global _detect_cache
+    path = user_cache_dir() / "detect.json"
+    if _detect_cache is None or _detect_cache.path != path:
+        _detect_cache = JsonFileCache(path)
+    return _detect_cache
+
+
+def host_fingerprint() -> str:
+    """Cheap digest of everything detection results depend on; no processes spawned."""
+    parts = []
+    try:
+        with open("/proc/driver/nvidia/version", "rb") as f:
+            parts.append(f.read(512).decode(errors="replace"))
+    except OSError:
+        parts.append("")
+    nvcc = shutil.which("nvcc")
+    parts.append(nvcc or "")
+    if nvcc:
+        try:
+            parts.append(str(os.stat(nvcc).st_mtime_ns))
+        except OSError:
+            pass
+    for name in _FINGERPRINT_ENV:
+        parts.append(f"{name}={os.environ.get(name, '')}")
+    # installing or removing torch touches the site-packages directory mtime
+    parts.append(sys.executable)
+    for entry in sys.path:
+        if not entry or os.path.basename(os.path.normpath(entry)) not in _SITE_DIRS:
+            continue
+        try:
+            parts.append(f"{entry}:{os.stat(entry).st_mtime_ns}")
+        except OSError:
+            continue
+    return hashlib.sha1("\0".join(parts).encode("utf-8", "replace")).hexdigest()
+
+
+def _cached(name: str, compute: Callable[[], object], ttl: float, refresh: bool,
+            usable: Callable[[object], bool] = bool):
+    """Return the cached value for name on this host, else compute() it.
+
+    Only values for which usable(value) holds are stored, so a failed probe is
+    retried on the next call; storing a value drops the entry of any older
+    fingerprint for the same name.
+    """
+    if cache_disabled():
+        return compute()
+    cache = _get_detect_cache()
+    with metrics.span("detect_cache", entry=name) as s:
+        key = f"{name}:{host_fingerprint()}"
+        hit = None if refresh else cache.get(key, ttl=ttl)
+        if hit is None:
+            s.fail()
+    if hit is not None:
+        return hit
+    value = compute()
+    if usable(value):
+        prefix = f"{name}:"
+        cache.update({key: value}, drop=lambda k: k.startswith(prefix))
+    return value
+
+
+def get_cuda_version_cached(timeout: float = 2.0, ttl: float = DETECT_CACHE_TTL, refresh: bool = False) -> dict:
+    """get_cuda_version() backed by the on-disk detection cache.
+
+    refresh=True re-probes and overwrites the entry; TORCHSEARCH_NO_CACHE=1 bypasses the cache.
+    """
+    return _cached("cuda_version", lambda: get_cuda_version(timeout=timeout), ttl, refresh,
+                   usable=lambda res: isinstance(res, dict) and not res.get("error"))
+
+
+def get_gpu_status_cached(timeout: float = 2.0, ttl: float = GPU_STATUS_TTL, refresh: bool = False) -> str:
+    """get_gpu_status() backed by the on-disk detection cache (see get_cuda_version_cached).
+
+    The default TTL is seconds, not a day: the status carries live memory and utilization.
+    """
+    return _cached("gpu_status", lambda: get_gpu_status(timeout=timeout), ttl, refresh,
+                   usable=lambda out: bool(out) and out != GPU_STATUS_UNAVAILABLE)
+
+
+def get_compute_capabilities_cached(timeout: float = 2.0, ttl: float = DETECT_CACHE_TTL, refresh: bool = False) -> List[str]:
+    """get_compute_capabilities() backed by the on-disk detection cache."""
+    return _cached("compute_caps", lambda: get_compute_capabilities(timeout=timeout), ttl, refresh)
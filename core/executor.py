@@ -0,0 +1,291 @@
+"""Run a recommended install as a resolve -> download -> offline-install pipeline.
+
+Phases (each timed):
+  resolve   WheelResolver finds the recommended wheels, plus torch's pinned
+            nvidia-* / triton dependencies, for every target interpreter's
+            Python tag and platform;
+  download  the large wheels are fetched in parallel into a wheelhouse
+            (core.prefetch), then `pip download` fills in the small remaining
+            dependencies, with the wheelhouse as a find-links source;
+  install   `pip install --no-index --find-links <wheelhouse>` runs in every
+            target environment in parallel. With mode="store" the large wheels
+            (torch, torchvision, torchaudio, nvidia-*, triton) are first
+            hardlinked from the shared core.store, so pip only has the small
+            dependencies left to install.
+
+pip's output is parsed line by line into structured progress events passed to
+a callback. With index_url=None the first two phases are skipped and the
+install uses an existing wheelhouse as-is.
+
+Usage:
+    python -m core.executor --cuda 12.1 [--target /venvs/a/bin/python ...] [--wheelhouse DIR] [--mode store]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .cache import user_cache_dir
+from .prefetch import PrefetchError, WheelDownloader, resolve_files
+from .resolver import PACKAGES, PYTORCH_INDEX, ResolverError, WheelResolver
+from .store import StoreError, WheelStore, target_scheme
+from .wheels import is_compatible, parse_wheel_filename, version_key
+
+# how a target interpreter runs pip; tests point this at a stand-in script
+PIP_ARGS = ["-m", "pip"]
+
+# prints the interpreter's (python tag, platform family) in core.wheels format
+_TAG_SCRIPT = (
+    "import json, platform, sys; m = platform.machine().lower();"
+    "p = ('win_arm64' if m in ('arm64', 'aarch64') else 'win_amd64' if sys.maxsize > 2**32 else 'win32') "
+    "if sys.platform.startswith('win') else "
+    "('macosx_' + ('arm64' if m in ('arm64', 'aarch64') else 'x86_64')) if sys.platform == 'darwin' else "
+    "'linux_' + (m or 'x86_64');"
+    "print(json.dumps(['cp%d%d' % sys.version_info[:2], p]))"
+)
+
+_PIP_PATTERNS = (
+    ("processing", re.compile(r"^Processing\s+(?P<file>\S+)")),
+    ("collecting", re.compile(r"^Collecting\s+(?P<requirement>.+?)(?:\s+\(from .*\))?$")),
+    ("satisfied", re.compile(r"^Requirement already satisfied:\s+(?P<requirement>\S+)")),
+    ("installing", re.compile(r"^Installing collected packages:\s+(?P<packages>.+)$")),
+    ("installed", re.compile(r"^Successfully installed\s+(?P<packages>.+)$")),
+    ("saved", re.compile(r"^(?:Saved|File was already downloaded)\s+(?P<file>\S+)")),
+    ("error", re.compile(r"^ERROR:\s+(?P<message>.+)$")),
+    ("warning", re.compile(r"^WARNING:\s+(?P<message>.+)$")),
+)
+
+MODES = ("pip", "store")
+
+EventCallback = Callable[[Dict], None]
+
+
+def parse_pip_line(line: str) -> Dict:
+    """Turn one line of pip output into an event dict with a "kind" key."""
+    line = line.rstrip()
+    for kind, pattern in _PIP_PATTERNS:
+        m = pattern.match(line.strip())
+        if m:
+            event = {"kind": kind, **m.groupdict()}
+            if "packages" in event:
+                event["packages"] = [p.strip() for p in re.split(r"[,\s]+", event["packages"]) if p.strip()]
+            return event
+    return {"kind": "output", "line": line}
+
+
+def target_tags(python: str, timeout: float = 30.0) -> Tuple[str, str]:
+    """(python tag, platform family) of a target interpreter, e.g. ("cp311", "linux_x86_64")."""
+    out = subprocess.run([python, "-c", _TAG_SCRIPT], capture_output=True, text=True, timeout=timeout, check=True).stdout
+    tag, plat = json.loads(out.strip().splitlines()[-1])
+    return tag, plat
+
+
+def requirement_pins(recommendation: Dict) -> List[str]:
+    tag = recommendation.get("pip_tag")
+    return [f"{pkg}=={recommendation[pkg]}" + (f"+{tag}" if tag else "") for pkg in PACKAGES if recommendation.get(pkg)]
+
+
+class InstallExecutor:
+    """Resolve, download and install a recommendation into one or more environments."""
+
+    def __init__(self, recommendation: Dict, targets: Optional[List[str]] = None, wheelhouse=None,
+                 index_url: Optional[str] = PYTORCH_INDEX, with_deps: bool = True, max_workers: int = 8,
+                 on_event: Optional[EventCallback] = None, extra_pip_args: Optional[List[str]] = None,
+                 mode: str = "pip", store: Optional[WheelStore] = None):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.recommendation = recommendation
+        self.targets = list(targets or [sys.executable])
+        self.wheelhouse = Path(wheelhouse) if wheelhouse else user_cache_dir() / "wheelhouse"
+        self.index_url = index_url
+        self.with_deps = with_deps
+        self.max_workers = max_workers
+        self.on_event = on_event
+        self.extra_pip_args = list(extra_pip_args or [])
+        self.mode = mode
+        self.store = store or (WheelStore() if mode == "store" else None)
+        self.timings: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _emit(self, phase: str, env: Optional[str] = None, **event) -> None:
+        if self.on_event is not None:
+            with self._lock:
+                self.on_event({"phase": phase, "env": env, **event})
+
+    def _run_pip(self, phase: str, python: str, args: List[str]) -> Dict:
+        """Run pip in a target interpreter, streaming parsed events; returns a summary."""
+        cmd = [python, *PIP_ARGS, *args]
+        self._emit(phase, python, kind="start", command=cmd)
+        installed: List[str] = []
+        errors: List[str] = []
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+        with proc.stdout:
+            for line in proc.stdout:
+                event = parse_pip_line(line)
+                if event["kind"] == "installed":
+                    installed.extend(event["packages"])
+                elif event["kind"] == "error":
+                    errors.append(event["message"])
+                self._emit(phase, python, **event)
+        returncode = proc.wait()
+        self._emit(phase, python, kind="exit", returncode=returncode)
+        return {"returncode": returncode, "installed": installed, "errors": errors}
+
+    def _timed(self, phase: str, fn, *args):
+        self._emit(phase, kind="phase_start")
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.timings[phase] = round(time.perf_counter() - t0, 3)
+            self._emit(phase, kind="phase_end", seconds=self.timings[phase])
+
+    def resolve(self, tags: Dict[str, Tuple[str, str]]):
+        resolver = WheelResolver(index_url=self.index_url, max_workers=self.max_workers)
+        try:
+            files = {}
+            for python_tag, plat in dict.fromkeys(tags.values()):
+                for f in resolve_files(self.recommendation, resolver, python_tag, plat, self.with_deps):
+                    files[f.filename] = f
+        finally:
+            resolver.close()
+        self._emit("resolve", kind="resolved", files=sorted(files))
+        return list(files.values())
+
+    def download(self, files, tags: Dict[str, Tuple[str, str]]) -> Dict:
+        downloader = WheelDownloader(
+            self.wheelhouse, max_workers=self.max_workers,
+            progress=lambda e: self._emit("download", **e, kind="progress"),
+        )
+        downloader.download_all(files)
+        summary = downloader.summary()
+        if self.with_deps:
+            # remaining small dependencies: one pip download per distinct interpreter tag, in parallel
+            index = f"{self.index_url}/{self.recommendation.get('pip_tag') or 'cpu'}"
+            args = ["download", "--dest", str(self.wheelhouse), "--find-links", str(self.wheelhouse),
+                    "--extra-index-url", index, "--only-binary=:all:", *requirement_pins(self.recommendation)]
+            pythons = list({t: p for p, t in tags.items()}.values())
+            with ThreadPoolExecutor(max_workers=len(pythons)) as ex:
+                results = list(ex.map(lambda p: self._run_pip("download", p, args), pythons))
+            failed = [r for r in results if r["returncode"] != 0]
+            if failed:
+                raise PrefetchError("pip download failed: " + "; ".join(failed[0]["errors"] or ["see pip output"]))
+        return summary
+
+    def _store_wheels(self, python_tag: str, plat: str) -> List[Path]:
+        """Large wheels in the wheelhouse for one target: the pinned triple plus the newest nvidia-*/triton."""
+        pip_tag = self.recommendation.get("pip_tag")
+        chosen: Dict[str, tuple] = {}
+        for path in sorted(self.wheelhouse.glob("*.whl")):
+            w = parse_wheel_filename(path.name)
+            if w is None or not is_compatible(w, python_tag, plat):
+                continue
+            if w.name in PACKAGES:
+                if w.version != self.recommendation.get(w.name) or w.local not in (pip_tag or "cpu", None):
+                    continue
+            elif not (w.name.startswith("nvidia-") or w.name == "triton"):
+                continue
+            if w.name not in chosen or version_key(w.version) > version_key(chosen[w.name][0]):
+                chosen[w.name] = (w.version, path)
+        return [path for _, path in chosen.values()]
+
+    def link_from_store(self, tags: Dict[str, Tuple[str, str]]) -> Dict[str, List[Dict]]:
+        """Add the large wheels to the store once, then hardlink them into every target in parallel."""
+        per_target = {python: self._store_wheels(*tags[python]) for python in self.targets}
+        digests = {path: self.store.add(path) for path in dict.fromkeys(p for ws in per_target.values() for p in ws)}
+
+        def run(python):
+            scheme = target_scheme(python)
+            results = []
+            for path in per_target[python]:
+                res = self.store.install(digests[path], scheme, python)
+                self._emit("link", python, kind="linked", **res)
+                results.append(res)
+            return python, results
+
+        with ThreadPoolExecutor(max_workers=len(self.targets)) as ex:
+            return dict(ex.map(run, self.targets))
+
+    def install(self) -> Dict[str, Dict]:
+        args = ["install", "--no-index", "--find-links", str(self.wheelhouse), *self.extra_pip_args,
+                *requirement_pins(self.recommendation)]
+        t0 = time.perf_counter()
+        per_env: Dict[str, float] = {}
+
+        def run(python):
+            result = self._run_pip("install", python, args)
+            per_env[python] = round(time.perf_counter() - t0, 3)
+            return python, result
+
+        with ThreadPoolExecutor(max_workers=len(self.targets)) as ex:
+            envs = dict(ex.map(run, self.targets))
+        self.timings["install_per_env"] = per_env
+        return envs
+
+    def run(self) -> Dict:
+        """Run all phases. Returns {"ok", "envs", "timings", "download", "error"} (plus "linked" in store mode)."""
+        result: Dict = {"ok": False, "envs": {}, "timings": self.timings, "download": None, "error": None}
+        try:
+            if self.index_url or self.mode == "store":
+                tags = self._timed("probe", lambda: {p: target_tags(p) for p in self.targets})
+            if self.index_url:
+                files = self._timed("resolve", self.resolve, tags)
+                result["download"] = self._timed("download", self.download, files, tags)
+            if self.mode == "store":
+                result["linked"] = self._timed("link", self.link_from_store, tags)
+            result["envs"] = self._timed("install", self.install)
+        except (PrefetchError, ResolverError, StoreError, OSError, subprocess.SubprocessError) as e:
+            result["error"] = str(e)
+            self._emit("error", kind="error", message=str(e))
+            return result
+        result["ok"] = all(env["returncode"] == 0 for env in result["envs"].values())
+        return result
+
+
+def _print_event(event: Dict) -> None:
+    kind = event["kind"]
+    if kind == "progress" and event.get("status") != "done":
+        return
+    if kind in ("output", "start"):
+        return
+    where = f" [{event['env']}]" if event.get("env") else ""
+    detail = {k: v for k, v in event.items() if k not in ("phase", "env", "kind")}
+    print(f"{event['phase']}{where} {kind} {json.dumps(detail, ensure_ascii=False) if detail else ''}".rstrip(), file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m core.executor", description="Download the recommended wheels once and install them offline into one or more environments.")
+    parser.add_argument("--cuda", help="CUDA version (default: auto-detect)")
+    parser.add_argument("--target", action="append", help="target Python interpreter (repeatable; default: this one)")
+    parser.add_argument("--wheelhouse", help=f"download cache (default: {user_cache_dir() / 'wheelhouse'})")
+    parser.add_argument("--index-url", default=PYTORCH_INDEX)
+    parser.add_argument("--offline", action="store_true", help="skip resolve/download and install from the wheelhouse only")
+    parser.add_argument("--no-deps", action="store_true", help="only fetch torch/torchvision/torchaudio")
+    parser.add_argument("--mode", choices=MODES, default="pip",
+                        help="store: hardlink large wheels from the shared store before pip runs (default: pip)")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    from .api import detect_and_prepare
+
+    rec = detect_and_prepare(cuda_override=args.cuda).get("recommendation")
+    if not rec:
+        print("未能得到推荐版本，请使用 --cuda 指定。", file=sys.stderr)
+        return 1
+    executor = InstallExecutor(rec, args.target, args.wheelhouse, None if args.offline else args.index_url,
+                               not args.no_deps, args.workers, on_event=_print_event, mode=args.mode)
+    result = executor.run()
+    print(json.dumps(result, ensure_ascii=False))
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""Turn captured `nvcc --version` / `nvidia-smi` dumps into a recommendation report.
+
+Input is a directory (walked recursively) or a tarball with one text file per
+host; the host name is the file's relative path without a .txt, .out or .json
+extension (node-7.example.com.txt -> node-7.example.com). A file
+may hold nvcc output, nvidia-smi output, or both concatenated, e.g.:
+
+    { nvcc --version; nvidia-smi; } > dumps/$(hostname).txt
+
+Parsing and lookup run in a process pool. Hosts are submitted in batches with a
+bounded number of batches in flight and results are streamed out in input
+order, so memory stays flat regardless of fleet size.
+
+Usage:
+    python -m core.fleet DUMPS [-o report.csv] [--format csv|jsonl] [--workers N]
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sys
+import tarfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from .compat import get_engine, recommend_for_driver
+from .detector import _parse_gpu_names, _parse_nvcc_output, _parse_smi_header
+from .installer import generate_pip_command
+from .version_mapper import get_torch_versions
+
+REPORT_FIELDS = (
+    "host", "source", "cuda_version", "nvcc_version", "driver_version", "driver_cuda",
+    "gpu_count", "gpus", "torch", "torchvision", "torchaudio", "pip_tag", "install_command", "error",
+)
+
+DUMP_EXTENSIONS = (".txt", ".out", ".json")
+
+# a dump is either a path to read in the worker or text already read from a tarball
+Dump = Tuple[str, Optional[str], Optional[bytes]]
+
+
+def analyze_dump(host: str, text: str, versions_path: Optional[str] = None) -> Dict:
+    """Parse one host's dump and attach a recommendation.
+
+    The nvcc release wins; otherwise the build is chosen for the driver, like
+    api.detect_and_prepare does: the newest one runnable on the maximum CUDA
+    version from the nvidia-smi header (or, without it, on what the driver
+    version supports).
+    """
+    nvcc = _parse_nvcc_output(text)
+    driver, driver_cuda = _parse_smi_header(text)
+    gpus = _parse_gpu_names(text)
+    row: Dict = dict.fromkeys(REPORT_FIELDS)
+    row.update(
+        host=host, nvcc_version=nvcc, driver_version=driver, driver_cuda=driver_cuda,
+        gpu_count=len(gpus), gpus="; ".join(gpus),
+    )
+    if nvcc:
+        row["source"], row["cuda_version"] = "nvcc", nvcc
+        rec = get_torch_versions(nvcc, versions_path=versions_path)
+    elif driver_cuda or driver:
+        runtime = driver_cuda or get_engine(versions_path).max_runtime_for_driver(driver)
+        if not runtime:
+            row["error"] = f"driver {driver} is too old for any known CUDA runtime"
+            return row
+        row["source"], row["cuda_version"] = "nvidia-smi", runtime
+        rec = recommend_for_driver(driver, versions_path=versions_path, max_cuda=runtime)
+    else:
+        row["error"] = "no CUDA version found in dump"
+        return row
+
+    if not rec:
+        row["error"] = f"no mapping for CUDA {row['cuda_version']}"
+        return row
+    row.update(rec)
+    row["install_command"] = generate_pip_command(rec)
+    return row
+
+
+def _analyze_batch(batch: List[Dump], versions_path: Optional[str]) -> List[Dict]:
+    out = []
+    for host, path, data in batch:
+        try:
+            if data is None:
+                data = Path(path).read_bytes()
+            out.append(analyze_dump(host, data.decode("utf-8", errors="replace"), versions_path))
+        except Exception as e:
+            row = dict.fromkeys(REPORT_FIELDS)
+            row.update(host=host, gpu_count=0, error=f"{type(e).__name__}: {e}")
+            out.append(row)
+    return out
+
+
+def _host_name(rel: str) -> str:
+    # host names have dots of their own, so only known dump extensions are stripped
+    rel = rel.replace(os.sep, "/")
+    for ext in DUMP_EXTENSIONS:
+        if rel.lower().endswith(ext):
+            return rel[:-len(ext)]
+    return rel
+
+
+def iter_dumps(source: str) -> Iterator[Dump]:
+    """Yield (host, path, data) for each dump file, lazily, in a stable order."""
+    if os.path.isfile(source) and tarfile.is_tarfile(source):
+        with tarfile.open(source, "r:*") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                f = tar.extractfile(member)
+                if f is not None:
+                    yield _host_name(member.name), None, f.read()
+        return
+
+    root = Path(source)
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        with os.scandir(d) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(Path(entry.path))
+            elif entry.is_file():
+                yield _host_name(os.path.relpath(entry.path, root)), entry.path, None
+
+
+def _batched(items: Iterable[Dump], size: int) -> Iterator[List[Dump]]:
+    batch: List[Dump] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def analyze_fleet(source: str, versions_path: Optional[str] = None, workers: Optional[int] = None, batch_size: int = 256) -> Iterator[Dict]:
+    """Yield one report row per host dump under source, in input order.
+
+    workers=0 analyzes in-process (useful for small inputs and debugging).
+    """
+    batches = _batched(iter_dumps(source), batch_size)
+    if workers == 0:
+        for batch in batches:
+            yield from _analyze_batch(batch, versions_path)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        inflight: deque = deque()
+        for batch in batches:
+            inflight.append(pool.submit(_analyze_batch, batch, versions_path))
+            # keep a few batches per worker queued; the rest stay on disk
+            if len(inflight) >= workers * 4:
+                yield from inflight.popleft().result()
+        while inflight:
+            yield from inflight.popleft().result()
+
+
+def write_report(rows: Iterable[Dict], out: TextIO, fmt: str = "csv") -> int:
+    """Stream rows to out as CSV or JSON lines; returns the number of rows written."""
+    n = 0
+    if fmt == "jsonl":
+        for row in rows:
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            n += 1
+        return n
+    writer = csv.DictWriter(out, fieldnames=REPORT_FIELDS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        n += 1
+    return n
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m core.fleet", description="Build a torch recommendation report from captured nvcc/nvidia-smi dumps.")
+    parser.add_argument("source", help="directory or tarball of per-host dump files")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default=None, help="default: from output suffix, else csv")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (0 = in-process)")
+    parser.add_argument("--versions", help="path to versions.json")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("jsonl" if (args.output or "").endswith((".jsonl", ".json")) else "csv")
+    rows = analyze_fleet(args.source, versions_path=args.versions, workers=args.workers)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            n = write_report(rows, f, fmt)
+    else:
+        n = write_report(rows, sys.stdout, fmt)
+    print(f"{n} hosts", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""Live GPU monitor backed by one long-lived `nvidia-smi -l` process.
+
+Instead of spawning nvidia-smi per refresh, GpuMonitor starts a single
+`nvidia-smi --query-gpu=... --format=csv -l <interval>` child and parses its
+stdout line by line on a reader thread. The reader blocks in readline between
+samples, so the cost at 1 Hz is effectively nil. Each GPU keeps a bounded ring
+buffer of recent samples.
+"""
+from __future__ import annotations
+
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional
+
+from .detector import _kill_group, _popen_kwargs
+
+QUERY_FIELDS = "index,name,memory.total,memory.used,utilization.gpu"
+
+
+class GpuSample(NamedTuple):
+    timestamp: float
+    index: int
+    name: str
+    memory_total: str
+    memory_used: str
+    utilization: str
+
+
+def monitor_command(interval: float) -> List[str]:
+    cmd = ["nvidia-smi", f"--query-gpu={QUERY_FIELDS}", "--format=csv,noheader,nounits"]
+    if interval >= 1 and float(interval).is_integer():
+        return cmd + ["-l", str(int(interval))]
+    return cmd + ["-lms", str(max(1, int(interval * 1000)))]
+
+
+def parse_sample(line: str, timestamp: Optional[float] = None) -> Optional[GpuSample]:
+    """Parse one CSV row of QUERY_FIELDS; returns None for anything else."""
+    parts = [p.strip() for p in line.split(",")]
+    if len(parts) < 5 or not parts[0].isdigit():
+        return None
+    return GpuSample(timestamp if timestamp is not None else time.time(), int(parts[0]), parts[1], parts[2], parts[3], parts[4])
+
+
+def format_sample(s: GpuSample) -> str:
+    # same shape as core.detector.get_gpu_status lines
+    return f"GPU{s.index}: {s.name}, mem {s.memory_total} MiB used {s.memory_used} MiB, util {s.utilization} %"
+
+
+class GpuMonitor:
+    """Stream GPU samples from a single nvidia-smi child process.
+
+    Usage:
+        mon = GpuMonitor(interval=1.0).start()
+        mon.format_lines()   # latest sample per GPU
+        mon.stop()
+    """
+
+    def __init__(self, interval: float = 1.0, history: int = 120, command: Optional[List[str]] = None):
+        self.interval = interval
+        self.command = command or monitor_command(interval)
+        self._history = history
+        self._buffers: Dict[int, Deque[GpuSample]] = {}
+        self._lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+        self._reader: Optional[threading.Thread] = None
+        self.error: Optional[str] = None
+        # bumped on every new sample so pollers can skip redraws when nothing changed
+        self.seq = 0
+
+    @property
+    def running(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self) -> "GpuMonitor":
+        if self._proc is not None:
+            return self
+        try:
+            self._proc = subprocess.Popen(
+                self.command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                text=True, bufsize=1, **_popen_kwargs()
+            )
+        except OSError as e:
+            self.error = str(e)
+            return self
+        self._reader = threading.Thread(target=self._read_loop, name="torchsearch-gpu-monitor", daemon=True)
+        self._reader.start()
+        return self
+
+    def _read_loop(self) -> None:
+        proc = self._proc
+        for line in proc.stdout:
+            sample = parse_sample(line)
+            if sample is None:
+                continue
+            with self._lock:
+                buf = self._buffers.get(sample.index)
+                if buf is None:
+                    buf = self._buffers[sample.index] = deque(maxlen=self._history)
+                buf.append(sample)
+                self.seq += 1
+
+    def stop(self, timeout: float = 2.0) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        if proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                _kill_group(proc)
+                proc.wait()
+        if self._reader is not None:
+            self._reader.join(timeout)
+            self._reader = None
+        if proc.stdout is not None:
+            proc.stdout.close()
+
+    def latest(self) -> List[GpuSample]:
+        """Most recent sample per GPU, ordered by GPU index."""
+        with self._lock:
+            return [self._buffers[i][-1] for i in sorted(self._buffers) if self._buffers[i]]
+
+    def history(self, index: int) -> List[GpuSample]:
+        with self._lock:
+            return list(self._buffers.get(index, ()))
+
+    def format_lines(self) -> List[str]:
+        return [format_sample(s) for s in self.latest()]
@@ -0,0 +1,100 @@
+"""Streaming sha256 digests for large wheel files, with a persistent digest cache.
+
+torch wheels are 2+ GB, so files are hashed through mmap (or large readinto
+buffers where mmap is unavailable) on a thread pool; hashlib releases the GIL
+while digesting, so several wheels hash in parallel. Digests are cached on disk
+keyed by (absolute path, size, mtime_ns): an unchanged wheel is never rehashed.
+Writing a new digest for a path drops that path's older entries, and the cache
+keeps at most MAX_CACHED_DIGESTS entries (oldest evicted first).
+"""
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from .cache import JsonFileCache, cache_disabled, user_cache_dir
+
+CHUNK_SIZE = 8 * 1024 * 1024
+MAX_CACHED_DIGESTS = 4096
+
+_DIGEST_CACHE: Optional[JsonFileCache] = None
+
+
+def digest_cache() -> JsonFileCache:
+    global _DIGEST_CACHE
+    path = user_cache_dir() / "digests.json"
+    if _DIGEST_CACHE is None or _DIGEST_CACHE.path != path:
+        _DIGEST_CACHE = JsonFileCache(path)
+    return _DIGEST_CACHE
+
+
+def _path_prefix(path: str) -> str:
+    return f"sha256:{path}:"
+
+
+def _cache_key(path: str, st: os.stat_result) -> str:
+    return f"{_path_prefix(path)}{st.st_size}:{st.st_mtime_ns}"
+
+
+def sha256_file(path, chunk_size: int = CHUNK_SIZE) -> str:
+    """Hex sha256 of a file, read through mmap in chunk_size slices."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # empty files and filesystems without mmap support
+            mm = None
+        if mm is not None:
+            with mm:
+                view = memoryview(mm)
+                try:
+                    for off in range(0, len(mm), chunk_size):
+                        h.update(view[off:off + chunk_size])
+                finally:
+                    view.release()
+            return h.hexdigest()
+        buf = bytearray(chunk_size)
+        view = memoryview(buf)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+def hash_files(paths: Iterable, max_workers: Optional[int] = None, use_cache: bool = True) -> Dict[str, str]:
+    """Return {absolute path: sha256 hex} for paths, hashing only cache misses concurrently."""
+    cache = digest_cache() if use_cache and not cache_disabled() else None
+    result: Dict[str, str] = {}
+    todo = {}
+    for p in dict.fromkeys(os.path.abspath(p) for p in paths):
+        st = os.stat(p)
+        key = _cache_key(p, st)
+        cached = cache.get(key) if cache is not None else None
+        if cached:
+            result[p] = cached
+        else:
+            todo[p] = key
+    if not todo:
+        return result
+
+    workers = max_workers or min(len(todo), os.cpu_count() or 4)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for p, digest in zip(todo, ex.map(sha256_file, todo)):
+            result[p] = digest
+    if cache is not None:
+        # a rehashed path's previous (size, mtime) entries are dead weight
+        prefixes = tuple(_path_prefix(p) for p in todo)
+        cache.update({key: result[p] for p, key in todo.items()},
+                     drop=lambda k: k.startswith(prefixes), max_entries=MAX_CACHED_DIGESTS)
+    return result
+
+
+def file_digest(path: Path, use_cache: bool = True) -> str:
+    return hash_files([path], max_workers=1, use_cache=use_cache)[os.path.abspath(path)]
@@ -44,3 +44,70 @@ def generate_pip_command(recommendation: Dict, extras: Optional[List[str]] = Non
     else:
         cmd = f"pip install {' '.join(parts)}"
     return cmd
+
+
+class LockfileError(Exception):
+    """Raised when a recommended wheel is missing from the wheelhouse."""
+
+
+def find_wheels(recommendation: Dict, wheelhouse, python_tag: Optional[str] = None,
+                platform: Optional[str] = None) -> Dict[str, List]:
+    """Wheel files in wheelhouse for each recommended package, matching version and cu tag.
+
+    With python_tag/platform unset every matching file is kept, so the lockfile
+    installs on any host the wheelhouse covers.
+    """
+    # imported here so plain command lookups stay on the lazy cold-start path
+    from pathlib import Path
+
+    from .wheels import is_compatible, parse_wheel_filename
+
+    pip_tag = recommendation.get("pip_tag")
+    found: Dict[str, List] = {pkg: [] for pkg in ("torch", "torchvision", "torchaudio") if recommendation.get(pkg)}
+    for path in sorted(Path(wheelhouse).glob("*.whl")):
+        w = parse_wheel_filename(path.name)
+        if w is None or w.name not in found or w.version != recommendation[w.name]:
+            continue
+        if w.local not in (pip_tag or "cpu", None):
+            continue
+        if (python_tag or platform) and not is_compatible(w, python_tag, platform):
+            continue
+        found[w.name].append(path)
+    return found
+
+
+def generate_lockfile(recommendation: Dict, wheelhouse, python_tag: Optional[str] = None,
+                      platform: Optional[str] = None, max_workers: Optional[int] = None) -> str:
+    """Generate a hash-pinned requirements file for torch, torchvision and torchaudio.
+
+    Only these three packages are pinned, while pip's hash-checking mode needs
+    every requirement pinned and hashed; the file is therefore meant for
+    `pip install --no-deps --require-hashes -r <file>`, with dependencies
+    installed separately. Digests are computed from the wheel files in
+    wheelhouse (see core.hashing).
+    """
+    import os
+
+    from .hashing import hash_files
+    from .wheels import parse_wheel_filename
+
+    found = find_wheels(recommendation, wheelhouse, python_tag, platform)
+    missing = [pkg for pkg, files in found.items() if not files]
+    if missing:
+        raise LockfileError(f"no wheel in {wheelhouse} for: " + ", ".join(f"{p}=={recommendation[p]}" for p in missing))
+    digests = hash_files([f for files in found.values() for f in files], max_workers=max_workers)
+
+    pip_tag = recommendation.get("pip_tag")
+    lines = [
+        f"# generated by torchsearch from {wheelhouse}; install with: pip install --no-deps --require-hashes -r <file>",
+        "# only torch/torchvision/torchaudio are pinned here: install their dependencies separately",
+    ]
+    if pip_tag:
+        lines.append(f"--extra-index-url https://download.pytorch.org/whl/{pip_tag}")
+    for pkg, files in found.items():
+        # a plain "==X" also matches X+local; only pin the label when every file carries it
+        tagged = pip_tag and all(parse_wheel_filename(f.name).local == pip_tag for f in files)
+        pin = f"{pkg}=={recommendation[pkg]}" + (f"+{pip_tag}" if tagged else "")
+        hashes = sorted({digests[os.path.abspath(f)] for f in files})
+        lines.append(" \\\n".join([pin] + [f"    --hash=sha256:{h}" for h in hashes]))
+    return "\n".join(lines) + "\n"
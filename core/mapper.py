@@ -7,18 +7,32 @@ Example format:
 }
 
 If the file is missing, a built-in constant map is used as a fallback.
+
+Lookups go through a compiled `VersionIndex` which is built once per data file
+and cached by path; the cache entry is rebuilt when the file's mtime or size changes.
+A path can also be pinned to an index (see core.reload), in which case lookups
+skip the stat() entirely and the pinned index is replaced atomically on reload.
+
+When a compiled `versions.bin` (see core.binmap) sits next to the JSON and was
+built from its current content, it is memory-mapped instead of parsing the JSON.
 """
 from __future__ import annotations
 
-import json
+import re
+import threading
+from bisect import bisect_left
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
 from utils.constants import TORCH_VERSION_MAP
 
+from . import metrics
+
 
 DEFAULT_DATA_PATH = Path(__file__).resolve().parent.parent / "data" / "versions.json"
 
+_VERSION_RE = re.compile(r"(\d+)\.(\d+)")
+
 
 def _convert_constants_map() -> Dict[str, Dict]:
     """Convert utils.constants.TORCH_VERSION_MAP (tuple values) into the dict shape used by JSON data."""
@@ -40,55 +54,178 @@ def load_versions(path: Optional[str] | None = None) -> Dict[str, Dict]:
     if not p.exists():
         # fallback to built-in constants
         return _convert_constants_map()
-    with p.open("r", encoding="utf-8") as f:
+    import json  # only needed when a JSON data file is actually read
+
+    with metrics.span("load_versions"), p.open("r", encoding="utf-8") as f:
         return json.load(f)
 
 
-def get_recommendations(cuda_version: Optional[str], versions_data: Optional[Dict] = None) -> Dict:
-    """Return recommendations for a given cuda_version.
+def normalize_cuda_version(cuda_version: Optional[str]) -> Optional[str]:
+    """Normalize a raw CUDA version string ("11.8.89", "12.1") to "major.minor", or None."""
+    if not cuda_version:
+        return None
+    m = _VERSION_RE.match(str(cuda_version))
+    if not m:
+        return None
+    return f"{m.group(1)}.{m.group(2)}"
 
-    If exact match not found, tries to match major.minor; if no exact minor exists,
-    it will try to find the closest minor within the same major (numerically closest).
-    Returns empty dict when no candidates found.
-    """
-    if versions_data is None:
-        versions_data = load_versions()
 
-    if not cuda_version:
-        return {}
+def _parse_key(key: str) -> Optional[Tuple[int, int]]:
+    """Parse a mapping key into numeric (major, minor); keys without a minor count as minor 0."""
+    parts = str(key).split(".")
+    try:
+        major = int(parts[0])
+        minor = int(parts[1]) if len(parts) > 1 else 0
+    except ValueError:
+        return None
+    return major, minor
 
-    # normalize to major.minor
-    norm = None
-    import re
 
-    m = re.match(r"(\d+\.\d+)", str(cuda_version))
-    if m:
-        norm = m.group(1)
+def copy_record(rec: Dict) -> Dict:
+    """Copy of a mapping record (and its list fields) that callers may modify."""
+    return {k: list(v) if isinstance(v, list) else v for k, v in rec.items()}
 
-    if norm and norm in versions_data:
-        return versions_data[norm]
 
-    # fallback: try to find candidates with same major (e.g., 11.x)
-    if norm:
-        major = norm.split(".")[0]
-        candidates = {k: v for k, v in versions_data.items() if k.split(".")[0] == major}
-        if candidates:
-            # pick the closest minor numerically to the requested norm
+class VersionIndex:
+    """Compiled, read-only view over a versions mapping.
+
+    Exact keys are kept in a dict; numeric keys are additionally grouped per major
+    into sorted minor arrays so the nearest-minor fallback is a bisect instead of a scan.
+    """
+
+    def __init__(self, versions_data: Dict[str, Dict]):
+        self.data = versions_data
+        self._exact: Dict[str, Dict] = dict(versions_data)
+        self._numeric: Dict[Tuple[int, int], Dict] = {}
+        self._minors: Dict[int, List[int]] = {}
+        for key, rec in versions_data.items():
+            parsed = _parse_key(key)
+            if parsed is None:
+                continue
+            # keep the first key seen for a numeric pair (e.g. "11.8" vs "11.08")
+            if parsed not in self._numeric:
+                self._numeric[parsed] = rec
+                self._minors.setdefault(parsed[0], []).append(parsed[1])
+        for minors in self._minors.values():
+            minors.sort()
+
+    def lookup(self, cuda_version: Optional[str]) -> Dict:
+        """Return the record for cuda_version using the same rules as get_recommendations.
+
+        The result is a copy: the index is shared process-wide, so changing a
+        returned record must not change later lookups.
+        """
+        rec = self._find(cuda_version)
+        return copy_record(rec) if rec else {}
+
+    def _find(self, cuda_version: Optional[str]) -> Dict:
+        norm = normalize_cuda_version(cuda_version)
+        if not norm:
+            return {}
+        rec = self._exact.get(norm)
+        if rec is not None:
+            return rec
+        major, minor = (int(x) for x in norm.split("."))
+        rec = self._numeric.get((major, minor))
+        if rec is not None:
+            return rec
+        minors = self._minors.get(major)
+        if not minors:
+            return {}
+        # nearest minor within the same major; on a tie prefer the higher minor
+        i = bisect_left(minors, minor)
+        if i == 0:
+            best = minors[0]
+        elif i == len(minors):
+            best = minors[-1]
+        else:
+            lo, hi = minors[i - 1], minors[i]
+            best = hi if hi - minor <= minor - lo else lo
+        return self._numeric[(major, best)]
+
+
+# path -> ((mtime_ns, size) or None, VersionIndex)
+_INDEX_CACHE: Dict[str, Tuple[Optional[Tuple[int, int]], VersionIndex]] = {}
+_INDEX_LOCK = threading.Lock()
+# path -> VersionIndex kept current by a watcher; served without stat()
+_PINNED: Dict[str, VersionIndex] = {}
+
+
+def get_index(path: Optional[str] = None) -> VersionIndex:
+    """Return the cached VersionIndex for path (or the bundled data file).
+
+    The index is rebuilt only when the file's mtime or size changes; when the file
+    does not exist the built-in constants map is indexed instead.
+    """
+    p = Path(path) if path else DEFAULT_DATA_PATH
+    key = str(p)
+    pinned = _PINNED.get(key)
+    if pinned is not None:
+        return pinned
+    try:
+        st = p.stat()
+        stamp: Optional[Tuple[int, int]] = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = None
+
+    cached = _INDEX_CACHE.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    with _INDEX_LOCK:
+        cached = _INDEX_CACHE.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        index = _load_compiled(p)
+        if index is None:
+            data = load_versions(key) if stamp is not None else _convert_constants_map()
+            with metrics.span("index_build"):
+                index = VersionIndex(data)
+        _INDEX_CACHE[key] = (stamp, index)
+        return index
+
+
+def _load_compiled(p: Path):
+    """mmap-backed index from the .bin next to p (or p itself), if present and current."""
+    bin_path = p.with_suffix(".bin")
+    if not bin_path.exists():
+        return None
+    from .binmap import BinaryIndex, BinaryMapError, load_binary_index
+
+    with metrics.span("load_binary"):
+        if p.suffix == ".bin":
             try:
-                target_minor = float(norm.split(".")[1])
-            except Exception:
-                # if parsing failed, fallback to the highest available
-                best = sorted(candidates.keys(), reverse=True)[0]
-                return versions_data[best]
+                return BinaryIndex(p)
+            except (OSError, BinaryMapError):
+                return None
+        return load_binary_index(p)
+
 
-            def minor_of(key: str) -> float:
-                parts = key.split(".")
-                return float(parts[1]) if len(parts) > 1 else 0.0
+def pin_index(path: Optional[str], index: VersionIndex) -> None:
+    """Serve index for path without checking the file; replacing a pin is atomic."""
+    _PINNED[str(Path(path) if path else DEFAULT_DATA_PATH)] = index
 
-            best_key = min(
-                candidates.keys(), key=lambda k: (abs(minor_of(k) - target_minor), -minor_of(k))
-            )
-            return versions_data[best_key]
 
-    return {}
+def unpin_index(path: Optional[str] = None) -> None:
+    _PINNED.pop(str(Path(path) if path else DEFAULT_DATA_PATH), None)
 
+
+def clear_index_cache() -> None:
+    """Drop all cached and pinned indexes (mainly for tests)."""
+    with _INDEX_LOCK:
+        _INDEX_CACHE.clear()
+        _PINNED.clear()
+
+
+def get_recommendations(cuda_version: Optional[str], versions_data: Optional[Dict] = None) -> Dict:
+    """Return recommendations for a given cuda_version.
+
+    If exact match not found, tries to match major.minor; if no exact minor exists,
+    it will try to find the closest minor within the same major (numerically closest).
+    Returns empty dict when no candidates found.
+    """
+    if versions_data is None:
+        index = get_index()
+    else:
+        index = VersionIndex(versions_data)
+    return index.lookup(cuda_version)
@@ -0,0 +1,244 @@
+"""Lightweight timing spans with pluggable sinks.
+
+    with metrics.span("detect", strategy="nvcc") as s:
+        res = ...
+        if not res:
+            s.fail()
+
+With no sink registered, span() returns a shared no-op object, so instrumented
+code pays one list check per span. Registered sinks receive one event dict per
+finished span:
+
+    {"name": "detect", "seconds": 0.0123, "status": "success"|"failure"|"error",
+     "labels": {"strategy": "nvcc"}, "ts": <unix time>}
+
+Built-in sinks: any callable (callback hook), JsonLogSink (one JSON object per
+line) and PrometheusSink (latency histograms per stage, success/failure counters
+per detection strategy, exposed in Prometheus text format to a file).
+
+Sinks can also be configured by environment variables, read on first import:
+TORCHSEARCH_METRICS_JSONL=<path or "-" for stderr>, TORCHSEARCH_METRICS_PROM=<path>.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+Event = Dict
+Sink = Callable[[Event], None]
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_SINKS: List[Sink] = []
+_SINKS_LOCK = threading.Lock()
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def fail(self) -> None:
+        pass
+
+    def label(self, **labels) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("name", "labels", "status", "_t0")
+
+    def __init__(self, name: str, labels: Dict[str, str]):
+        self.name = name
+        self.labels = labels
+        self.status = "success"
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._t0
+        if exc_type is not None:
+            self.status = "error"
+        emit({"name": self.name, "seconds": seconds, "status": self.status, "labels": self.labels, "ts": time.time()})
+        return False
+
+    def fail(self) -> None:
+        """Mark the stage as completed without a result (e.g. a probe that found nothing)."""
+        self.status = "failure"
+
+    def label(self, **labels) -> None:
+        self.labels.update({k: str(v) for k, v in labels.items()})
+
+
+def span(name: str, **labels):
+    """Time a stage; a no-op unless a sink is registered."""
+    if not _SINKS:
+        return _NOOP
+    return Span(name, {k: str(v) for k, v in labels.items()})
+
+
+def emit(event: Event) -> None:
+    for sink in list(_SINKS):
+        try:
+            sink(event)
+        except Exception:
+            # a broken sink must never break detection or lookups
+            pass
+
+
+def add_sink(sink: Sink) -> Sink:
+    with _SINKS_LOCK:
+        _SINKS.append(sink)
+    return sink
+
+
+def remove_sink(sink: Sink) -> None:
+    with _SINKS_LOCK:
+        if sink in _SINKS:
+            _SINKS.remove(sink)
+
+
+def clear_sinks() -> None:
+    with _SINKS_LOCK:
+        _SINKS.clear()
+
+
+class JsonLogSink:
+    """Write each event as one JSON line to a stream or file (appending)."""
+
+    def __init__(self, target=None):
+        self._lock = threading.Lock()
+        if target is None or target == "-":
+            self._stream, self._owned = sys.stderr, False
+        elif hasattr(target, "write"):
+            self._stream, self._owned = target, False
+        else:
+            self._stream, self._owned = open(target, "a", encoding="utf-8"), True
+
+    def __call__(self, event: Event) -> None:
+        import json
+
+        line = json.dumps({"event": "span", **event}, separators=(",", ":"))
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+    def close(self) -> None:
+        if self._owned:
+            self._stream.close()
+
+
+def _labels_text(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    body = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in labels)
+    return "{" + body + "}"
+
+
+class PrometheusSink:
+    """Aggregate spans into Prometheus metrics and expose them in text format.
+
+    - torchsearch_stage_duration_seconds (histogram, label: stage)
+    - torchsearch_detect_total (counter, labels: strategy, result) for "detect" spans
+    - torchsearch_stage_errors_total (counter, label: stage) for spans that raised
+
+    The exposition file is rewritten atomically at most every write_interval
+    seconds, on flush() and at interpreter exit.
+    """
+
+    def __init__(self, path: Optional[str] = None, buckets=DEFAULT_BUCKETS, write_interval: float = 1.0):
+        self.path = path
+        self.buckets = tuple(sorted(buckets))
+        self.write_interval = write_interval
+        self._lock = threading.Lock()
+        self._hist: Dict[str, List] = {}          # stage -> [bucket counts..., sum, count]
+        self._detect: Dict[Tuple[str, str], int] = {}
+        self._errors: Dict[str, int] = {}
+        self._last_write = 0.0
+        if path:
+            import atexit
+
+            atexit.register(self.flush)
+
+    def __call__(self, event: Event) -> None:
+        name, seconds = event["name"], event["seconds"]
+        with self._lock:
+            h = self._hist.get(name)
+            if h is None:
+                h = self._hist[name] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    h[i] += 1
+            h[-2] += seconds
+            h[-1] += 1
+            if name == "detect":
+                key = (event["labels"].get("strategy", ""), "success" if event["status"] == "success" else "failure")
+                self._detect[key] = self._detect.get(key, 0) + 1
+            if event["status"] == "error":
+                self._errors[name] = self._errors.get(name, 0) + 1
+            due = self.path and time.monotonic() - self._last_write >= self.write_interval
+        if due:
+            self.flush()
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP torchsearch_stage_duration_seconds Time spent per torchsearch stage.",
+                "# TYPE torchsearch_stage_duration_seconds histogram",
+            ]
+            for stage in sorted(self._hist):
+                h = self._hist[stage]
+                for bound, count in zip(self.buckets, h):
+                    lines.append(f"torchsearch_stage_duration_seconds_bucket{_labels_text((('stage', stage), ('le', repr(bound))))} {count}")
+                lines.append(f"torchsearch_stage_duration_seconds_bucket{_labels_text((('stage', stage), ('le', '+Inf')))} {h[-1]}")
+                lines.append(f"torchsearch_stage_duration_seconds_sum{_labels_text((('stage', stage),))} {h[-2]!r}")
+                lines.append(f"torchsearch_stage_duration_seconds_count{_labels_text((('stage', stage),))} {h[-1]}")
+            lines += [
+                "# HELP torchsearch_detect_total Detection attempts per strategy and result.",
+                "# TYPE torchsearch_detect_total counter",
+            ]
+            for (strategy, result), count in sorted(self._detect.items()):
+                lines.append(f"torchsearch_detect_total{_labels_text((('strategy', strategy), ('result', result)))} {count}")
+            lines += [
+                "# HELP torchsearch_stage_errors_total Stages that raised an exception.",
+                "# TYPE torchsearch_stage_errors_total counter",
+            ]
+            for stage, count in sorted(self._errors.items()):
+                lines.append(f"torchsearch_stage_errors_total{_labels_text((('stage', stage),))} {count}")
+        return "\n".join(lines) + "\n"
+
+    def flush(self) -> None:
+        if not self.path:
+            return
+        from .cache import atomic_write_bytes
+
+        text = self.render()
+        try:
+            atomic_write_bytes(self.path, text.encode("utf-8"))
+        except OSError:
+            return
+        self._last_write = time.monotonic()
+
+
+def configure_from_env() -> None:
+    jsonl = os.environ.get("TORCHSEARCH_METRICS_JSONL")
+    if jsonl:
+        add_sink(JsonLogSink(jsonl))
+    prom = os.environ.get("TORCHSEARCH_METRICS_PROM")
+    if prom:
+        add_sink(PrometheusSink(prom))
+
+
+configure_from_env()
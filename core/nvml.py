@@ -0,0 +1,200 @@
+"""In-process GPU queries through NVML (libnvidia-ml) via ctypes.
+
+Spawning nvidia-smi costs 100-500 ms on busy multi-GPU nodes; NVML answers the
+same questions from inside the process. The library is loaded and nvmlInit'ed
+once per process (get_nvml()), device handles and static properties (name,
+compute capability) are read once, and a warm devices() call only asks for the
+live memory and utilization counters, which takes microseconds.
+
+get_nvml() returns None when the library is missing or fails to initialize (no
+driver, containers without the NVIDIA runtime) or when TORCHSEARCH_NO_NVML=1 is
+set; callers then fall back to the nvidia-smi subprocess path.
+
+Usage:
+    nv = get_nvml()
+    if nv is not None:
+        nv.driver_version()          # "535.104.05"
+        nv.cuda_driver_version()     # "12.2", newest CUDA runtime the driver supports
+        nv.devices()                 # [GpuInfo(index=0, name="NVIDIA A100...", ...)]
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import sys
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+NVML_SUCCESS = 0
+NVML_ERROR_NOT_SUPPORTED = 3
+_STRING_BUFFER = 96
+
+if sys.platform.startswith("win"):
+    _LIBRARY_NAMES = (
+        "nvml.dll",
+        os.path.join(os.environ.get("ProgramFiles", r"C:\Program Files"), "NVIDIA Corporation", "NVSMI", "nvml.dll"),
+    )
+else:
+    _LIBRARY_NAMES = ("libnvidia-ml.so.1", "libnvidia-ml.so")
+
+
+class NvmlError(Exception):
+    """An NVML call returned an error code."""
+
+    def __init__(self, func: str, code: int):
+        super().__init__(f"{func} failed with NVML error {code}")
+        self.func = func
+        self.code = code
+
+
+class _Memory(ctypes.Structure):
+    _fields_ = [("total", ctypes.c_ulonglong), ("free", ctypes.c_ulonglong), ("used", ctypes.c_ulonglong)]
+
+
+class _Utilization(ctypes.Structure):
+    _fields_ = [("gpu", ctypes.c_uint), ("memory", ctypes.c_uint)]
+
+
+class GpuInfo(NamedTuple):
+    index: int
+    name: str
+    memory_total: int            # MiB
+    memory_used: int             # MiB
+    utilization: Optional[int]   # percent; None where the device does not report it
+    compute_cap: Optional[str]   # "8.6"
+
+
+class Nvml:
+    """Thin wrapper over an initialized NVML library handle (a ctypes.CDLL or a test double)."""
+
+    def __init__(self, lib):
+        self._lib = lib
+        self._lock = threading.Lock()
+        self._call("nvmlInit_v2")
+        self._handles: Optional[List[ctypes.c_void_p]] = None
+        self._static: Dict[int, tuple] = {}
+        self._driver: Optional[str] = None
+        self._cuda: Optional[str] = None
+
+    def _call(self, name: str, *args) -> int:
+        ret = getattr(self._lib, name)(*args)
+        if ret != NVML_SUCCESS:
+            raise NvmlError(name, ret)
+        return ret
+
+    def driver_version(self) -> str:
+        if self._driver is None:
+            buf = ctypes.create_string_buffer(_STRING_BUFFER)
+            self._call("nvmlSystemGetDriverVersion", buf, ctypes.c_uint(_STRING_BUFFER))
+            self._driver = buf.value.decode()
+        return self._driver
+
+    def cuda_driver_version(self) -> str:
+        """Newest CUDA runtime version the driver supports, as "major.minor"."""
+        if self._cuda is None:
+            version = ctypes.c_int()
+            try:
+                self._call("nvmlSystemGetCudaDriverVersion_v2", ctypes.byref(version))
+            except AttributeError:   # drivers older than 418 only have the unversioned symbol
+                self._call("nvmlSystemGetCudaDriverVersion", ctypes.byref(version))
+            self._cuda = f"{version.value // 1000}.{version.value % 1000 // 10}"
+        return self._cuda
+
+    def _device_handles(self) -> List[ctypes.c_void_p]:
+        if self._handles is None:
+            count = ctypes.c_uint()
+            self._call("nvmlDeviceGetCount_v2", ctypes.byref(count))
+            handles = []
+            for i in range(count.value):
+                handle = ctypes.c_void_p()
+                self._call("nvmlDeviceGetHandleByIndex_v2", ctypes.c_uint(i), ctypes.byref(handle))
+                handles.append(handle)
+            self._handles = handles
+        return self._handles
+
+    def device_count(self) -> int:
+        return len(self._device_handles())
+
+    def _static_info(self, index: int, handle) -> tuple:
+        info = self._static.get(index)
+        if info is None:
+            buf = ctypes.create_string_buffer(_STRING_BUFFER)
+            self._call("nvmlDeviceGetName", handle, buf, ctypes.c_uint(_STRING_BUFFER))
+            major, minor = ctypes.c_int(), ctypes.c_int()
+            try:
+                self._call("nvmlDeviceGetCudaComputeCapability", handle, ctypes.byref(major), ctypes.byref(minor))
+                cc = f"{major.value}.{minor.value}"
+            except NvmlError:
+                cc = None
+            info = self._static[index] = (buf.value.decode(errors="replace"), cc)
+        return info
+
+    def devices(self) -> List[GpuInfo]:
+        """Current state of every GPU, in NVML index order (same order as nvidia-smi)."""
+        out = []
+        with self._lock:
+            for index, handle in enumerate(self._device_handles()):
+                name, cc = self._static_info(index, handle)
+                mem = _Memory()
+                self._call("nvmlDeviceGetMemoryInfo", handle, ctypes.byref(mem))
+                util = _Utilization()
+                try:
+                    self._call("nvmlDeviceGetUtilizationRates", handle, ctypes.byref(util))
+                    gpu_util: Optional[int] = util.gpu
+                except NvmlError as e:
+                    if e.code != NVML_ERROR_NOT_SUPPORTED:
+                        raise
+                    gpu_util = None
+                out.append(GpuInfo(index, name, mem.total >> 20, mem.used >> 20, gpu_util, cc))
+        return out
+
+    def shutdown(self) -> None:
+        try:
+            self._lib.nvmlShutdown()
+        except Exception:
+            pass
+
+
+_STATE: Dict[str, object] = {}
+_STATE_LOCK = threading.Lock()
+
+
+def _load_library():
+    for name in _LIBRARY_NAMES:
+        try:
+            return ctypes.CDLL(name)
+        except OSError:
+            continue
+    found = ctypes.util.find_library("nvidia-ml")
+    return ctypes.CDLL(found) if found else None
+
+
+def get_nvml() -> Optional[Nvml]:
+    """The process-wide Nvml instance, or None if NVML is unavailable (the result is remembered)."""
+    if "nvml" in _STATE:
+        return _STATE["nvml"]
+    with _STATE_LOCK:
+        if "nvml" in _STATE:
+            return _STATE["nvml"]
+        nv = None
+        if os.environ.get("TORCHSEARCH_NO_NVML", "").lower() not in ("1", "true", "yes"):
+            try:
+                lib = _load_library()
+                nv = Nvml(lib) if lib is not None else None
+            except (OSError, AttributeError, NvmlError):
+                nv = None
+            if nv is not None:
+                import atexit
+
+                atexit.register(nv.shutdown)
+        _STATE["nvml"] = nv
+        return nv
+
+
+def reset() -> None:
+    """Shut NVML down and forget the cached instance (tests, or after the driver changed)."""
+    with _STATE_LOCK:
+        nv = _STATE.pop("nvml", None)
+    if nv is not None:
+        nv.shutdown()
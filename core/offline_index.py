@@ -0,0 +1,310 @@
+"""Offline wheel index for air-gapped hosts.
+
+Scans a mirrored simple-index tree (``<root>/<tag>/<project>/index.html`` plus
+any ``*.whl`` files) or a flat wheelhouse, parses every wheel filename and stores
+one row per (python tag, platform) combination in SQLite. The lookup index
+covers (local tag, python tag, os, arch, package, version), so "newest torch for
+cu121 / cp311 / manylinux x86_64" is a single index seek.
+
+Re-ingestion is incremental: each directory's stamp (its mtime, plus its
+index.html mtime) is stored, and only directories whose stamp changed are
+re-parsed.
+
+Usage:
+    python -m core.offline_index ingest /srv/mirror/whl [--db PATH]
+    python -m core.offline_index query --tag cu121 [--python cp311] [--platform linux_x86_64] [--db PATH]
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from html import unescape
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .cache import user_cache_dir
+from .mapper import get_index
+from .wheels import WheelInfo, host_platform, host_python_tag, parse_wheel_filename, version_key
+
+PACKAGES = ("torch", "torchvision", "torchaudio")
+# newest_triple gives up after this many torch versions without complete companions
+MAX_TRIPLE_CANDIDATES = 16
+
+_HREF_RE = re.compile(r'<a\s[^>]*?href="([^"]*)"[^>]*>([^<]*)</a>', re.IGNORECASE)
+_ARCH_RE = re.compile(r"(x86_64|aarch64|ppc64le|s390x|i686|armv7l|amd64|arm64|win32|universal2)$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    stamp INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS wheels (
+    dir_id INTEGER NOT NULL,
+    package TEXT NOT NULL,
+    version TEXT NOT NULL,
+    vkey TEXT NOT NULL,
+    local TEXT NOT NULL,
+    python TEXT NOT NULL,
+    abi TEXT NOT NULL,
+    os TEXT NOT NULL,
+    arch TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    url TEXT
+);
+CREATE INDEX IF NOT EXISTS wheels_lookup ON wheels (local, python, os, arch, package, vkey);
+CREATE INDEX IF NOT EXISTS wheels_dir ON wheels (dir_id);
+"""
+
+
+def default_db_path() -> Path:
+    return user_cache_dir() / "offline_index.sqlite"
+
+
+@functools.lru_cache(maxsize=65536)
+def sortable_version(version: str) -> str:
+    """Encode version_key() as a string whose lexical order is version order."""
+    release, pre_rank, pre_num, post, _ = version_key(version)
+    release = (tuple(release) + (0, 0, 0, 0))[:max(4, len(release))]
+    return ".".join(f"{n:06d}" for n in release) + f"-{pre_rank + 5}{pre_num:04d}{post:04d}"
+
+
+def companion_series(torch_version: str) -> Optional[Dict[str, Tuple[int, int]]]:
+    """(major, minor) series of the torchvision and torchaudio releases built with a torch release.
+
+    torch 2.3.x pairs with torchvision 0.18.x and torchaudio 2.3.x, torch 1.13.x
+    with 0.14.x and 0.13.x; None for versions outside this scheme.
+    """
+    release = version_key(torch_version)[0]
+    if len(release) < 2:
+        return None
+    major, minor = release[0], release[1]
+    if major == 2:
+        return {"torchvision": (0, minor + 15), "torchaudio": (2, minor)}
+    if major == 1 and minor >= 5:
+        return {"torchvision": (0, minor + 1), "torchaudio": (0, minor)}
+    return None
+
+
+def split_platform(tag: str) -> List[Tuple[str, str]]:
+    """Map one platform tag to (os, arch) pairs, e.g. manylinux2014_x86_64 -> [("linux", "x86_64")]."""
+    if tag == "any":
+        return [("any", "any")]
+    m = _ARCH_RE.search(tag)
+    arch = m.group(1) if m else tag.split("_")[-1]
+    if tag.startswith(("manylinux", "musllinux", "linux")):
+        os_name = "linux"
+    elif tag.startswith("macosx"):
+        os_name = "macosx"
+    elif tag.startswith("win"):
+        os_name, arch = "win", "x86" if tag == "win32" else arch
+    else:
+        os_name = tag.split("_")[0]
+    if arch == "universal2":
+        return [(os_name, "arm64"), (os_name, "x86_64")]
+    return [(os_name, arch)]
+
+
+def _rows(w: WheelInfo, dir_id: int, url: Optional[str]) -> Iterator[tuple]:
+    vkey = sortable_version(w.version)
+    seen = set()
+    for py in w.python.split("."):
+        for plat in w.platform.split("."):
+            for os_name, arch in split_platform(plat):
+                key = (py, os_name, arch)
+                if key in seen:
+                    continue
+                seen.add(key)
+                yield (dir_id, w.name, w.version, vkey, w.local or "", py, w.abi, os_name, arch, w.filename, url)
+
+
+def _dir_stamp(path: str) -> int:
+    st = os.stat(path).st_mtime_ns
+    try:
+        st = max(st, os.stat(os.path.join(path, "index.html")).st_mtime_ns)
+    except OSError:
+        pass
+    return st
+
+
+class OfflineIndex:
+    """SQLite-backed index of wheel files from a local mirror."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path) if db_path else default_db_path()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _scan_dir(self, path: str, dir_id: int) -> List[tuple]:
+        rows: List[tuple] = []
+        listed = set()
+        index_html = os.path.join(path, "index.html")
+        if os.path.isfile(index_html):
+            # hrefs are stored as written (relative to the mirrored page); no urljoin per file
+            with open(index_html, "r", encoding="utf-8", errors="replace") as f:
+                for href, text in _HREF_RE.findall(f.read()):
+                    w = parse_wheel_filename(unescape(text).strip() or href.partition("#")[0])
+                    if w is not None:
+                        listed.add(w.filename)
+                        rows.extend(_rows(w, dir_id, unescape(href)))
+        with os.scandir(path) as it:
+            for e in it:
+                if e.name.endswith(".whl") and e.name not in listed and e.is_file():
+                    w = parse_wheel_filename(e.name)
+                    if w is not None:
+                        rows.extend(_rows(w, dir_id, Path(e.path).as_uri()))
+        return rows
+
+    def ingest(self, root: str) -> Dict[str, int]:
+        """(Re)ingest every directory under root; unchanged directories are skipped."""
+        t0 = time.perf_counter()
+        known = {path: (i, stamp) for i, path, stamp in self.conn.execute("SELECT id, path, stamp FROM dirs")}
+        seen = set()
+        stats = {"dirs": 0, "changed": 0, "removed": 0, "rows": 0}
+        cur = self.conn.cursor()
+        with self.conn:
+            stack = [os.path.abspath(root)]
+            while stack:
+                path = stack.pop()
+                with os.scandir(path) as it:
+                    stack.extend(e.path for e in it if e.is_dir(follow_symlinks=False))
+                stats["dirs"] += 1
+                seen.add(path)
+                stamp = _dir_stamp(path)
+                prev = known.get(path)
+                if prev is not None and prev[1] == stamp:
+                    continue
+                if prev is not None:
+                    dir_id = prev[0]
+                    cur.execute("DELETE FROM wheels WHERE dir_id = ?", (dir_id,))
+                    cur.execute("UPDATE dirs SET stamp = ? WHERE id = ?", (stamp, dir_id))
+                else:
+                    cur.execute("INSERT INTO dirs (path, stamp) VALUES (?, ?)", (path, stamp))
+                    dir_id = cur.lastrowid
+                rows = self._scan_dir(path, dir_id)
+                cur.executemany("INSERT INTO wheels VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                stats["changed"] += 1
+                stats["rows"] += len(rows)
+            prefix = os.path.abspath(root)
+            for path, (dir_id, _) in known.items():
+                if path not in seen and (path == prefix or path.startswith(prefix + os.sep)):
+                    cur.execute("DELETE FROM wheels WHERE dir_id = ?", (dir_id,))
+                    cur.execute("DELETE FROM dirs WHERE id = ?", (dir_id,))
+                    stats["removed"] += 1
+        stats["ms"] = int((time.perf_counter() - t0) * 1000)
+        return stats
+
+    def _query(self, columns: str, package: str, tag: str, python_tag: Optional[str], platform: Optional[str],
+               tail: str = "", params: tuple = ()):
+        python_tag = python_tag or host_python_tag()
+        os_name, _, arch = (platform or host_platform()).partition("_")
+        return self.conn.execute(
+            f"SELECT {columns} FROM wheels"
+            " WHERE local = ? AND python IN (?, ?) AND os IN (?, 'any') AND arch IN (?, 'any') AND package = ?" + tail,
+            (tag, python_tag, f"py{python_tag[2:3]}", os_name, arch, package) + params,
+        )
+
+    def _newest_version(self, package: str, tag: str, python_tag: Optional[str], platform: Optional[str],
+                        lo: Optional[str] = None, hi: Optional[str] = None) -> Optional[Tuple[str, str]]:
+        """(version, vkey) of the newest wheel with lo <= vkey < hi; one index seek."""
+        tail, params = "", ()
+        if lo is not None:
+            tail, params = tail + " AND vkey >= ?", params + (lo,)
+        if hi is not None:
+            tail, params = tail + " AND vkey < ?", params + (hi,)
+        return self._query("version, vkey", package, tag, python_tag, platform,
+                           tail + " ORDER BY vkey DESC LIMIT 1", params).fetchone()
+
+    def _has_version(self, package: str, version: str, tag: str, python_tag: Optional[str], platform: Optional[str]) -> bool:
+        row = self._query("1", package, tag, python_tag, platform, " AND vkey = ? LIMIT 1", (sortable_version(version),))
+        return row.fetchone() is not None
+
+    def newest(self, package: str, tag: str, python_tag: Optional[str] = None, platform: Optional[str] = None) -> Optional[Dict]:
+        """Newest wheel of package for a local tag ("cu121", "cpu"), Python and platform family."""
+        row = self._query("version, filename, url", package, tag, python_tag, platform, " ORDER BY vkey DESC LIMIT 1").fetchone()
+        if row is None:
+            return None
+        return {"version": row[0], "filename": row[1], "url": row[2]}
+
+    def newest_triple(self, tag: str, python_tag: Optional[str] = None, platform: Optional[str] = None,
+                      versions_path: Optional[str] = None) -> Optional[Dict]:
+        """Newest installable torch/torchvision/torchaudio set for the tag, in the shape of get_torch_versions().
+
+        torch versions are walked newest first, one index seek each, and each is
+        paired with the newest torchvision/torchaudio of its release series (see
+        companion_series) found in the index. For torch releases outside the
+        known scheme the versions mapping's pairing is used instead. None if no
+        set within the newest MAX_TRIPLE_CANDIDATES torch versions is complete.
+        """
+        pip_tag = None if tag == "cpu" else tag
+        mapped: Optional[Dict[str, Dict]] = None
+        hi = None
+        for _ in range(MAX_TRIPLE_CANDIDATES):
+            row = self._newest_version("torch", tag, python_tag, platform, hi=hi)
+            if row is None:
+                return None
+            torch_version, hi = row
+            triple = {"torch": torch_version}
+            series = companion_series(torch_version)
+            if series is not None:
+                for pkg, (major, minor) in series.items():
+                    found = self._newest_version(pkg, tag, python_tag, platform, sortable_version(f"{major}.{minor}"),
+                                                 sortable_version(f"{major}.{minor + 1}"))
+                    if found is None:
+                        break
+                    triple[pkg] = found[0]
+            else:
+                if mapped is None:
+                    mapped = {str(rec["torch"]): rec for rec in get_index(versions_path).data.values()
+                              if isinstance(rec, dict) and rec.get("torch") and rec.get("pip_tag") == pip_tag}
+                rec = mapped.get(torch_version)
+                for pkg in ("torchvision", "torchaudio"):
+                    if rec is None or not rec.get(pkg) or not self._has_version(pkg, rec[pkg], tag, python_tag, platform):
+                        break
+                    triple[pkg] = rec[pkg]
+            if len(triple) == len(PACKAGES):
+                triple["pip_tag"] = pip_tag
+                return triple
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m core.offline_index", description="Offline wheel index for mirrored PyTorch indexes.")
+    parser.add_argument("--db", help=f"SQLite file (default: {default_db_path()})")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_ing = sub.add_parser("ingest", help="scan a mirror or wheelhouse")
+    p_ing.add_argument("root")
+    p_q = sub.add_parser("query", help="newest torch/torchvision/torchaudio for a tag")
+    p_q.add_argument("--tag", required=True, help="e.g. cu121 or cpu")
+    p_q.add_argument("--python", help="e.g. cp311 (default: this interpreter)")
+    p_q.add_argument("--platform", help="e.g. linux_x86_64 (default: this host)")
+    p_q.add_argument("--versions", help="path to versions.json (torch/torchvision/torchaudio pairing)")
+    args = parser.parse_args(argv)
+
+    with OfflineIndex(args.db) as idx:
+        if args.cmd == "ingest":
+            print(json.dumps(idx.ingest(args.root)))
+            return 0
+        rec = idx.newest_triple(args.tag, args.python, args.platform, versions_path=args.versions)
+        print(json.dumps(rec))
+        return 0 if rec else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+"""Concurrent, resumable download of the recommended wheels into a wheelhouse.
+
+Wheel URLs come from WheelResolver on the recommendation's pip_tag index. With
+dependencies enabled, each torch wheel's PEP 658 metadata is read and its pinned
+nvidia-* / triton requirements are resolved on the same index. Downloads run on
+a thread pool with:
+  - resume: data goes to "<file>.part", and an existing part is continued with
+    an HTTP Range request (a server that ignores Range restarts it);
+  - a per-host connection limit;
+  - an optional shared bandwidth cap (token bucket);
+  - sha256 verification against the index hashes;
+  - progress callbacks and an aggregate throughput summary.
+
+Usage:
+    python -m core.prefetch --cuda 12.1 --dest ./wheels [--limit-rate 20M] [--no-deps]
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+from .resolver import PACKAGES, PYTORCH_INDEX, IndexFile, ResolverError, WheelResolver
+from .wheels import host_platform, host_python_tag, normalize_name
+
+CHUNK_SIZE = 1024 * 1024
+MAX_REDIRECTS = 5
+
+_REQ_RE = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*\(?\s*==\s*([^\s;,)]+)\)?\s*(?:;\s*(.*))?$")
+_MARKER_RE = re.compile(r"""^\(?\s*(\w+)\s*(==|!=|<=|>=|<|>)\s*["']([^"']*)["']\s*\)?$""")
+
+ProgressCallback = Callable[[Dict], None]
+
+
+class PrefetchError(Exception):
+    """Raised when a wheel cannot be downloaded or fails verification."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: consume(n) blocks until n bytes may be sent."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(rate, CHUNK_SIZE))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, n: int) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= n
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+def parse_rate(text: str) -> float:
+    """"500K" / "20M" / "1.5G" / "1048576" -> bytes per second."""
+    m = re.fullmatch(r"\s*([\d.]+)\s*([KMG]?)i?B?\s*", text, re.IGNORECASE)
+    if not m:
+        raise ValueError(f"invalid rate: {text!r}")
+    return float(m.group(1)) * 1024 ** " KMG".index(m.group(2).upper() or " ")
+
+
+def _marker_env(python_tag: str, platform: str) -> Dict[str, str]:
+    os_name, _, arch = platform.partition("_")
+    return {
+        "platform_system": {"linux": "Linux", "win": "Windows", "macosx": "Darwin"}.get(os_name, os_name),
+        "sys_platform": {"linux": "linux", "win": "win32", "macosx": "darwin"}.get(os_name, os_name),
+        "platform_machine": {"amd64": "AMD64"}.get(arch, arch),
+        "python_version": f"{python_tag[2:3]}.{python_tag[3:]}",
+    }
+
+
+def _marker_ok(marker: Optional[str], env: Dict[str, str]) -> bool:
+    """Evaluate the simple markers torch uses (or-of-and of var op "value"); extras never match."""
+    if not marker:
+        return True
+    for group in re.split(r"\s+or\s+", marker):
+        ok = True
+        for clause in re.split(r"\s+and\s+", group.strip()):
+            m = _MARKER_RE.match(clause.strip())
+            if m is None:
+                continue
+            var, op, value = m.groups()
+            if var == "extra":
+                ok = False
+                break
+            have = env.get(var)
+            if have is None:
+                continue
+            if var == "python_version":
+                a, b = tuple(int(x) for x in have.split(".")), tuple(int(x) for x in value.split("."))
+            else:
+                a, b = have, value
+            if not {"==": a == b, "!=": a != b, "<": a < b, "<=": a <= b, ">": a > b, ">=": a >= b}[op]:
+                ok = False
+                break
+        if ok:
+            return True
+    return False
+
+
+def pinned_requirements(metadata: str, python_tag: str, platform: str) -> List[tuple]:
+    """(name, version) for every "==" pinned Requires-Dist whose marker holds on the target."""
+    env = _marker_env(python_tag, platform)
+    out = []
+    for line in metadata.splitlines():
+        if not line.startswith("Requires-Dist:"):
+            continue
+        m = _REQ_RE.match(line[len("Requires-Dist:"):].strip())
+        if m and _marker_ok(m.group(3), env):
+            out.append((normalize_name(m.group(1)), m.group(2)))
+    return out
+
+
+class WheelDownloader:
+    """Download IndexFile entries concurrently with resume, per-host limits and a rate cap."""
+
+    def __init__(self, dest, max_workers: int = 8, per_host: int = 4, rate_limit: Optional[float] = None,
+                 timeout: float = 30.0, progress: Optional[ProgressCallback] = None):
+        self.dest = Path(dest)
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.progress = progress
+        self.bucket = TokenBucket(rate_limit) if rate_limit else None
+        self._hosts: Dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+        self.bytes_downloaded = 0
+        self.bytes_resumed = 0
+        self.started = 0.0
+
+    def _host_slot(self, url: str) -> threading.Semaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            sem = self._hosts.get(host)
+            if sem is None:
+                sem = self._hosts[host] = threading.Semaphore(self.per_host)
+            return sem
+
+    def _emit(self, **event) -> None:
+        if self.progress is not None:
+            self.progress(event)
+
+    def _open(self, url: str, offset: int):
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+            conn = cls(parts.hostname, parts.port, timeout=self.timeout)
+            path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            headers = {"Accept-Encoding": "identity"}
+            if offset:
+                headers["Range"] = f"bytes={offset}-"
+            conn.request("GET", path, headers=headers)
+            resp = conn.getresponse()
+            if resp.status in (301, 302, 303, 307, 308) and resp.getheader("Location"):
+                url = urljoin(url, resp.getheader("Location"))
+                resp.read()
+                conn.close()
+                continue
+            return conn, resp
+        raise PrefetchError(f"too many redirects for {url}")
+
+    def download(self, f: IndexFile) -> Path:
+        """Download one file into dest (resuming a .part file); returns the final path."""
+        target = self.dest / f.filename
+        expected = f.hashes.get("sha256")
+        if target.exists():
+            self._emit(filename=f.filename, status="cached", done=target.stat().st_size, total=target.stat().st_size)
+            return target
+        part = target.with_name(target.name + ".part")
+        self.dest.mkdir(parents=True, exist_ok=True)
+        with self._host_slot(f.url):
+            offset = part.stat().st_size if part.exists() else 0
+            conn, resp = self._open(f.url, offset)
+            try:
+                if resp.status == 416 and offset:
+                    # the part file already holds the whole body
+                    resp.read()
+                    total = offset
+                elif resp.status == 206:
+                    total = offset + int(resp.getheader("Content-Length") or 0)
+                elif resp.status == 200:
+                    offset = 0
+                    total = int(resp.getheader("Content-Length") or 0)
+                else:
+                    raise PrefetchError(f"{f.url}: HTTP {resp.status}")
+
+                h = hashlib.sha256() if expected else None
+                if h is not None and offset:
+                    with part.open("rb") as fh:
+                        for block in iter(lambda: fh.read(CHUNK_SIZE), b""):
+                            h.update(block)
+                with self._lock:
+                    self.bytes_resumed += offset
+                done = offset
+                with part.open("ab" if offset else "wb") as out:
+                    if resp.status != 416:
+                        while True:
+                            if self.bucket is not None:
+                                self.bucket.consume(CHUNK_SIZE)
+                            block = resp.read(CHUNK_SIZE)
+                            if not block:
+                                break
+                            out.write(block)
+                            if h is not None:
+                                h.update(block)
+                            done += len(block)
+                            with self._lock:
+                                self.bytes_downloaded += len(block)
+                            self._emit(filename=f.filename, status="downloading", done=done, total=total)
+            finally:
+                conn.close()
+        if total and done != total:
+            raise PrefetchError(f"{f.filename}: short read ({done} of {total} bytes); rerun to resume")
+        if h is not None and h.hexdigest() != expected:
+            part.unlink()
+            raise PrefetchError(f"{f.filename}: sha256 mismatch")
+        os.replace(part, target)
+        self._emit(filename=f.filename, status="done", done=done, total=done, resumed=offset)
+        return target
+
+    def download_all(self, files: List[IndexFile]) -> List[Path]:
+        """Download files concurrently; raises the first PrefetchError after all finish."""
+        self.started = time.perf_counter()
+        paths: Dict[str, Path] = {}
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as ex:
+            futures = {ex.submit(self.download, f): f for f in files}
+            for fut in as_completed(futures):
+                try:
+                    paths[futures[fut].filename] = fut.result()
+                except (PrefetchError, OSError, http.client.HTTPException) as e:
+                    errors.append(e if isinstance(e, PrefetchError) else PrefetchError(f"{futures[fut].filename}: {e}"))
+        if errors:
+            raise errors[0]
+        return [paths[f.filename] for f in files]
+
+    def summary(self) -> Dict:
+        elapsed = max(time.perf_counter() - self.started, 1e-9) if self.started else 0.0
+        return {
+            "bytes": self.bytes_downloaded,
+            "resumed_bytes": self.bytes_resumed,
+            "seconds": round(elapsed, 3),
+            "bytes_per_sec": int(self.bytes_downloaded / elapsed) if elapsed else 0,
+        }
+
+
+def _pick(files: List[IndexFile], version: str) -> Optional[IndexFile]:
+    return next((f for f in files if f.wheel.version == version), None)
+
+
+def resolve_files(recommendation: Dict, resolver: WheelResolver, python_tag: Optional[str] = None,
+                  platform: Optional[str] = None, with_deps: bool = True) -> List[IndexFile]:
+    """Index files for the recommended triple (plus pinned torch dependencies) on its pip_tag index."""
+    python_tag = python_tag or host_python_tag()
+    platform = platform or host_platform()
+    tag = recommendation.get("pip_tag")
+    resolver.prefetch((tag, p) for p in PACKAGES)
+    chosen: Dict[str, IndexFile] = {}
+    for pkg in PACKAGES:
+        version = recommendation.get(pkg)
+        if not version:
+            continue
+        f = _pick(resolver.compatible_files(tag, pkg, python_tag, platform), version)
+        if f is None:
+            raise PrefetchError(f"{pkg}=={version} has no wheel on the {tag or 'cpu'} index for {python_tag}/{platform}")
+        chosen[pkg] = f
+
+    if with_deps and "torch" in chosen and chosen["torch"].metadata:
+        status, _, body = resolver.pool.request("GET", chosen["torch"].url + ".metadata")
+        if status == 200:
+            deps = [(n, v) for n, v in pinned_requirements(body.decode("utf-8", "replace"), python_tag, platform)
+                    if n.startswith("nvidia-") or n == "triton"]
+            resolver.prefetch((tag, n) for n, _ in deps)
+            for name, version in deps:
+                f = _pick(resolver.compatible_files(tag, name, python_tag, platform), version)
+                if f is None:
+                    raise PrefetchError(f"{name}=={version} (required by torch) is not on the {tag or 'cpu'} index")
+                chosen[name] = f
+    return list(chosen.values())
+
+
+def prefetch(recommendation: Dict, dest, index_url: str = PYTORCH_INDEX, python_tag: Optional[str] = None,
+             platform: Optional[str] = None, with_deps: bool = True, max_workers: int = 8, per_host: int = 4,
+             rate_limit: Optional[float] = None, progress: Optional[ProgressCallback] = None) -> Dict:
+    """Resolve and download the recommendation's wheels into dest.
+
+    Returns {"files": [paths], **WheelDownloader.summary()}.
+    """
+    resolver = WheelResolver(index_url=index_url, max_workers=max_workers)
+    try:
+        files = resolve_files(recommendation, resolver, python_tag, platform, with_deps)
+    finally:
+        resolver.close()
+    downloader = WheelDownloader(dest, max_workers=max_workers, per_host=per_host, rate_limit=rate_limit, progress=progress)
+    paths = downloader.download_all(files)
+    return {"files": [str(p) for p in paths], **downloader.summary()}
+
+
+def _print_progress(stream=sys.stderr, interval: float = 0.5) -> ProgressCallback:
+    last = [0.0]
+
+    def callback(event: Dict) -> None:
+        now = time.monotonic()
+        if event["status"] == "downloading" and now - last[0] < interval:
+            return
+        last[0] = now
+        total = event.get("total") or 0
+        pct = f"{event['done'] * 100 // total:3d}%" if total else "   ?"
+        print(f"{pct} {event['status']:<11} {event['filename']}", file=stream)
+
+    return callback
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m core.prefetch", description="Download the recommended PyTorch wheels into a wheelhouse.")
+    parser.add_argument("--cuda", help="CUDA version (default: auto-detect)")
+    parser.add_argument("--dest", default="wheels", help="wheelhouse directory (default: ./wheels)")
+    parser.add_argument("--index-url", default=PYTORCH_INDEX)
+    parser.add_argument("--python", help="target Python tag, e.g. cp311 (default: this interpreter)")
+    parser.add_argument("--platform", help="target platform, e.g. linux_x86_64 (default: this host)")
+    parser.add_argument("--no-deps", action="store_true", help="skip torch's nvidia-*/triton dependencies")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--per-host", type=int, default=4, help="concurrent connections per host (default: 4)")
+    parser.add_argument("--limit-rate", type=parse_rate, help="total bandwidth cap, e.g. 20M (bytes/s)")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+
+    from .api import detect_and_prepare
+
+    rec = detect_and_prepare(cuda_override=args.cuda).get("recommendation")
+    if not rec:
+        print("未能得到推荐版本，请使用 --cuda 指定。", file=sys.stderr)
+        return 1
+    try:
+        result = prefetch(rec, args.dest, args.index_url, args.python, args.platform, not args.no_deps,
+                          args.workers, args.per_host, args.limit_rate, None if args.quiet else _print_progress())
+    except (PrefetchError, ResolverError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(json.dumps(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""Hot reload of the versions data file for long-running processes.
+
+VersionsWatcher watches the configured versions.json and, when it changes,
+parses and validates the new content on its own thread, builds a VersionIndex
+and pins it in core.mapper. Replacing the pin is a single dict assignment, so
+lookups see either the old index or the new one, never a half-loaded state,
+and never pay the parse cost or even a stat(). Invalid content is reported
+through on_error and the previous index stays active.
+
+Change detection uses inotify on the file's directory where available (Linux,
+via ctypes; this also catches atomic rename-into-place and symlink swaps),
+otherwise a stat() poll every `interval` seconds.
+
+Usage:
+    watcher = VersionsWatcher("/etc/torchsearch/versions.json").start()
+    ...                                   # get_index()/get_torch_versions() now follow the file
+    watcher.stop()
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from .mapper import DEFAULT_DATA_PATH, VersionIndex, _parse_key, pin_index, unpin_index
+
+# inotify(7) constants
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+# quiet period after a change event, so an editor's write-then-rename lands as one reload
+SETTLE_S = 0.05
+
+Stamp = Optional[Tuple[int, int, int]]
+
+
+def validate_versions(data) -> Dict[str, Dict]:
+    """Check a parsed versions mapping; returns it unchanged or raises ValueError."""
+    if not isinstance(data, dict) or not data:
+        raise ValueError("versions data must be a non-empty JSON object")
+    usable = 0
+    for key, rec in data.items():
+        if not isinstance(rec, dict):
+            raise ValueError(f"{key!r}: record must be an object")
+        if not isinstance(rec.get("torch"), str) or not rec["torch"]:
+            raise ValueError(f"{key!r}: missing torch version")
+        for field in ("torchvision", "torchaudio", "pip_tag"):
+            if rec.get(field) is not None and not isinstance(rec[field], str):
+                raise ValueError(f"{key!r}: {field} must be a string or null")
+        arch_list = rec.get("arch_list")
+        if arch_list is not None and (not isinstance(arch_list, list) or not all(isinstance(a, str) for a in arch_list)):
+            raise ValueError(f"{key!r}: arch_list must be a list of strings")
+        if key == "cpu" or _parse_key(key) is not None:
+            usable += 1
+    if not usable:
+        raise ValueError("no CUDA version keys found")
+    return data
+
+
+def _stamp(path: Path) -> Stamp:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class _Inotify:
+    """Minimal ctypes binding: one watch on a directory, readable fd for select()."""
+
+    def __init__(self, directory: Path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), _WATCH_MASK) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"inotify_add_watch failed for {directory}")
+
+    def drain(self) -> int:
+        """Read and discard pending events; returns how many were read."""
+        count = 0
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return count
+            off = 0
+            while off + _EVENT_HEADER.size <= len(buf):
+                _, _, _, name_len = _EVENT_HEADER.unpack_from(buf, off)
+                off += _EVENT_HEADER.size + name_len
+                count += 1
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class VersionsWatcher:
+    """Keep core.mapper's index for a versions file current without touching the request path."""
+
+    def __init__(self, path: Optional[str] = None, interval: float = 1.0,
+                 on_reload: Optional[Callable[[VersionIndex], None]] = None,
+                 on_error: Optional[Callable[[Exception], None]] = None, use_inotify: Optional[bool] = None):
+        self.path = Path(path) if path else DEFAULT_DATA_PATH
+        self._key = str(path) if path else None
+        self.interval = interval
+        self.on_reload = on_reload
+        self.on_error = on_error
+        self.use_inotify = sys.platform.startswith("linux") if use_inotify is None else use_inotify
+        self.backend: Optional[str] = None
+        self.index: Optional[VersionIndex] = None
+        self.generation = 0
+        self.last_error: Optional[Exception] = None
+        self._stamp: Stamp = None
+        self._stop = threading.Event()
+        self._wake_r: Optional[int] = None
+        self._wake_w: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def reload_now(self) -> bool:
+        """Re-read the file if it changed; returns True when a new index was swapped in."""
+        stamp = _stamp(self.path)
+        if stamp == self._stamp and self.index is not None:
+            return False
+        try:
+            with self.path.open("rb") as f:
+                data = validate_versions(json.loads(f.read()))
+            index = VersionIndex(data)
+        except (OSError, ValueError) as e:
+            # keep serving the previous index; retry only once the file changes again
+            self._stamp = stamp
+            self.last_error = e
+            if self.on_error is not None:
+                self.on_error(e)
+            return False
+        self._stamp = stamp
+        self.index = index
+        self.generation += 1
+        self.last_error = None
+        pin_index(self._key, index)
+        if self.on_reload is not None:
+            self.on_reload(index)
+        return True
+
+    def start(self) -> "VersionsWatcher":
+        """Load the current file (raising ValueError/OSError if it is unusable) and start watching."""
+        if self._thread is not None:
+            return self
+        self.reload_now()
+        if self.index is None:
+            raise self.last_error or ValueError(f"cannot load {self.path}")
+        inotify = None
+        if self.use_inotify:
+            try:
+                inotify = _Inotify(self.path.parent)
+            except (OSError, AttributeError):
+                inotify = None
+        self.backend = "inotify" if inotify is not None else "poll"
+        self._stop.clear()
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, args=(inotify,), name="torchsearch-versions-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self, inotify: Optional[_Inotify]) -> None:
+        try:
+            while not self._stop.is_set():
+                if inotify is None:
+                    select.select([self._wake_r], [], [], self.interval)
+                else:
+                    # the periodic timeout doubles as a safety net for missed events
+                    ready, _, _ = select.select([inotify.fd, self._wake_r], [], [], max(self.interval, 5.0))
+                    if inotify.fd in ready:
+                        inotify.drain()
+                        time.sleep(SETTLE_S)
+                        inotify.drain()
+                if self._stop.is_set():
+                    break
+                try:
+                    self.reload_now()
+                except Exception as e:  # pragma: no cover - callbacks must not kill the watcher
+                    self.last_error = e
+        finally:
+            if inotify is not None:
+                inotify.close()
+
+    def stop(self, unpin: bool = True) -> None:
+        """Stop watching; with unpin=True lookups go back to stat-validated caching."""
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        os.write(self._wake_w, b"x")
+        thread.join()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+        if unpin:
+            unpin_index(self._key)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
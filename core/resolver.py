@@ -0,0 +1,299 @@
+"""Check recommendations against the PyTorch wheel index before pip runs.
+
+WheelResolver fetches the PEP 691 (JSON) or PEP 503 (HTML) simple-index page
+for each (cuda tag, project) pair. Pages are cached on disk and revalidated
+with ETag / Last-Modified, and requests reuse pooled keep-alive connections.
+Pages for several tags are fetched concurrently. verify() reports whether each
+recommended wheel exists for this Python/platform. If one is missing, it
+suggests the newest mapped triple that is fully available.
+
+The index base URL is configurable, so tests can point it at a local server.
+"""
+from __future__ import annotations
+
+import hashlib
+import http.client
+import json
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html import unescape
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from .cache import atomic_write_bytes, user_cache_dir
+from .mapper import get_index
+from .wheels import WheelInfo, is_compatible, normalize_name, parse_wheel_filename, version_key
+
+PYTORCH_INDEX = "https://download.pytorch.org/whl"
+PACKAGES = ("torch", "torchvision", "torchaudio")
+ACCEPT = "application/vnd.pypi.simple.v1+json, application/vnd.pypi.simple.v1+html;q=0.2, text/html;q=0.1"
+
+_ANCHOR_RE = re.compile(r"<a\s+([^>]*)>([^<]*)</a>", re.IGNORECASE)
+_ATTR_RE = re.compile(r'([\w-]+)\s*=\s*"([^"]*)"')
+
+
+class IndexFile(NamedTuple):
+    filename: str
+    url: str
+    hashes: Dict[str, str]
+    metadata: bool     # PEP 658: a "<url>.metadata" file is available
+    wheel: Optional[WheelInfo]
+
+
+class ResolverError(Exception):
+    """Raised when an index page cannot be fetched and no cached copy exists."""
+
+
+class ConnectionPool:
+    """Keep-alive http.client connections, pooled per (scheme, host, port)."""
+
+    def __init__(self, maxsize: int = 8, timeout: float = 15.0):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._idle: Dict[Tuple[str, str, int], "queue.LifoQueue"] = {}
+        self._lock = threading.Lock()
+
+    def _queue(self, key):
+        with self._lock:
+            q = self._idle.get(key)
+            if q is None:
+                q = self._idle[key] = queue.LifoQueue()
+            return q
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """Send a request and read the whole response body; returns (status, headers, body)."""
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        q = self._queue(key)
+        for attempt in (0, 1):
+            try:
+                conn = q.get_nowait()
+                reused = True
+            except queue.Empty:
+                cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+                conn = cls(parts.hostname, port, timeout=self.timeout)
+                reused = False
+            try:
+                conn.request(method, path, headers=headers or {})
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.HTTPException, ConnectionError, OSError):
+                conn.close()
+                # a pooled connection may have been closed by the server; retry once on a fresh one
+                if reused and attempt == 0:
+                    continue
+                raise
+            resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+            if resp.will_close or q.qsize() >= self.maxsize:
+                conn.close()
+            else:
+                q.put(conn)
+            return resp.status, resp_headers, body
+        raise ResolverError(f"request to {url} failed")  # pragma: no cover
+
+    def close(self) -> None:
+        with self._lock:
+            queues, self._idle = list(self._idle.values()), {}
+        for q in queues:
+            while not q.empty():
+                q.get_nowait().close()
+
+
+def parse_index_page(body: bytes, content_type: str, base_url: str) -> List[IndexFile]:
+    """Parse a PEP 691 JSON or PEP 503 HTML project page into IndexFile entries."""
+    files: List[IndexFile] = []
+    if "json" in content_type:
+        doc = json.loads(body)
+        for f in doc.get("files", []):
+            meta = f.get("core-metadata", f.get("dist-info-metadata", False))
+            url = urljoin(base_url, f["url"])
+            files.append(IndexFile(f["filename"], url, dict(f.get("hashes") or {}), bool(meta), parse_wheel_filename(f["filename"])))
+        return files
+
+    for m in _ANCHOR_RE.finditer(body.decode("utf-8", errors="replace")):
+        attrs = {k.lower(): unescape(v) for k, v in _ATTR_RE.findall(m.group(1))}
+        href = attrs.get("href")
+        if not href:
+            continue
+        url, _, fragment = urljoin(base_url, href).partition("#")
+        hashes = {}
+        if "=" in fragment:
+            algo, _, digest = fragment.partition("=")
+            hashes[algo] = digest
+        filename = unescape(m.group(2)).strip() or url.rsplit("/", 1)[-1]
+        meta = attrs.get("data-core-metadata", attrs.get("data-dist-info-metadata"))
+        files.append(IndexFile(filename, url, hashes, meta is not None and meta != "false", parse_wheel_filename(filename)))
+    return files
+
+
+class WheelResolver:
+    """Fetch, cache and query PyTorch simple-index pages."""
+
+    def __init__(self, index_url: str = PYTORCH_INDEX, cache_dir: Optional[Path] = None, max_age: float = 300.0,
+                 max_workers: int = 8, timeout: float = 15.0):
+        self.index_url = index_url.rstrip("/")
+        self.cache_dir = Path(cache_dir) if cache_dir else user_cache_dir() / "http"
+        self.max_age = max_age
+        self.max_workers = max_workers
+        self.pool = ConnectionPool(maxsize=max_workers, timeout=timeout)
+        self._pages: Dict[str, List[IndexFile]] = {}
+
+    def page_url(self, tag: Optional[str], project: str) -> str:
+        return f"{self.index_url}/{tag or 'cpu'}/{normalize_name(project)}/"
+
+    def _cache_paths(self, url: str) -> Tuple[Path, Path]:
+        h = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{h}.meta.json", self.cache_dir / f"{h}.body"
+
+    def fetch_page(self, url: str) -> Tuple[bytes, str]:
+        """Return (body, content_type) for url, using the disk cache and conditional requests."""
+        meta_path, body_path = self._cache_paths(url)
+        meta = None
+        try:
+            meta = json.loads(meta_path.read_bytes())
+            if time.time() - meta.get("fetched", 0) < self.max_age:
+                return body_path.read_bytes(), meta.get("content_type", "")
+        except (OSError, ValueError):
+            meta = None
+
+        headers = {"Accept": ACCEPT, "Accept-Encoding": "identity"}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        try:
+            status, resp_headers, body = self.pool.request("GET", url, headers)
+        except (OSError, http.client.HTTPException) as e:
+            if meta is not None and body_path.exists():
+                return body_path.read_bytes(), meta.get("content_type", "")
+            raise ResolverError(f"cannot fetch {url}: {e}") from e
+
+        if status == 304 and meta is not None:
+            meta["fetched"] = time.time()
+            atomic_write_bytes(meta_path, json.dumps(meta).encode())
+            return body_path.read_bytes(), meta.get("content_type", "")
+        if status == 404:
+            return b"", "text/html"
+        if status != 200:
+            raise ResolverError(f"{url}: HTTP {status}")
+
+        content_type = resp_headers.get("content-type", "")
+        atomic_write_bytes(body_path, body)
+        atomic_write_bytes(meta_path, json.dumps({
+            "url": url,
+            "etag": resp_headers.get("etag"),
+            "last_modified": resp_headers.get("last-modified"),
+            "content_type": content_type,
+            "fetched": time.time(),
+        }).encode())
+        return body, content_type
+
+    def project_files(self, tag: Optional[str], project: str) -> List[IndexFile]:
+        url = self.page_url(tag, project)
+        files = self._pages.get(url)
+        if files is None:
+            body, content_type = self.fetch_page(url)
+            files = self._pages[url] = parse_index_page(body, content_type, url) if body else []
+        return files
+
+    def prefetch(self, pairs: Iterable[Tuple[Optional[str], str]]) -> None:
+        """Fetch several (tag, project) pages concurrently."""
+        todo = list(dict.fromkeys(pairs))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as ex:
+            list(ex.map(lambda p: self.project_files(*p), todo))
+
+    def compatible_files(self, tag: Optional[str], project: str, python_tag: Optional[str] = None,
+                         platform: Optional[str] = None) -> List[IndexFile]:
+        """Files for project on tag's index that install on this Python/platform."""
+        local = tag or "cpu"
+        out = []
+        for f in self.project_files(tag, project):
+            w = f.wheel
+            if w is None or w.name != normalize_name(project):
+                continue
+            if w.local not in (local, None):
+                continue
+            if is_compatible(w, python_tag, platform):
+                out.append(f)
+        return out
+
+    def available_versions(self, tag: Optional[str], project: str, python_tag: Optional[str] = None,
+                           platform: Optional[str] = None) -> List[str]:
+        versions = {f.wheel.version for f in self.compatible_files(tag, project, python_tag, platform)}
+        return sorted(versions, key=version_key)
+
+    def verify(self, recommendation: Dict, python_tag: Optional[str] = None, platform: Optional[str] = None,
+               versions_path: Optional[str] = None) -> Dict:
+        """Check each recommended wheel against the index.
+
+        versions_path is the versions.json the recommendation came from; the
+        fallback triple is picked from the same mapping.
+
+        Returns:
+            {"ok": bool,
+             "packages": {name: {"requested", "available", "files", "newest"}},
+             "recommendation": the input, or the newest fully-available mapped
+                               triple for the same tag when something is missing,
+             "corrected": bool, "warnings": [...]}
+        """
+        tag = recommendation.get("pip_tag")
+        self.prefetch((tag, p) for p in PACKAGES)
+        packages = {}
+        for pkg in PACKAGES:
+            requested = recommendation.get(pkg)
+            files = self.compatible_files(tag, pkg, python_tag, platform)
+            matched = [f.filename for f in files if f.wheel.version == requested]
+            versions = sorted({f.wheel.version for f in files}, key=version_key)
+            packages[pkg] = {
+                "requested": requested,
+                "available": bool(matched) or not requested,
+                "files": matched,
+                "newest": versions[-1] if versions else None,
+            }
+        ok = all(p["available"] for p in packages.values())
+        result = {"ok": ok, "packages": packages, "recommendation": dict(recommendation), "corrected": False, "warnings": []}
+        if ok:
+            return result
+
+        missing = [pkg for pkg, p in packages.items() if not p["available"]]
+        result["warnings"].append(f"no wheel on the {tag or 'cpu'} index for this Python/platform: " + ", ".join(
+            f"{pkg}=={packages[pkg]['requested']}" for pkg in missing))
+        alt = self._best_available_triple(tag, python_tag, platform, versions_path)
+        if alt:
+            result["recommendation"] = alt
+            result["corrected"] = True
+        else:
+            result["warnings"].append("no mapped torch/torchvision/torchaudio triple is fully available")
+        return result
+
+    def _best_available_triple(self, tag: Optional[str], python_tag: Optional[str], platform: Optional[str],
+                               versions_path: Optional[str] = None) -> Optional[Dict]:
+        avail = {pkg: set(self.available_versions(tag, pkg, python_tag, platform)) for pkg in PACKAGES}
+        candidates = [rec for rec in get_index(versions_path).data.values() if isinstance(rec, dict) and rec.get("pip_tag") == tag]
+        candidates.sort(key=lambda r: version_key(str(r.get("torch"))), reverse=True)
+        for rec in candidates:
+            if all(rec.get(pkg) in avail[pkg] for pkg in PACKAGES):
+                return {k: rec.get(k) for k in ("torch", "torchvision", "torchaudio", "pip_tag")}
+        return None
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+def verify_recommendation(recommendation: Dict, index_url: str = PYTORCH_INDEX, **kwargs) -> Dict:
+    """One-shot convenience wrapper around WheelResolver.verify."""
+    resolver = WheelResolver(index_url=index_url)
+    try:
+        return resolver.verify(recommendation, **kwargs)
+    finally:
+        resolver.close()
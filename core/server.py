@@ -0,0 +1,229 @@
+"""Small stdlib-only asyncio HTTP service for recommendation lookups.
+
+Keeps the mapping index resident so each request is a dict/bisect lookup,
+supports HTTP/1.1 keep-alive and many concurrent connections, and tracks
+request latency percentiles.
+
+Endpoints:
+    GET  /recommend?cuda=11.8[&extra=...]   recommendation + pip/conda commands
+    POST /recommend  {"cuda": "11.8", "extras": [...]}
+    GET  /stats                             request count and latency percentiles
+    GET  /healthz
+
+With --watch the versions file is hot-reloaded (core.reload) and the resident
+index and response cache are swapped without restarting.
+
+Usage:
+    python -m core.server [--host 127.0.0.1] [--port 8765] [--versions PATH] [--watch]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .command_builder import build_conda_command
+from .installer import generate_pip_command
+from .mapper import get_index, normalize_cuda_version
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 64 * 1024
+IDLE_TIMEOUT = 30.0
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+class RecommendationServer:
+    """asyncio HTTP server answering recommendation lookups from a resident index."""
+
+    def __init__(self, versions_path: Optional[str] = None, latency_window: int = 10000, watch: bool = False):
+        self.versions_path = versions_path
+        self.index = get_index(versions_path)
+        self.latencies: deque = deque(maxlen=latency_window)
+        self.requests = 0
+        self._responses: Dict[Tuple, bytes] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.watcher = None
+        if watch:
+            from .reload import VersionsWatcher
+
+            self.watcher = VersionsWatcher(versions_path, on_reload=self._swap_index).start()
+
+    def _swap_index(self, index) -> None:
+        # called from the watcher thread. The index is swapped before the response
+        # cache and recommend() reads them in the opposite order, so a body built
+        # from the old index can only land in the discarded cache.
+        self.index = index
+        self._responses = {}
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> Tuple[str, int]:
+        self._server = await asyncio.start_server(self._handle_conn, host, port, limit=MAX_HEADER_BYTES)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self) -> None:
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
+    def recommend(self, cuda: Optional[str], extras: Optional[List[str]] = None) -> Tuple[int, bytes]:
+        norm = normalize_cuda_version(cuda)
+        if not norm:
+            return 400, json.dumps({"error": "missing or invalid 'cuda' version"}).encode()
+        key = (norm, tuple(extras or ()))
+        responses = self._responses
+        body = responses.get(key)
+        if body is not None:
+            return 200, body
+        rec = self.index.lookup(norm)
+        if not rec:
+            return 404, json.dumps({"cuda_version": norm, "error": f"no mapping for CUDA {norm}"}).encode()
+        rec = {k: rec.get(k) for k in ("torch", "torchvision", "torchaudio", "pip_tag")}
+        body = json.dumps({
+            "cuda_version": norm,
+            "recommendation": rec,
+            "pip_command": generate_pip_command(rec, extras=list(extras or [])),
+            "conda_command": build_conda_command(rec["torch"], rec["torchvision"], rec["torchaudio"], rec["pip_tag"]),
+        }, ensure_ascii=False).encode("utf-8")
+        if len(responses) < 4096:
+            responses[key] = body
+        return 200, body
+
+    def stats(self) -> Dict:
+        lat = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "window": len(lat),
+            "latency_ms": {
+                "p50": _percentile(lat, 50) * 1e3,
+                "p90": _percentile(lat, 90) * 1e3,
+                "p99": _percentile(lat, 99) * 1e3,
+                "max": (lat[-1] if lat else 0.0) * 1e3,
+            },
+        }
+
+    def _route(self, method: str, target: str, body: bytes) -> Tuple[int, bytes]:
+        url = urlsplit(target)
+        if url.path == "/recommend":
+            if method == "GET":
+                q = parse_qs(url.query)
+                return self.recommend((q.get("cuda") or [None])[0], q.get("extra"))
+            if method == "POST":
+                try:
+                    payload = json.loads(body or b"{}")
+                except ValueError:
+                    return 400, b'{"error": "invalid JSON body"}'
+                extras = (payload.get("extras") or []) if isinstance(payload, dict) else None
+                if not isinstance(extras, list) or not all(isinstance(e, str) for e in extras):
+                    return 400, b'{"error": "expected a JSON object with an optional list of strings \'extras\'"}'
+                return self.recommend(payload.get("cuda"), extras)
+            return 405, b'{"error": "method not allowed"}'
+        if url.path == "/stats":
+            return 200, json.dumps(self.stats()).encode()
+        if url.path == "/healthz":
+            return 200, b'{"ok": true}'
+        return 404, b'{"error": "not found"}'
+
+    async def _handle_conn(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                start = time.perf_counter()
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._respond(writer, 400, b'{"error": "bad request line"}', keep_alive=False)
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+
+                conn = headers.get("connection", "").lower()
+                keep_alive = conn == "keep-alive" if version == "HTTP/1.0" else conn != "close"
+
+                body = b""
+                raw_length = headers.get("content-length")
+                if raw_length is None:
+                    if method.upper() == "POST":
+                        await self._respond(writer, 400, b'{"error": "missing Content-Length"}', keep_alive=False)
+                        return
+                    raw_length = "0"
+                if not (raw_length.isascii() and raw_length.isdigit()):
+                    await self._respond(writer, 400, b'{"error": "invalid Content-Length"}', keep_alive=False)
+                    return
+                length = int(raw_length)
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, b'{"error": "body too large"}', keep_alive=False)
+                    return
+                if length:
+                    try:
+                        body = await reader.readexactly(length)
+                    except asyncio.IncompleteReadError:
+                        return
+
+                status, payload = self._route(method.upper(), target, body)
+                await self._respond(writer, status, payload, keep_alive)
+                self.requests += 1
+                self.latencies.append(time.perf_counter() - start)
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: bytes, keep_alive: bool) -> None:
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        ).encode("latin-1")
+        writer.write(head + payload)
+        await writer.drain()
+
+
+async def _serve(host: str, port: int, versions_path: Optional[str], watch: bool = False) -> None:
+    server = RecommendationServer(versions_path, watch=watch)
+    bound_host, bound_port = await server.start(host, port)
+    print(f"torchsearch server listening on http://{bound_host}:{bound_port}", file=sys.stderr, flush=True)
+    await server.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m core.server", description="Serve torch recommendations over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--versions", help="path to versions.json")
+    parser.add_argument("--watch", action="store_true", help="hot-reload the versions file when it changes")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args.host, args.port, args.versions, args.watch))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""Content-addressed wheel store shared by many virtualenvs.
+
+Each wheel is unpacked once under ``<store>/<sha256[:2]>/<sha256>/`` (the
+wheel's own sha256). Installing it into an environment creates real
+directories in site-packages and hardlinks every file from the store, falling
+back to a copy when the store is on a different filesystem. The dist-info gets
+a fresh RECORD (paths relative to site-packages, hashes from the wheel) and an
+INSTALLER file, so pip lists, upgrades and uninstalls the package normally.
+Uninstalling only unlinks, so it never touches the store or other environments.
+
+Console-script launchers from entry_points.txt are generated on POSIX; on
+Windows, let pip install packages that need .exe launchers.
+
+Usage:
+    python -m core.store add WHEEL [...]
+    python -m core.store install --python /venv/bin/python WHEEL [...]
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import configparser
+import csv
+import hashlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .cache import user_cache_dir
+from .hashing import file_digest
+from .wheels import normalize_name, parse_wheel_filename
+
+INSTALLER = "torchsearch"
+
+_SCHEME_SCRIPT = "import json, sysconfig; print(json.dumps(sysconfig.get_paths()))"
+
+
+class StoreError(Exception):
+    """Raised for wheels that cannot be stored or installed from the store."""
+
+
+def default_store_dir() -> Path:
+    return user_cache_dir() / "store"
+
+
+def target_scheme(python: str) -> Dict[str, str]:
+    """sysconfig install paths (purelib, platlib, scripts, data, include) of a target interpreter."""
+    out = subprocess.run([python, "-c", _SCHEME_SCRIPT], capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def _record_hash(data: bytes) -> str:
+    return "sha256=" + base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b"=").decode()
+
+
+def _link_or_copy(src: Path, dst: Path) -> bool:
+    """Hardlink src to dst (replacing dst); copy when linking fails. Returns True if linked."""
+    if dst.exists() or dst.is_symlink():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+        return True
+    except OSError:
+        shutil.copy2(src, dst)
+        return False
+
+
+class WheelStore:
+    """Unpack-once, link-many storage for wheels."""
+
+    def __init__(self, root=None):
+        self.root = Path(root) if root else default_store_dir()
+
+    def path_for(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def add(self, wheel) -> str:
+        """Unpack a wheel into the store (no-op if already there); returns its sha256."""
+        wheel = Path(wheel)
+        info = parse_wheel_filename(wheel.name)
+        if info is None:
+            raise StoreError(f"not a wheel: {wheel}")
+        digest = file_digest(wheel)
+        dest = self.path_for(digest)
+        if (dest / "store.json").exists():
+            return digest
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=digest[:8] + ".", dir=str(dest.parent)))
+        try:
+            with zipfile.ZipFile(wheel) as zf:
+                for member in zf.infolist():
+                    name = member.filename
+                    if name.startswith("/") or ".." in Path(name).parts:
+                        raise StoreError(f"{wheel.name}: unsafe path {name!r}")
+                    zf.extract(member, tmp)
+                    if not member.is_dir():
+                        # store files are shared through hardlinks: make them read-only
+                        os.chmod(tmp / name, 0o555 if (member.external_attr >> 16) & 0o111 else 0o444)
+            dist_info = next((p.name for p in tmp.iterdir() if p.name.endswith(".dist-info") and p.is_dir()), None)
+            if dist_info is None:
+                raise StoreError(f"{wheel.name}: no .dist-info directory")
+            meta = {"filename": wheel.name, "name": info.name, "version": info.version, "local": info.local,
+                    "dist_info": dist_info, "stored": time.time()}
+            (tmp / "store.json").write_text(json.dumps(meta))
+            try:
+                os.replace(tmp, dest)
+            except OSError:
+                # another process stored the same wheel first
+                if not (dest / "store.json").exists():
+                    raise
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp, ignore_errors=True)
+        return digest
+
+    def meta(self, digest: str) -> Dict:
+        try:
+            return json.loads((self.path_for(digest) / "store.json").read_text())
+        except OSError as e:
+            raise StoreError(f"{digest} is not in the store") from e
+
+    def _wheel_hashes(self, src: Path, dist_info: str) -> Dict[str, Tuple[str, str]]:
+        hashes = {}
+        record = src / dist_info / "RECORD"
+        if record.exists():
+            with record.open(newline="", encoding="utf-8") as f:
+                for row in csv.reader(f):
+                    if len(row) >= 3 and row[1]:
+                        hashes[row[0]] = (row[1], row[2])
+        return hashes
+
+    def install(self, digest: str, scheme: Dict[str, str], python: Optional[str] = None) -> Dict:
+        """Materialize a stored wheel into an environment's install scheme.
+
+        Returns {"name", "version", "files", "linked", "copied"}.
+        """
+        meta = self.meta(digest)
+        src = self.path_for(digest)
+        site = Path(scheme["purelib"] if _root_is_purelib(src / meta["dist_info"] / "WHEEL") else scheme["platlib"])
+        remove_installed(site, meta["name"])
+        wheel_hashes = self._wheel_hashes(src, meta["dist_info"])
+        data_dir = meta["dist_info"][:-len(".dist-info")] + ".data"
+        targets = {"purelib": scheme["purelib"], "platlib": scheme["platlib"], "scripts": scheme["scripts"],
+                   "headers": os.path.join(scheme["include"], meta["name"]), "data": scheme["data"]}
+        record: List[Tuple[str, str, str]] = []
+        linked = copied = 0
+
+        def rel(path: Path) -> str:
+            return os.path.relpath(path, site).replace(os.sep, "/")
+
+        for dirpath, dirnames, filenames in os.walk(src):
+            dirnames.sort()
+            rel_dir = Path(dirpath).relative_to(src)
+            for fn in sorted(filenames):
+                arc = (rel_dir / fn).as_posix()
+                if arc == "store.json" or arc == f"{meta['dist_info']}/RECORD":
+                    continue
+                parts = arc.split("/")
+                if parts[0] == data_dir:
+                    if len(parts) < 3 or parts[1] not in targets:
+                        continue
+                    dst = Path(targets[parts[1]], *parts[2:])
+                else:
+                    dst = site / arc
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                if parts[0] == data_dir and parts[1] == "scripts":
+                    data = (Path(dirpath) / fn).read_bytes()
+                    if data.startswith(b"#!python"):
+                        # wheel scripts carry a placeholder shebang that must point at the target interpreter
+                        data = b"#!" + os.fsencode(python or sys.executable) + data[len(b"#!python"):]
+                    if dst.exists():
+                        dst.unlink()
+                    dst.write_bytes(data)
+                    os.chmod(dst, 0o755)
+                    record.append((rel(dst), _record_hash(data), str(len(data))))
+                    copied += 1
+                    continue
+                if _link_or_copy(Path(dirpath) / fn, dst):
+                    linked += 1
+                else:
+                    copied += 1
+                h, size = wheel_hashes.get(arc) or (_record_hash(dst.read_bytes()), str(dst.stat().st_size))
+                record.append((rel(dst), h, size))
+
+        dist = site / meta["dist_info"]
+        if os.name != "nt":
+            for path in _write_launchers(src / meta["dist_info"] / "entry_points.txt", Path(scheme["scripts"]), python):
+                data = path.read_bytes()
+                record.append((rel(path), _record_hash(data), str(len(data))))
+        (dist / "INSTALLER").write_text(INSTALLER + "\n")
+        record.append((rel(dist / "INSTALLER"), _record_hash((INSTALLER + "\n").encode()), str(len(INSTALLER) + 1)))
+        record.append((rel(dist / "RECORD"), "", ""))
+        buf = io.StringIO()
+        csv.writer(buf, lineterminator="\n").writerows(record)
+        (dist / "RECORD").write_text(buf.getvalue(), encoding="utf-8")
+        return {"name": meta["name"], "version": meta["version"], "files": len(record), "linked": linked, "copied": copied}
+
+
+def _root_is_purelib(wheel_file: Path) -> bool:
+    for line in wheel_file.read_text(encoding="utf-8").splitlines():
+        key, _, value = line.partition(":")
+        if key.strip().lower() == "root-is-purelib":
+            return value.strip().lower() == "true"
+    return True
+
+
+def _write_launchers(entry_points: Path, scripts_dir: Path, python: Optional[str]) -> List[Path]:
+    if not entry_points.exists():
+        return []
+    cp = configparser.ConfigParser(delimiters=("=",))
+    cp.optionxform = str
+    cp.read(entry_points, encoding="utf-8")
+    out = []
+    if cp.has_section("console_scripts"):
+        scripts_dir.mkdir(parents=True, exist_ok=True)
+        for name, target in cp.items("console_scripts"):
+            module, _, func = target.strip().partition(":")
+            func = func.split("[")[0].strip()
+            path = scripts_dir / name
+            path.write_text(
+                f"#!{python or sys.executable}\nimport sys\nfrom {module.strip()} import {func.split('.')[0]}\n"
+                f"if __name__ == '__main__':\n    sys.exit({func}())\n"
+            )
+            os.chmod(path, 0o755)
+            out.append(path)
+    return out
+
+
+def remove_installed(site: Path, name: str) -> Optional[str]:
+    """Uninstall any existing distribution of name from site via its RECORD; returns the removed version."""
+    want = normalize_name(name)
+    for dist in site.glob("*.dist-info"):
+        dist_name, _, version = dist.name[:-len(".dist-info")].partition("-")
+        if normalize_name(dist_name) != want:
+            continue
+        record = dist / "RECORD"
+        parents = set()
+        if record.exists():
+            with record.open(newline="", encoding="utf-8") as f:
+                for row in csv.reader(f):
+                    if not row:
+                        continue
+                    path = Path(os.path.normpath(site / row[0]))
+                    try:
+                        path.unlink()
+                        parents.add(path.parent)
+                    except OSError:
+                        pass
+        shutil.rmtree(dist, ignore_errors=True)
+        # drop directories the package left empty, deepest first (like pip)
+        for d in sorted(parents, key=lambda p: len(p.parts), reverse=True):
+            while d != site and site in d.parents:
+                pycache = d / "__pycache__"
+                if pycache.is_dir() and not any(f.suffix != ".pyc" for f in pycache.iterdir()):
+                    shutil.rmtree(pycache, ignore_errors=True)
+                try:
+                    d.rmdir()
+                except OSError:
+                    break
+                d = d.parent
+        return version
+    return None
+
+
+def install_wheels(wheels: Iterable, python: Optional[str] = None, store: Optional[WheelStore] = None) -> List[Dict]:
+    """Store each wheel (once) and materialize it into the environment of python (default: this one)."""
+    store = store or WheelStore()
+    python = python or sys.executable
+    scheme = target_scheme(python)
+    return [store.install(store.add(w), scheme, python) for w in wheels]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m core.store", description="Shared, content-addressed wheel store with hardlinked installs.")
+    parser.add_argument("--store", help=f"store directory (default: {default_store_dir()})")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_add = sub.add_parser("add", help="unpack wheels into the store")
+    p_add.add_argument("wheels", nargs="+")
+    p_inst = sub.add_parser("install", help="store wheels and link them into an environment")
+    p_inst.add_argument("--python", help="target interpreter (default: this one)")
+    p_inst.add_argument("wheels", nargs="+")
+    args = parser.parse_args(argv)
+
+    store = WheelStore(args.store)
+    try:
+        if args.cmd == "add":
+            for w in args.wheels:
+                print(store.add(w), w)
+        else:
+            for res in install_wheels(args.wheels, args.python, store):
+                print(json.dumps(res))
+    except (StoreError, zipfile.BadZipFile) as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
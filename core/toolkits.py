@@ -0,0 +1,226 @@
+"""Find installed CUDA toolkits from the filesystem, without running nvcc.
+
+Candidate roots are $CUDA_HOME, $CUDA_PATH (and Windows' CUDA_PATH_V*_* vars),
+/usr/local/cuda and /usr/local/cuda-*, /opt/cuda, the Windows "NVIDIA GPU
+Computing Toolkit\\CUDA\\v*" directories and the active conda prefix. Each root
+is inspected on a thread pool (stat/read only; slow network mounts do not
+serialize the scan) and its version is taken from, in order:
+
+  version.json        "cuda": {"version": "12.1.1"}       (CUDA >= 11.1)
+  version.txt         "CUDA Version 10.2.89"               (older toolkits)
+  libcudart           libcudart.so.12.1.105 / cudart64_110.dll
+  conda-meta          cuda-cudart-12.1.105-*.json / cudatoolkit-11.8.0-*.json
+
+Roots that resolve to the same directory (/usr/local/cuda -> cuda-12.1) are
+reported once with all the names they were found under. The toolkit whose
+bin/ holds the first nvcc on PATH is marked active.
+
+Usage:
+    python -m core.toolkits [--json] [--versions data/versions.json]
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import re
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .mapper import normalize_cuda_version
+
+_VERSION_TXT_RE = re.compile(r"CUDA Version\s+(\d+\.\d+(?:\.\d+)*)")
+_CUDART_SO_RE = re.compile(r"^libcudart\.so\.(\d+\.\d+(?:\.\d+)*)$")
+# cudart64_110.dll -> 11.0; CUDA 12+ names only the major (cudart64_12.dll), which says too little
+_CUDART_DLL_RE = re.compile(r"^cudart64_(\d{2,})(\d)\.dll$", re.IGNORECASE)
+_CONDA_META_RE = re.compile(r"^(?:cuda-cudart|cudatoolkit)-(\d+\.\d+(?:\.\d+)*)-.*\.json$")
+_LIB_DIRS = ("lib64", "lib", os.path.join("targets", "x86_64-linux", "lib"), os.path.join("targets", "sbsa-linux", "lib"),
+             "bin", os.path.join("Library", "bin"), os.path.join("Library", "lib"))
+
+
+class Toolkit(NamedTuple):
+    root: str                  # resolved directory
+    version: str               # e.g. "12.1.1"
+    source: str                # "version.json" | "version.txt" | "libcudart" | "conda-meta"
+    origins: Tuple[str, ...]   # how the root was found: "CUDA_HOME", "/usr/local/cuda", "conda", ...
+    has_nvcc: bool
+    active: bool               # its nvcc is the first one on PATH
+
+
+def candidate_roots(environ=None) -> List[Tuple[str, str]]:
+    """(path, origin) pairs to inspect, most specific first; paths need not exist."""
+    env = os.environ if environ is None else environ
+    roots: List[Tuple[str, str]] = []
+    for name in ("CUDA_HOME", "CUDA_PATH", "CUDA_ROOT"):
+        if env.get(name):
+            roots.append((env[name], name))
+    for name in sorted(env):
+        if name.startswith("CUDA_PATH_V") and env[name]:
+            roots.append((env[name], name))
+    if env.get("CONDA_PREFIX"):
+        roots.append((env["CONDA_PREFIX"], "conda"))
+    if os.name == "nt":
+        program_files = env.get("ProgramFiles", r"C:\Program Files")
+        pattern = os.path.join(program_files, "NVIDIA GPU Computing Toolkit", "CUDA", "v*")
+        roots += [(p, p) for p in sorted(glob.glob(pattern))]
+    else:
+        roots += [(p, p) for p in ["/usr/local/cuda", *sorted(glob.glob("/usr/local/cuda-*")), "/opt/cuda"]]
+    return roots
+
+
+def _read_version_json(root: str) -> Optional[str]:
+    try:
+        with open(os.path.join(root, "version.json"), "rb") as f:
+            data = json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+    entry = (data.get("cuda") or data.get("cuda_cudart")) if isinstance(data, dict) else None
+    version = entry.get("version") if isinstance(entry, dict) else None
+    return version if isinstance(version, str) and normalize_cuda_version(version) else None
+
+
+def _read_version_txt(root: str) -> Optional[str]:
+    try:
+        with open(os.path.join(root, "version.txt"), "r", encoding="utf-8", errors="replace") as f:
+            m = _VERSION_TXT_RE.search(f.read(4096))
+    except OSError:
+        return None
+    return m.group(1) if m else None
+
+
+def _read_cudart(root: str) -> Optional[str]:
+    best: Optional[Tuple[int, ...]] = None
+    for sub in _LIB_DIRS:
+        try:
+            names = os.listdir(os.path.join(root, sub))
+        except OSError:
+            continue
+        for name in names:
+            m = _CUDART_SO_RE.match(name)
+            if m:
+                version = tuple(int(x) for x in m.group(1).split("."))
+            else:
+                m = _CUDART_DLL_RE.match(name)
+                if not m:
+                    continue
+                version = (int(m.group(1)), int(m.group(2)))
+            # the fullest name wins: libcudart.so.12.1.105 over the libcudart.so.12 symlink
+            if len(version) >= 2 and (best is None or version > best):
+                best = version
+    return ".".join(str(x) for x in best) if best else None
+
+
+def _read_conda_meta(root: str) -> Optional[str]:
+    try:
+        names = os.listdir(os.path.join(root, "conda-meta"))
+    except OSError:
+        return None
+    for name in sorted(names):
+        m = _CONDA_META_RE.match(name)
+        if m:
+            return m.group(1)
+    return None
+
+
+_READERS = (
+    ("version.json", _read_version_json),
+    ("version.txt", _read_version_txt),
+    ("libcudart", _read_cudart),
+    ("conda-meta", _read_conda_meta),
+)
+
+
+def inspect_root(root: str) -> Optional[Tuple[str, str]]:
+    """(version, source) for a toolkit root, or None if it holds no CUDA runtime."""
+    if not os.path.isdir(root):
+        return None
+    for source, reader in _READERS:
+        version = reader(root)
+        if version:
+            return version, source
+    return None
+
+
+def _nvcc_in(root: str) -> Optional[str]:
+    for name in ("nvcc", "nvcc.exe"):
+        path = os.path.join(root, "bin", name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def discover_toolkits(roots: Optional[Sequence[Tuple[str, str]]] = None, max_workers: int = 8) -> List[Toolkit]:
+    """All toolkits found under the candidate roots, newest version first."""
+    roots = candidate_roots() if roots is None else list(roots)
+    by_real: Dict[str, List[str]] = {}
+    for path, origin in roots:
+        try:
+            real = os.path.realpath(path)
+        except OSError:
+            continue
+        origins = by_real.setdefault(real, [])
+        if origin not in origins:
+            origins.append(origin)
+    if not by_real:
+        return []
+
+    def inspect(real: str):
+        return real, inspect_root(real), _nvcc_in(real)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(by_real)))) as pool:
+        found = list(pool.map(inspect, by_real))
+
+    on_path = shutil.which("nvcc")
+    active_bin = os.path.dirname(os.path.realpath(on_path)) if on_path else None
+    toolkits = []
+    for real, info, nvcc in found:
+        if info is None:
+            continue
+        active = nvcc is not None and os.path.dirname(os.path.realpath(nvcc)) == active_bin
+        toolkits.append(Toolkit(real, info[0], info[1], tuple(by_real[real]), nvcc is not None, active))
+    toolkits.sort(key=lambda t: tuple(int(x) for x in re.findall(r"\d+", t.version)), reverse=True)
+    return toolkits
+
+
+def recommend_for_toolkits(toolkits: Optional[List[Toolkit]] = None, versions_path: Optional[str] = None) -> List[Dict]:
+    """One row per toolkit: its fields plus the torch recommendation for its CUDA version."""
+    from .version_mapper import get_torch_versions
+
+    if toolkits is None:
+        toolkits = discover_toolkits()
+    rows = []
+    for tk in toolkits:
+        row = tk._asdict()
+        row["origins"] = list(tk.origins)
+        row["cuda_version"] = normalize_cuda_version(tk.version)
+        row["recommendation"] = get_torch_versions(row["cuda_version"], versions_path=versions_path)
+        rows.append(row)
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m core.toolkits", description="List installed CUDA toolkits (no nvcc spawn) with a torch recommendation for each.")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    parser.add_argument("--versions", help="path to versions.json")
+    args = parser.parse_args(argv)
+
+    rows = recommend_for_toolkits(versions_path=args.versions)
+    if args.json:
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+        return 0 if rows else 1
+    if not rows:
+        print("未找到已安装的 CUDA toolkit。", file=sys.stderr)
+        return 1
+    for row in rows:
+        rec = row["recommendation"]
+        pick = f"torch {rec['torch']} ({rec['pip_tag'] or 'cpu'})" if rec else "no mapping"
+        mark = "*" if row["active"] else " "
+        print(f"{mark} {row['version']:<12} {row['root']:<40} {pick}  [{row['source']}; {', '.join(row['origins'])}]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,13 +4,14 @@ This module provides a single, stable function `get_torch_versions` which
 returns a normalized recommendation dict for a given CUDA version.
 
 It delegates to `core.mapper` which loads mappings from `data/versions.json`.
-This makes the core mapping data-driven and easier to update.
+This makes the core mapping data-driven and easier to update. Lookups use the
+cached `VersionIndex` for the data file, so repeated calls do no file I/O.
 """
 from __future__ import annotations
 
 from typing import Optional, Dict, Any
 
-from .mapper import load_versions, get_recommendations
+from .mapper import get_index
 
 
 def get_torch_versions(cuda_version: Optional[str], versions_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
@@ -24,8 +25,7 @@ def get_torch_versions(cuda_version: Optional[str], versions_path: Optional[str]
         A dict with keys: torch, torchvision, torchaudio, pip_tag (values may be None)
         or None if no recommendation is available.
     """
-    versions_data = load_versions(versions_path) if versions_path else None
-    rec = get_recommendations(cuda_version, versions_data=versions_data)
+    rec = get_index(versions_path).lookup(cuda_version)
     if not rec:
         return None
 
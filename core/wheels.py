@@ -0,0 +1,102 @@
+"""Wheel filename parsing and host tag matching.
+
+Only what torchsearch needs for the PyTorch indexes: split a wheel filename into
+its PEP 427 parts, order versions, and decide whether a wheel installs on a
+given Python/platform. Kept dependency-free (no `packaging`).
+"""
+from __future__ import annotations
+
+import platform as _platform
+import re
+import sys
+from typing import NamedTuple, Optional, Tuple
+
+_WHEEL_RE = re.compile(
+    r"^(?P<name>[^-]+)-(?P<version>[^-]+)(?:-(?P<build>\d[^-]*))?"
+    r"-(?P<python>[^-]+)-(?P<abi>[^-]+)-(?P<platform>[^-]+)\.whl$"
+)
+
+
+class WheelInfo(NamedTuple):
+    name: str          # normalized project name, e.g. "torch"
+    version: str       # public version, e.g. "2.2.2"
+    local: Optional[str]  # local version label, e.g. "cu121" (None if absent)
+    build: Optional[str]
+    python: str        # e.g. "cp311" or "py3" (may be compound "py2.py3")
+    abi: str
+    platform: str      # e.g. "manylinux2014_x86_64" or "linux_x86_64.manylinux1_x86_64"
+    filename: str
+
+
+def normalize_name(name: str) -> str:
+    """PEP 503 project name normalization."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def parse_wheel_filename(filename: str) -> Optional[WheelInfo]:
+    """Parse a wheel filename (URL-quoted '+' is accepted); None if it is not a wheel."""
+    filename = filename.rsplit("/", 1)[-1].replace("%2B", "+").replace("%2b", "+")
+    m = _WHEEL_RE.match(filename)
+    if not m:
+        return None
+    version, _, local = m.group("version").partition("+")
+    return WheelInfo(
+        normalize_name(m.group("name")), version, local or None, m.group("build"),
+        m.group("python"), m.group("abi"), m.group("platform"), filename,
+    )
+
+
+def version_key(version: str) -> Tuple:
+    """Sort key for PEP 440-ish versions: release numbers, then pre < final < post."""
+    m = re.match(r"^(\d+(?:\.\d+)*)(?:(a|b|rc)(\d+))?(?:\.post(\d+))?(?:\.dev(\d+))?", version)
+    if not m:
+        return ((), 0, 0, 0, version)
+    release = tuple(int(x) for x in m.group(1).split("."))
+    # trim trailing zeros so 2.1 == 2.1.0
+    while len(release) > 1 and release[-1] == 0:
+        release = release[:-1]
+    pre_rank = {"a": -3, "b": -2, "rc": -1}.get(m.group(2) or "", 0)
+    if m.group(5) is not None and not m.group(2):
+        pre_rank = -4  # .devN sorts before alphas
+    return (release, pre_rank, int(m.group(3) or 0), int(m.group(4) or 0), "")
+
+
+def host_python_tag() -> str:
+    return f"cp{sys.version_info[0]}{sys.version_info[1]}"
+
+
+def host_platform() -> str:
+    """Return a platform family tag: linux_x86_64, win_amd64, macosx_arm64, ..."""
+    machine = _platform.machine().lower()
+    if sys.platform.startswith("win"):
+        return "win_arm64" if machine in ("arm64", "aarch64") else "win_amd64" if sys.maxsize > 2**32 else "win32"
+    if sys.platform == "darwin":
+        return f"macosx_{'arm64' if machine in ('arm64', 'aarch64') else 'x86_64'}"
+    return f"linux_{machine or 'x86_64'}"
+
+
+def python_matches(wheel: WheelInfo, python_tag: str) -> bool:
+    """True if the wheel's python/abi tags accept python_tag (e.g. "cp311")."""
+    major = python_tag[2:3]
+    accepted = {python_tag, f"py{major}", f"py{python_tag[2:]}"}
+    if not accepted & set(wheel.python.split(".")):
+        return False
+    abis = set(wheel.abi.split("."))
+    return bool(abis & {python_tag, "abi3", "none"}) or any(a.startswith(python_tag) for a in abis)
+
+
+def platform_matches(wheel: WheelInfo, host: str) -> bool:
+    """True if any of the wheel's platform tags installs on the host family tag."""
+    os_name, _, arch = host.partition("_")
+    for tag in wheel.platform.split("."):
+        if tag == "any" or tag == host:
+            return True
+        if os_name == "linux" and tag.startswith("manylinux") and tag.endswith("_" + arch):
+            return True
+        if os_name == "macosx" and tag.startswith("macosx_") and (tag.endswith("_" + arch) or tag.endswith("_universal2")):
+            return True
+    return False
+
+
+def is_compatible(wheel: WheelInfo, python_tag: Optional[str] = None, platform: Optional[str] = None) -> bool:
+    return python_matches(wheel, python_tag or host_python_tag()) and platform_matches(wheel, platform or host_platform())
@@ -1,11 +1,19 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+import sys
+
+sys.path.insert(0, SPECPATH)
+from core.binmap import build
+
+# ship the compiled mapping next to versions.json (see core/binmap.py)
+build(os.path.join(SPECPATH, 'data', 'versions.json'))
 
 
 a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('lib', 'tcl')],
+    datas=[('lib', 'tcl'), ('data/versions.json', 'data'), ('data/versions.bin', 'data')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
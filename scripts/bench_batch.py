@@ -0,0 +1,40 @@
+# Compare the scalar lookup path with core.api.prepare_batch on a synthetic fleet.
+# usage: python scripts/bench_batch.py [N]
+import random
+import sys
+import time
+from pathlib import Path
+repo_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repo_root))
+
+from core.api import prepare_batch
+from core.installer import generate_pip_command
+from core.version_mapper import get_torch_versions
+
+n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+rng = random.Random(0)
+pool = ["10.2", "11.3", "11.6.124", "11.7", "11.8.89", "12.0", "12.1.105", "12.2", "12.4.131", "12.6", "9.0", None]
+inputs = [rng.choice(pool) for _ in range(n)]
+
+
+def scalar():
+    out = []
+    for v in inputs:
+        rec = get_torch_versions(v)
+        out.append(generate_pip_command(rec) if rec else None)
+    return out
+
+
+def batch():
+    return prepare_batch(inputs)["install_command"]
+
+
+assert scalar() == batch()
+for name, fn in (("scalar", scalar), ("batch", batch)):
+    timings = []
+    for _ in range(3):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    best = min(timings)
+    print(f"{name:7s} n={n}: {best * 1e3:8.1f} ms total, {best / n * 1e9:8.1f} ns/item")
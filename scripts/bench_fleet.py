@@ -0,0 +1,39 @@
+# Throughput of core.fleet on a synthetic corpus of per-host dumps.
+# usage: python scripts/bench_fleet.py [N_HOSTS] [WORKERS]
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+repo_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repo_root))
+
+from core.fleet import analyze_fleet, write_report
+
+n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+rng = random.Random(0)
+releases = ["10.2", "11.3", "11.6", "11.7", "11.8", "12.1", "12.4"]
+drivers = [("470.223.02", "11.4"), ("525.147.05", "12.0"), ("535.104.05", "12.2"), ("550.54.14", "12.4")]
+
+with tempfile.TemporaryDirectory() as tmp:
+    t0 = time.perf_counter()
+    for i in range(n):
+        d = os.path.join(tmp, f"rack{i // 1000:03d}")
+        if i % 1000 == 0:
+            os.mkdir(d)
+        driver, cuda = rng.choice(drivers)
+        text = f"| NVIDIA-SMI {driver}   Driver Version: {driver}   CUDA Version: {cuda}     |\n"
+        text += "".join(f"|   {g}  NVIDIA A100-SXM4-80GB          On  | 00000000:0{g}:00.0 Off |        0 |\n" for g in range(8))
+        if rng.random() < 0.7:
+            text = f"Cuda compilation tools, release {rng.choice(releases)}, V0.0.0\n" + text
+        with open(os.path.join(d, f"host{i:06d}.txt"), "w") as f:
+            f.write(text)
+    print(f"generated {n} dumps in {time.perf_counter() - t0:.1f}s")
+
+    t0 = time.perf_counter()
+    with open(os.devnull, "w") as out:
+        rows = write_report(analyze_fleet(tmp, workers=workers), out, fmt="csv")
+    dt = time.perf_counter() - t0
+    print(f"analyzed {rows} hosts in {dt:.2f}s: {rows / dt:,.0f} hosts/s (workers={os.cpu_count() if workers is None else workers})")
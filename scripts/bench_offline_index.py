@@ -0,0 +1,61 @@
+# Ingest and query timings for core.offline_index on a synthetic mirror.
+# usage: python scripts/bench_offline_index.py [N_FILES]
+# The mirror is made of index.html pages (like a mirrored simple index), spread
+# over 40 cuda tags x 3 projects.
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+repo_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repo_root))
+
+from core.offline_index import OfflineIndex
+
+n = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+tags = [f"cu{major}{minor}" for major in (10, 11, 12, 13) for minor in range(10)]
+projects = ("torch", "torchvision", "torchaudio")
+pythons = ("cp38", "cp39", "cp310", "cp311", "cp312", "cp313")
+plats = ("manylinux_2_17_x86_64.manylinux2014_x86_64", "manylinux_2_28_aarch64", "win_amd64", "macosx_11_0_arm64")
+per_page = n // (len(tags) * len(projects))
+
+with tempfile.TemporaryDirectory() as tmp:
+    mirror = Path(tmp) / "whl"
+    for tag in tags:
+        for proj in projects:
+            d = mirror / tag / proj
+            d.mkdir(parents=True)
+            links = []
+            for i in range(per_page):
+                py = pythons[i % len(pythons)]
+                plat = plats[(i // len(pythons)) % len(plats)]
+                ver = f"{i // 24 // 40}.{(i // 24) % 40}.{i % 3}"
+                f = f"{proj}-{ver}+{tag}-{py}-{py}-{plat}.whl"
+                links.append(f'<a href="/whl/{tag}/{f.replace("+", "%2B")}">{f}</a><br/>')
+            (d / "index.html").write_text("<html><body>" + "\n".join(links) + "</body></html>")
+
+    db = os.path.join(tmp, "idx.sqlite")
+    with OfflineIndex(db) as idx:
+        t0 = time.perf_counter()
+        stats = idx.ingest(str(mirror))
+        print(f"full ingest of {per_page * len(tags) * len(projects):,} files ({stats['rows']:,} rows): {time.perf_counter() - t0:.2f}s")
+
+        t0 = time.perf_counter()
+        stats = idx.ingest(str(mirror))
+        print(f"no-op re-ingest: {(time.perf_counter() - t0) * 1e3:.1f} ms, {stats['changed']} dirs changed")
+
+        page = mirror / "cu121" / "torch" / "index.html"
+        page.write_text(page.read_text())
+        t0 = time.perf_counter()
+        stats = idx.ingest(str(mirror))
+        print(f"re-ingest after touching one page: {(time.perf_counter() - t0) * 1e3:.1f} ms, {stats['changed']} dirs changed")
+
+        samples = []
+        for i in range(2000):
+            tag = tags[i % len(tags)]
+            t0 = time.perf_counter()
+            idx.newest_triple(tag, "cp311", "linux_x86_64")
+            samples.append((time.perf_counter() - t0) * 1e6)
+        samples.sort()
+        print(f"newest_triple: median {statistics.median(samples):.0f} us, p99 {samples[int(len(samples) * 0.99)]:.0f} us")
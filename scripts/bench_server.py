@@ -0,0 +1,67 @@
+# Load generator for core.server: keep-alive connections hammering /recommend.
+# usage: python scripts/bench_server.py [CONNECTIONS] [SECONDS]
+# Starts the server in a child process pinned to one core when possible.
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+repo_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repo_root))
+
+conns = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+versions = ["10.2", "11.7", "11.8.89", "12.1.105", "12.4", "12.2"]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def client(port, deadline, counts):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    i = 0
+    while time.perf_counter() < deadline:
+        v = versions[i % len(versions)]
+        writer.write(f"GET /recommend?cuda={v} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+        await reader.readexactly(length)
+        counts[0] += 1
+        i += 1
+    writer.close()
+
+
+async def fetch_stats(port):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /stats HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n")
+    data = await reader.read()
+    writer.close()
+    return json.loads(data.split(b"\r\n\r\n", 1)[1])
+
+
+async def run(port):
+    counts = [0]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, start + seconds, counts) for _ in range(conns)))
+    elapsed = time.perf_counter() - start
+    print(f"{counts[0]} requests over {conns} keep-alive connections in {elapsed:.2f}s: {counts[0] / elapsed:,.0f} req/s")
+    print("server stats:", json.dumps(await fetch_stats(port)))
+
+
+port = free_port()
+cmd = [sys.executable, "-m", "core.server", "--port", str(port)]
+if sys.platform.startswith("linux") and os.cpu_count() and os.cpu_count() > 1:
+    cmd = ["taskset", "-c", "0"] + cmd
+server = subprocess.Popen(cmd, cwd=repo_root, stderr=subprocess.PIPE, text=True)
+try:
+    server.stderr.readline()  # "listening on ..."
+    asyncio.run(run(port))
+finally:
+    server.terminate()
+    server.wait()
@@ -0,0 +1,55 @@
+# Cold-start budget for the headless CLI (python -m core).
+# usage: python scripts/bench_startup.py [RUNS] [BUDGET_MS]
+# Reports median wall time of a plain lookup, the slowest imports from
+# -X importtime, and fails if the budget is exceeded or a forbidden module loads.
+# The budget is the time on top of a bare `python -c pass` (default 50 ms).
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+repo_root = Path(__file__).resolve().parent.parent
+
+runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+budget_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 50.0
+cmd = [sys.executable, "-m", "core", "--cuda", "11.8", "--format", "pip"]
+forbidden = ("tkinter", "subprocess", "asyncio")
+env = dict(os.environ, PYTHONDONTWRITEBYTECODE="0")
+
+baseline = []
+walls = []
+for _ in range(runs):
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], cwd=repo_root, check=True)
+    baseline.append((time.perf_counter() - t0) * 1e3)
+    t0 = time.perf_counter()
+    subprocess.run(cmd, cwd=repo_root, env=env, check=True, stdout=subprocess.DEVNULL)
+    walls.append((time.perf_counter() - t0) * 1e3)
+
+proc = subprocess.run(cmd[:1] + ["-X", "importtime"] + cmd[1:], cwd=repo_root, env=env, capture_output=True, text=True, check=True)
+imports = []
+for line in proc.stderr.splitlines():
+    if not line.startswith("import time:") or "|" not in line:
+        continue
+    self_us, _cum_us, name = line[len("import time:"):].split("|")
+    if self_us.strip().isdigit():
+        imports.append((int(self_us), name.strip()))
+loaded = {name for _, name in imports}
+
+median = statistics.median(walls)
+overhead = median - statistics.median(baseline)
+print(f"interpreter only : {statistics.median(baseline):6.1f} ms (median of {runs})")
+print(f"python -m core   : {median:6.1f} ms (median of {runs}), +{overhead:.1f} ms, budget +{budget_ms:.0f} ms")
+print("slowest imports (self time):")
+for us, name in sorted(imports, reverse=True)[:8]:
+    print(f"  {us / 1e3:6.2f} ms  {name}")
+
+bad = [m for m in forbidden if m in loaded]
+if bad:
+    print("FAIL: forbidden modules imported:", ", ".join(bad))
+    sys.exit(1)
+if overhead > budget_ms:
+    print("FAIL: cold start over budget")
+    sys.exit(1)
+print("OK")
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core import nvml
+
+
+@pytest.fixture(autouse=True)
+def _no_nvml(monkeypatch):
+    # detector tests fake nvidia-smi; keep a real NVML on the host from answering instead
+    monkeypatch.setitem(nvml._STATE, "nvml", None)
+
+
+# a tiny cu121 wheel index shared by the prefetch and executor tests
+TORCH = "torch-2.3.1+cu121-cp311-cp311-linux_x86_64.whl"
+VISION = "torchvision-0.18.1+cu121-cp311-cp311-linux_x86_64.whl"
+AUDIO = "torchaudio-2.3.1+cu121-cp311-cp311-linux_x86_64.whl"
+CUBLAS = "nvidia_cublas_cu12-12.1.3.1-py3-none-manylinux1_x86_64.whl"
+METADATA = (
+    "Metadata-Version: 2.1\nName: torch\nVersion: 2.3.1+cu121\n"
+    "Requires-Dist: filelock\n"
+    'Requires-Dist: nvidia-cublas-cu12 ==12.1.3.1 ; platform_system == "Linux" and platform_machine == "x86_64"\n'
+    'Requires-Dist: nvidia-nccl-cu12 ==2.20.5 ; platform_system == "Windows"\n'
+    'Requires-Dist: opt-einsum >=3.3 ; extra == "opt-einsum"\n'
+)
+FILES = {name: (name.encode() * 4000) for name in (TORCH, VISION, AUDIO, CUBLAS)}
+PROJECTS = {"torch": [TORCH], "torchvision": [VISION], "torchaudio": [AUDIO], "nvidia-cublas-cu12": [CUBLAS]}
+
+
+@pytest.fixture
+def wheel_server():
+    ranges = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body, headers=()):
+            self.send_response(status)
+            for k, v in headers:
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            m = re.fullmatch(r"/whl/cu121/([\w-]+)/", self.path)
+            if m and m.group(1) in PROJECTS:
+                page = {"meta": {"api-version": "1.0"}, "name": m.group(1), "files": [
+                    {"filename": f, "url": f"/files/{f.replace('+', '%2B')}", "core-metadata": f == TORCH,
+                     "hashes": {"sha256": hashlib.sha256(FILES[f]).hexdigest()}} for f in PROJECTS[m.group(1)]]}
+                return self._send(200, json.dumps(page).encode(), [("Content-Type", "application/vnd.pypi.simple.v1+json")])
+            name = self.path.rsplit("/", 1)[-1].replace("%2B", "+")
+            if name == TORCH + ".metadata":
+                return self._send(200, METADATA.encode())
+            if name not in FILES:
+                return self._send(404, b"")
+            body = FILES[name]
+            rng = self.headers.get("Range")
+            ranges.append((name, rng))
+            if rng:
+                start = int(re.fullmatch(r"bytes=(\d+)-", rng).group(1))
+                if start >= len(body):
+                    return self._send(416, b"", [("Content-Range", f"bytes */{len(body)}")])
+                return self._send(206, body[start:], [("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")])
+            self._send(200, body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/whl", ranges
+    server.shutdown()
+    server.server_close()
+
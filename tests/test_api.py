@@ -0,0 +1,24 @@
+import json
+
+import core.api as api
+
+
+def test_prepare_batch_matches_scalar_path(tmp_path):
+    data = {
+        "11.8": {"torch": "2.1.2", "torchvision": "0.16.2", "torchaudio": "2.1.2", "pip_tag": "cu118"},
+        "12.1": {"torch": "2.2.2", "torchvision": "0.17.2", "torchaudio": "2.2.2", "pip_tag": "cu121"},
+    }
+    p = tmp_path / "versions.json"
+    p.write_text(json.dumps(data))
+
+    inputs = ["11.8", "12.1.105", None, "11.8", "bogus", "11.7"]
+    res = api.prepare_batch(inputs, versions_path=str(p))
+
+    assert set(res) == set(api.BATCH_COLUMNS)
+    assert all(len(col) == len(inputs) for col in res.values())
+    assert res["detected_version"] == ["11.8", "12.1", None, "11.8", None, "11.7"]
+    assert res["torch"] == ["2.1.2", "2.2.2", None, "2.1.2", None, "2.1.2"]
+    assert res["pip_tag"][1] == "cu121"
+
+    scalar = api.detect_and_prepare(cuda_override="11.8", versions_path=str(p))
+    assert res["install_command"][0] == scalar["install_command"]
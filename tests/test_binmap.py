@@ -0,0 +1,62 @@
+import json
+import os
+import shutil
+
+from core import binmap
+from core.mapper import DEFAULT_DATA_PATH, VersionIndex, clear_index_cache, get_index
+
+QUERIES = ["cpu", "9.0", "10.2", "11.0", "11.5", "11.6.124", "11.8", "11.9", "12.0", "12.3", "12.5", "12.9",
+           "13.0", "13.4", "", None, "abc", "11.08"]
+
+
+def test_binary_index_matches_version_index(tmp_path):
+    data = json.loads(DEFAULT_DATA_PATH.read_text(encoding="utf-8"))
+    data["13.2"] = {"torch": "9.9.9", "torchvision": None, "torchaudio": "9.9.9", "pip_tag": "cu132"}
+    data["13.6"] = {"torch": "9.9.8", "torchvision": "0.1", "torchaudio": None, "pip_tag": "cu136"}
+    data["11.08"] = {"torch": "dup", "torchvision": "dup", "torchaudio": "dup", "pip_tag": "dup"}
+    src = tmp_path / "versions.json"
+    src.write_text(json.dumps(data))
+
+    out = binmap.build(src)
+    assert out == tmp_path / "versions.bin"
+    index, ref = binmap.BinaryIndex(out), VersionIndex(data)
+    for q in QUERIES:
+        expected = ref.lookup(q)
+        got = index.lookup(q)
+        assert got == ({k: expected.get(k) for k in binmap.FIELDS} if expected else {}), q
+    assert index.data == {k: {f: v.get(f) for f in binmap.FIELDS} for k, v in data.items()}
+    index.lookup("13.2")["torch"] = "mutated"
+    assert index.lookup("13.2")["torch"] == "9.9.9"
+    # the interned string table stores "2.4.1" once even though several records use it
+    assert out.read_bytes().count(b"2.4.1") == 1
+
+
+def test_mapper_prefers_fresh_binary(tmp_path):
+    src = tmp_path / "versions.json"
+    shutil.copy(DEFAULT_DATA_PATH, src)
+    clear_index_cache()
+    try:
+        assert isinstance(get_index(str(src)), VersionIndex)
+        binmap.build(src)
+        clear_index_cache()
+        assert isinstance(get_index(str(src)), binmap.BinaryIndex)
+
+        # copied/extracted JSON: different mtime, same content -> still fresh
+        os.utime(src, ns=(1, 1))
+        clear_index_cache()
+        assert isinstance(get_index(str(src)), binmap.BinaryIndex)
+
+        # edited JSON -> stale binary is ignored
+        data = json.loads(src.read_text())
+        data["12.1"]["torch"] = "0.0.1"
+        src.write_text(json.dumps(data))
+        index = get_index(str(src))
+        assert isinstance(index, VersionIndex) and index.lookup("12.1")["torch"] == "0.0.1"
+
+        # shipped without its source
+        binmap.build(src)
+        src.unlink()
+        clear_index_cache()
+        assert get_index(str(src)).lookup("12.1")["torch"] == "0.0.1"
+    finally:
+        clear_index_cache()
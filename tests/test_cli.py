@@ -0,0 +1,29 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from core.cli import main
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_cli_formats(capsys):
+    assert main(["--cuda", "11.8", "--format", "pip"]) == 0
+    assert capsys.readouterr().out.strip().startswith("pip install torch==2.1.2+cu118")
+
+    assert main(["--cuda", "12.1", "--format", "json"]) == 0
+    data = json.loads(capsys.readouterr().out)
+    assert data["recommendation"]["pip_tag"] == "cu121"
+    assert data["source"] == "override"
+
+    assert main(["--cuda", "9.0"]) == 1
+
+
+def test_plain_lookup_stays_lazy():
+    code = (
+        "import sys; from core.cli import main; main(['--cuda', '11.8', '--format', 'pip']); "
+        "print(sorted(m for m in ('tkinter', 'subprocess', 'asyncio', 'core.detector') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout
+    assert out.strip().splitlines()[-1] == "[]"
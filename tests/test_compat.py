@@ -0,0 +1,91 @@
+import json
+
+import core.api as api
+import core.compat as compat
+import core.detector as detector
+
+
+def test_driver_runtime_and_tag_queries():
+    engine = compat.get_engine()
+    assert engine.max_runtime_for_driver("535.104.05", "linux") == "12.2"
+    assert engine.max_runtime_for_driver("530.30.02", "linux") == "12.1"
+    assert engine.max_runtime_for_driver("400.0", "linux") is None
+    assert engine.max_runtime_for_driver("551.61", "windows") == "12.4"
+
+    assert engine.tags_for_runtime("12.3") == ["cu120", "cu121"]
+    assert engine.tags_for_runtime("11.8") == ["cu111", "cu112", "cu113", "cu114", "cu115", "cu116", "cu117", "cu118"]
+    assert engine.tags_for_runtime("10.2") == ["cu102"]
+
+    # the newest mapped torch whose tag needs at most runtime 12.2
+    best = engine.best_build_for_driver("535.104.05", "linux")
+    assert (best["torch"], best["pip_tag"]) == ("2.4.1", "cu121")
+    best = engine.best_build_for_driver("520.61.05", "linux")
+    assert (best["torch"], best["pip_tag"]) == ("2.1.2", "cu118")
+
+
+def test_interval_index_stab():
+    idx = compat.IntervalIndex([((1, 0), (1, 5), "a"), ((1, 3), (2, 0), "b"), ((3, 0), (3, 0), "c")])
+    assert idx.stab((1, 2)) == ["a"]
+    assert sorted(idx.stab((1, 4))) == ["a", "b"]
+    assert idx.stab((2, 1)) == []
+    assert idx.stab((3, 0)) == ["c"]
+    assert idx.stab((0, 9)) == []
+
+
+def test_detect_and_prepare_driver_only(monkeypatch):
+    # keep the host's GPUs (and its detection cache) out of the build choice
+    monkeypatch.setattr(api, "get_compute_capabilities_cached", lambda: [])
+    monkeypatch.setattr(api, "get_cuda_version",
+                        lambda: {"source": "nvidia-smi", "version": None, "raw": "535.104.05\n535.104.05"})
+    res = api.detect_and_prepare()
+    assert res["driver_version"] == "535.104.05"
+    assert res["recommendation"]["pip_tag"] == "cu121"
+    assert res["install_command"].startswith("pip install torch==")
+
+    # the runtime limit NVML reports wins over the driver -> runtime table
+    monkeypatch.setattr(api, "get_cuda_version",
+                        lambda: {"source": "nvidia-smi", "version": None, "raw": "535.104.05", "max_cuda": "11.8"})
+    assert api.detect_and_prepare()["recommendation"]["pip_tag"] == "cu118"
+
+
+def test_arch_coverage_and_native_build_selection(tmp_path):
+    assert compat.arch_coverage(["7.5", "8.0", "9.0+PTX"], "8.6") == "native"   # sm_80 SASS runs on 8.6
+    assert compat.arch_coverage(["7.5", "8.0", "9.0+PTX"], "10.0") == "ptx"
+    assert compat.arch_coverage(["7.5", "8.0"], "9.0") is None
+    assert compat.arch_coverage(["sm_80", "compute_80"], "9.0") == "ptx"
+    assert compat.arch_coverage(["sm_80", "compute_80"], "8.0") == "native"
+
+    data = {
+        "12.1": {"torch": "2.3.0", "torchvision": "0.18.0", "torchaudio": "2.3.0", "pip_tag": "cu121",
+                 "arch_list": ["5.0", "8.0", "8.6+PTX"]},
+        "12.0": {"torch": "2.2.0", "torchvision": "0.17.0", "torchaudio": "2.2.0", "pip_tag": "cu120",
+                 "arch_list": ["8.0", "9.0"]},
+    }
+    path = tmp_path / "versions.json"
+    path.write_text(json.dumps(data))
+
+    # 12.1 would JIT on an H100; the cu120 build has SASS for both GPUs
+    rec, warnings = compat.select_build_for_gpus("12.1", ["8.0", "9.0"], versions_path=str(path))
+    assert (rec["torch"], rec["pip_tag"]) == ("2.2.0", "cu120")
+    assert warnings == ["switched from torch 2.3.0+cu121 to torch 2.2.0+cu120: "
+                        "the former has no native kernels for compute capability 9.0"]
+    rec, warnings = compat.select_build_for_gpus("12.1", ["8.6"], versions_path=str(path))
+    assert (rec["pip_tag"], warnings) == ("cu121", [])
+
+    rec, warnings = compat.select_build_for_gpus("12.1", ["10.0", "5.2", "3.5"], versions_path=str(path))
+    assert rec["pip_tag"] == "cu121"
+    assert "10.0" in warnings[0] and "PTX" in warnings[0]
+    assert "3.5" in warnings[1] and "5.2" not in " ".join(warnings)
+
+
+def test_detect_and_prepare_reports_jit_only_gpus(monkeypatch):
+    monkeypatch.setattr(api, "get_cuda_version", lambda: {"source": "nvcc", "version": "11.7", "raw": ""})
+    monkeypatch.setattr(api, "get_compute_capabilities_cached", lambda: ["9.0"])
+    res = api.detect_and_prepare()
+    assert res["compute_capabilities"] == ["9.0"]
+    assert res["recommendation"]["pip_tag"] == "cu117"
+    assert "JIT" in res["warnings"][0]
+
+    assert api.detect_and_prepare(cuda_override="11.8", compute_capabilities=["9.0"])["warnings"] == []
+    assert detector._parse_compute_caps("8.6\n9.0\n") == ["8.6", "9.0"]
+    assert detector._parse_compute_caps('Field "compute_cap" is not a valid field to query.\n') == []
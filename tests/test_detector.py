@@ -1,3 +1,4 @@
+import json
 import sys
 import types
 
@@ -42,3 +43,102 @@ def test_get_cuda_version_nvcc(monkeypatch):
     assert res["source"] == "nvcc"
     assert res["version"] == "11.7"
 
+
+
+def _py(code):
+    return [sys.executable, "-c", code]
+
+
+def test_concurrent_detection_respects_deadline(monkeypatch):
+    import time
+
+    monkeypatch.setattr(detector, "_probe_torch_static", lambda: None)
+    monkeypatch.setattr(detector, "NVCC_CMD", _py("import time; time.sleep(30)"))
+    monkeypatch.setattr(detector, "SMI_DRIVER_CMD", _py("print('535.104.05')"))
+
+    t0 = time.monotonic()
+    res = detector.get_cuda_version_concurrent(deadline=1.0)
+    assert time.monotonic() - t0 < 2.0
+    # nvcc never answered, so the lower-priority driver hint is used
+    assert res["source"] == "nvidia-smi"
+    assert res["raw"] == "535.104.05"
+
+
+def test_concurrent_detection_prefers_higher_priority(monkeypatch):
+    import asyncio
+
+    monkeypatch.setattr(detector, "_probe_torch_static", lambda: None)
+    monkeypatch.setattr(detector, "NVCC_CMD", _py("import time; time.sleep(0.2); print('release 12.1, V12.1.105')"))
+    monkeypatch.setattr(detector, "SMI_DRIVER_CMD", _py("print('535.104.05')"))
+
+    res = detector.get_cuda_version_concurrent(deadline=5.0)
+    assert res["source"] == "nvcc" and res["version"] == "12.1"
+
+    res = asyncio.run(detector.get_cuda_version_async(deadline=5.0))
+    assert res["source"] == "nvcc" and res["version"] == "12.1"
+
+
+def test_static_torch_probe_reads_version_file(monkeypatch, tmp_path):
+    pkg = tmp_path / "torch"
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text("raise RuntimeError('torch must not be imported')\n")
+    (pkg / "version.py").write_text("__version__ = '2.2.2+cu121'\ncuda: Optional[str] = '12.1'\n")
+    monkeypatch.delitem(sys.modules, "torch", raising=False)
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    res = detector.get_cuda_version()
+    assert res == {"source": "torch", "version": "12.1", "raw": "12.1"}
+    assert "torch" not in sys.modules
+
+
+def test_cached_detection_skips_probes_until_fingerprint_changes(monkeypatch, tmp_path):
+    monkeypatch.setenv("TORCHSEARCH_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("TORCHSEARCH_NO_CACHE", raising=False)
+    calls = []
+
+    def fake_get_cuda_version(timeout=2.0):
+        calls.append(timeout)
+        return {"source": "nvcc", "version": "12.1", "raw": "release 12.1"}
+
+    monkeypatch.setattr(detector, "get_cuda_version", fake_get_cuda_version)
+
+    assert detector.get_cuda_version_cached()["version"] == "12.1"
+    assert detector.get_cuda_version_cached()["version"] == "12.1"
+    assert len(calls) == 1
+    assert (tmp_path / "detect.json").exists()
+
+    detector.get_cuda_version_cached(refresh=True)
+    assert len(calls) == 2
+
+    monkeypatch.setenv("CUDA_HOME", str(tmp_path / "cuda-12.4"))
+    detector.get_cuda_version_cached()
+    assert len(calls) == 3
+
+    monkeypatch.setenv("TORCHSEARCH_NO_CACHE", "1")
+    detector.get_cuda_version_cached()
+    assert len(calls) == 4
+
+
+def test_cache_skips_failures_and_keeps_one_entry_per_probe(monkeypatch, tmp_path):
+    monkeypatch.setenv("TORCHSEARCH_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("TORCHSEARCH_NO_CACHE", raising=False)
+    results = [dict(detector._NOT_FOUND), {"source": "nvcc", "version": "12.1", "raw": ""},
+               {"source": "nvcc", "version": "12.4", "raw": ""}]
+    monkeypatch.setattr(detector, "get_cuda_version", lambda timeout=2.0: results.pop(0))
+
+    assert detector.get_cuda_version_cached()["version"] is None
+    assert detector.get_cuda_version_cached()["version"] == "12.1"   # the failure was not stored
+    monkeypatch.setenv("CUDA_HOME", str(tmp_path / "cuda-12.4"))
+    assert detector.get_cuda_version_cached()["version"] == "12.4"
+    keys = json.loads((tmp_path / "detect.json").read_text())
+    assert [k.split(":")[0] for k in keys] == ["cuda_version"]
+
+
+def test_fingerprint_ignores_non_site_packages_paths(monkeypatch, tmp_path):
+    stat = detector.os.stat
+    seen = []
+    monkeypatch.setattr(detector.os, "stat", lambda p, *a, **k: seen.append(p) or stat(p, *a, **k))
+    monkeypatch.setattr(detector.sys, "path", ["", str(tmp_path), str(tmp_path / "site-packages")])
+    detector.host_fingerprint()
+    assert str(tmp_path / "site-packages") in seen
+    assert "" not in seen and "." not in seen and str(tmp_path) not in seen
@@ -0,0 +1,98 @@
+import os
+import sys
+
+import core.executor as executor
+from conftest import FILES
+from core.executor import InstallExecutor, parse_pip_line
+
+FAKE_PIP = r'''
+import json, os, sys
+with open(os.environ["FAKE_PIP_LOG"], "a") as log:
+    log.write(json.dumps([sys.argv[0], sys.argv[1:]]) + "\n")
+if sys.argv[1] == "download":
+    print("Saved ./wheels/filelock-3.13.1-py3-none-any.whl")
+    sys.exit(0)
+print("Looking in links: ./wheels")
+print("Processing ./wheels/torch-2.3.1+cu121-cp311-cp311-linux_x86_64.whl")
+print("Installing collected packages: filelock, torch")
+if os.environ.get("FAKE_PIP_FAIL") and os.environ["FAKE_PIP_FAIL"] in sys.executable:
+    print("ERROR: Could not install packages due to an OSError")
+    sys.exit(1)
+print("Successfully installed filelock-3.13.1 torch-2.3.1+cu121")
+'''
+
+
+def _fake_pip(tmp_path, monkeypatch):
+    script = tmp_path / "fake_pip.py"
+    script.write_text(FAKE_PIP)
+    log = tmp_path / "pip.log"
+    monkeypatch.setattr(executor, "PIP_ARGS", [str(script)])
+    monkeypatch.setenv("FAKE_PIP_LOG", str(log))
+    return log
+
+
+def test_parse_pip_line():
+    assert parse_pip_line("Successfully installed a-1 b-2\n") == {"kind": "installed", "packages": ["a-1", "b-2"]}
+    assert parse_pip_line("Installing collected packages: a, b") == {"kind": "installing", "packages": ["a", "b"]}
+    assert parse_pip_line("Collecting torch==2.3.1 (from -r req.txt (line 1))")["requirement"] == "torch==2.3.1"
+    assert parse_pip_line("ERROR: boom")["message"] == "boom"
+    assert parse_pip_line("  Downloading x.whl (2 MB)") == {"kind": "output", "line": "  Downloading x.whl (2 MB)"}
+
+
+def test_offline_install_into_several_envs(tmp_path, monkeypatch):
+    log = _fake_pip(tmp_path, monkeypatch)
+    other = tmp_path / "envb" / "python"
+    other.parent.mkdir()
+    os.symlink(sys.executable, other)
+    monkeypatch.setenv("FAKE_PIP_FAIL", str(tmp_path / "envb"))
+    rec = {"torch": "2.3.1", "torchvision": None, "torchaudio": None, "pip_tag": "cu121"}
+    events = []
+
+    result = InstallExecutor(rec, [sys.executable, str(other)], tmp_path / "wheels", index_url=None,
+                             on_event=events.append).run()
+    assert result["ok"] is False
+    assert result["envs"][sys.executable] == {"returncode": 0, "installed": ["filelock-3.13.1", "torch-2.3.1+cu121"], "errors": []}
+    assert result["envs"][str(other)]["errors"] == ["Could not install packages due to an OSError"]
+    assert set(result["timings"]) == {"install", "install_per_env"}
+    assert log.read_text().count('"--no-index"') == 2
+    assert {(e["env"], e["kind"]) for e in events if e["phase"] == "install"} >= {
+        (sys.executable, "processing"), (sys.executable, "installed"), (str(other), "error"), (str(other), "exit")}
+
+
+def test_full_pipeline(wheel_server, tmp_path, monkeypatch):
+    monkeypatch.setenv("TORCHSEARCH_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(executor, "target_tags", lambda python: ("cp311", "linux_x86_64"))
+    log = _fake_pip(tmp_path, monkeypatch)
+    url, _ = wheel_server
+    rec = {"torch": "2.3.1", "torchvision": "0.18.1", "torchaudio": "2.3.1", "pip_tag": "cu121"}
+
+    result = InstallExecutor(rec, [sys.executable], tmp_path / "wheels", index_url=url).run()
+    assert result["ok"], result
+    assert sorted(os.listdir(tmp_path / "wheels")) == sorted(FILES)
+    assert set(result["timings"]) == {"probe", "resolve", "download", "install", "install_per_env"}
+    calls = log.read_text().splitlines()
+    assert '"download"' in calls[0] and f"{url}/cu121" in calls[0] and '"install"' in calls[1]
+
+
+def test_store_mode_links_large_wheels_before_pip(tmp_path, monkeypatch):
+    import zipfile
+
+    monkeypatch.setenv("TORCHSEARCH_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(executor, "target_tags", lambda python: ("cp311", "linux_x86_64"))
+    monkeypatch.setattr(executor, "target_scheme", lambda python: {
+        k: str(tmp_path / "env" / k) for k in ("purelib", "platlib", "scripts", "data", "include")})
+    _fake_pip(tmp_path, monkeypatch)
+    house = tmp_path / "wheels"
+    house.mkdir()
+    for name, version in (("torch", "2.3.1+cu121"), ("nvidia_cublas_cu12", "12.1.3.1"), ("nvidia_cublas_cu12", "12.1.0.26")):
+        tag = "cp311-cp311-linux_x86_64" if name == "torch" else "py3-none-manylinux1_x86_64"
+        with zipfile.ZipFile(house / f"{name}-{version}-{tag}.whl", "w") as zf:
+            zf.writestr(f"{name}/__init__.py", "")
+            zf.writestr(f"{name}-{version}.dist-info/WHEEL", "Root-Is-Purelib: false\n")
+    rec = {"torch": "2.3.1", "torchvision": None, "torchaudio": None, "pip_tag": "cu121"}
+
+    result = InstallExecutor(rec, [sys.executable], house, index_url=None, mode="store").run()
+    assert result["ok"], result
+    linked = {(r["name"], r["version"]) for r in result["linked"][sys.executable]}
+    assert linked == {("torch", "2.3.1"), ("nvidia-cublas-cu12", "12.1.3.1")}
+    assert (tmp_path / "env" / "platlib" / "torch-2.3.1+cu121.dist-info" / "RECORD").exists()
@@ -0,0 +1,65 @@
+import io
+import json
+import tarfile
+
+import core.fleet as fleet
+
+NVCC = "nvcc: NVIDIA (R) Cuda compiler driver\nCuda compilation tools, release 11.8, V11.8.89\n"
+SMI = (
+    "| NVIDIA-SMI 535.104.05   Driver Version: 535.104.05   CUDA Version: 12.2     |\n"
+    "|   0  NVIDIA A100-SXM4-80GB          On  | 00000000:07:00.0 Off |        0 |\n"
+    "|   1  NVIDIA A100-SXM4-80GB          On  | 00000000:0F:00.0 Off |        0 |\n"
+)
+
+
+def _make_dumps(root):
+    (root / "rack1").mkdir()
+    (root / "rack1" / "node-a.txt").write_text(NVCC + SMI)
+    (root / "node-b.txt").write_text(SMI)
+    (root / "node-c.txt").write_text("nvidia-smi: command not found\n")
+
+
+def test_analyze_fleet_directory_streams_rows(tmp_path):
+    _make_dumps(tmp_path)
+    rows = {r["host"]: r for r in fleet.analyze_fleet(str(tmp_path), workers=2, batch_size=1)}
+
+    assert set(rows) == {"rack1/node-a", "node-b", "node-c"}
+    a = rows["rack1/node-a"]
+    assert (a["source"], a["cuda_version"], a["pip_tag"]) == ("nvcc", "11.8", "cu118")
+    assert a["driver_version"] == "535.104.05" and a["gpu_count"] == 2
+    b = rows["node-b"]
+    assert (b["source"], b["cuda_version"]) == ("nvidia-smi", "12.2")
+    assert b["install_command"].startswith("pip install torch==")
+    assert rows["node-c"]["error"]
+
+
+def test_analyze_fleet_tarball_to_jsonl(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    _make_dumps(src)
+    tar_path = tmp_path / "dumps.tar.gz"
+    with tarfile.open(tar_path, "w:gz") as tar:
+        tar.add(src, arcname="dumps")
+
+    out = io.StringIO()
+    n = fleet.write_report(fleet.analyze_fleet(str(tar_path), workers=0), out, fmt="jsonl")
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert n == 3 == len(rows)
+    assert {r["host"] for r in rows} == {"dumps/rack1/node-a", "dumps/node-b", "dumps/node-c"}
+
+
+def test_host_name_keeps_dots_in_host_names():
+    assert fleet._host_name("rack1/node-7.example.com.txt") == "rack1/node-7.example.com"
+    assert fleet._host_name("gpu01.cluster.OUT") == "gpu01.cluster"
+    assert fleet._host_name("10.0.0.12") == "10.0.0.12"
+    assert fleet._host_name("node-b.json") == "node-b"
+
+
+def test_driver_only_dump_matches_single_host_choice():
+    old = "| NVIDIA-SMI 418.87.00   Driver Version: 418.87.00   CUDA Version: 10.1     |\n"
+    # the nearest mapped minor (10.2) needs a newer driver than this host has
+    row = fleet.analyze_dump("old", old)
+    assert row["pip_tag"] is None and row["error"]
+    row = fleet.analyze_dump("new", SMI.replace("12.2", "13.0"))
+    assert (row["cuda_version"], row["pip_tag"]) == ("13.0", "cu121")
+    assert fleet.analyze_dump("bare", "Driver Version: 535.104.05\n")["cuda_version"] == "12.2"
@@ -0,0 +1,40 @@
+import sys
+import time
+
+from core.gpu_monitor import GpuMonitor, monitor_command, parse_sample
+
+FAKE_SMI = (
+    "import sys, time\n"
+    "for i in range(3):\n"
+    "    print(f'0, NVIDIA A100, 81920, {1000 + i}, {10 * i}', flush=True)\n"
+    "    print(f'1, NVIDIA A100, 81920, 500, 0', flush=True)\n"
+    "    time.sleep(0.02)\n"
+    "time.sleep(30)\n"
+)
+
+
+def test_parse_and_command():
+    s = parse_sample("3, NVIDIA H100 80GB HBM3, 81559, 12, 7\n", timestamp=1.0)
+    assert (s.index, s.name, s.memory_used, s.utilization) == (3, "NVIDIA H100 80GB HBM3", "12", "7")
+    assert parse_sample("index, name, memory.total [MiB]") is None
+    assert monitor_command(1.0)[-2:] == ["-l", "1"]
+    assert monitor_command(0.25)[-2:] == ["-lms", "250"]
+
+
+def test_monitor_streams_samples_and_stops_child():
+    mon = GpuMonitor(history=2, command=[sys.executable, "-c", FAKE_SMI]).start()
+    try:
+        deadline = time.time() + 5
+        while mon.seq < 6 and time.time() < deadline:
+            time.sleep(0.01)
+        assert mon.seq == 6
+        lines = mon.format_lines()
+        assert lines[0] == "GPU0: NVIDIA A100, mem 81920 MiB used 1002 MiB, util 20 %"
+        assert len(lines) == 2
+        # ring buffer keeps only the newest samples
+        assert [s.memory_used for s in mon.history(0)] == ["1001", "1002"]
+        proc = mon._proc
+    finally:
+        mon.stop()
+    assert proc.poll() is not None
+    assert not mon.running
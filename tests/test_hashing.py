@@ -0,0 +1,60 @@
+import hashlib
+
+import pytest
+
+import core.hashing as hashing
+from core.installer import LockfileError, generate_lockfile
+
+
+def test_hash_files_streams_and_caches(tmp_path, monkeypatch):
+    monkeypatch.setenv("TORCHSEARCH_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.delenv("TORCHSEARCH_NO_CACHE", raising=False)
+    big = tmp_path / "big.bin"
+    big.write_bytes(b"x" * (3 * 1024 * 1024 + 17))
+    empty = tmp_path / "empty.bin"
+    empty.write_bytes(b"")
+
+    assert hashing.sha256_file(big, chunk_size=1024 * 1024) == hashlib.sha256(big.read_bytes()).hexdigest()
+    digests = hashing.hash_files([big, empty])
+    assert digests[str(empty)] == hashlib.sha256(b"").hexdigest()
+
+    calls = []
+    monkeypatch.setattr(hashing, "sha256_file", lambda p: calls.append(p) or "0" * 64)
+    assert hashing.hash_files([big, empty]) == digests
+    assert calls == []
+    # a changed file is a cache miss
+    empty.write_bytes(b"now with data")
+    hashing.hash_files([big, empty])
+    assert calls == [str(empty)]
+    # the superseded entry for empty.bin is dropped, and the cache stays bounded
+    assert [k for k in hashing.digest_cache()._load() if str(empty) in k] == [hashing._cache_key(str(empty), empty.stat())]
+    monkeypatch.setattr(hashing, "MAX_CACHED_DIGESTS", 1)
+    empty.write_bytes(b"changed again")
+    hashing.hash_files([empty])
+    assert len(hashing.digest_cache()._load()) == 1
+
+
+def test_generate_lockfile(tmp_path, monkeypatch):
+    monkeypatch.setenv("TORCHSEARCH_NO_CACHE", "1")
+    house = tmp_path / "wheels"
+    house.mkdir()
+    for name in (
+        "torch-2.4.1+cu121-cp311-cp311-linux_x86_64.whl",
+        "torch-2.4.1+cu121-cp312-cp312-linux_x86_64.whl",
+        "torch-2.4.1+cu118-cp311-cp311-linux_x86_64.whl",
+        "torchvision-0.19.1+cu121-cp311-cp311-linux_x86_64.whl",
+        "torchaudio-2.4.1+cu121-cp311-cp311-linux_x86_64.whl",
+    ):
+        (house / name).write_bytes(name.encode())
+    rec = {"torch": "2.4.1", "torchvision": "0.19.1", "torchaudio": "2.4.1", "pip_tag": "cu121"}
+
+    text = generate_lockfile(rec, house)
+    torch_hashes = sorted(hashlib.sha256(n.encode()).hexdigest() for n in (
+        "torch-2.4.1+cu121-cp311-cp311-linux_x86_64.whl", "torch-2.4.1+cu121-cp312-cp312-linux_x86_64.whl"))
+    assert "torch==2.4.1+cu121 \\\n" + "".join(f"    --hash=sha256:{h} \\\n" for h in torch_hashes[:-1]) in text
+    assert text.count("--hash=sha256:") == 4
+    assert "--extra-index-url https://download.pytorch.org/whl/cu121" in text
+    assert "pip install --no-deps --require-hashes -r" in text
+
+    with pytest.raises(LockfileError, match="torchaudio==9.9"):
+        generate_lockfile(dict(rec, torchaudio="9.9"), house)
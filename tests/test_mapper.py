@@ -19,3 +19,32 @@ def test_load_versions_and_get_recommendation(tmp_path):
     rec2 = mapper.get_recommendations("11.7", versions_data=loaded)
     assert rec2.get("torch") == "2.2.0" or rec2.get("torch") == "1.9.0"
 
+
+def test_index_nearest_minor_and_reload(tmp_path):
+    data = {
+        "12.1": {"torch": "2.2.2", "pip_tag": "cu121"},
+        "12.4": {"torch": "2.3.1", "pip_tag": "cu121"},
+        "cpu": {"torch": "2.4.1", "pip_tag": None},
+    }
+    p = tmp_path / "versions.json"
+    p.write_text(__import__('json').dumps(data))
+
+    index = mapper.get_index(str(p))
+    assert mapper.get_index(str(p)) is index
+    assert index.lookup("12.1.105")["torch"] == "2.2.2"
+    assert index.lookup("12.2")["torch"] == "2.2.2"
+    assert index.lookup("12.3")["torch"] == "2.3.1"
+    assert index.lookup("12.9")["torch"] == "2.3.1"
+    assert index.lookup("11.8") == {}
+    assert index.lookup(None) == {}
+
+    # lookups hand out copies: changing one does not leak into the shared index
+    rec = index.lookup("12.1")
+    rec.update(torch="0.0.0", warnings=["x"])
+    assert index.lookup("12.1") == {"torch": "2.2.2", "pip_tag": "cu121"}
+
+    # rewriting the file with a different size invalidates the cached index
+    data["12.9"] = {"torch": "9.9.9", "pip_tag": "cu129"}
+    p.write_text(__import__('json').dumps(data))
+    assert mapper.get_index(str(p)) is not index
+    assert mapper.get_index(str(p)).lookup("12.9")["torch"] == "9.9.9"
@@ -0,0 +1,47 @@
+import io
+import json
+
+import core.api as api
+import core.detector as detector
+from core import metrics
+from core.mapper import clear_index_cache
+
+
+def test_noop_span_without_sinks():
+    metrics.clear_sinks()
+    assert metrics.span("x", a=1) is metrics.span("y")
+    with metrics.span("x") as s:
+        s.fail()
+
+
+def test_detect_and_prepare_emits_stage_spans(tmp_path, monkeypatch):
+    monkeypatch.setattr(detector, "_probe_torch_static", lambda: None)
+    monkeypatch.setattr(detector, "_run_cmd", lambda cmd, timeout=2.0:
+                        "Cuda compilation tools, release 12.1, V12.1.105" if cmd is detector.NVCC_CMD else "")
+    monkeypatch.setattr(api, "get_compute_capabilities_cached", lambda: [])
+    events = []
+    log = io.StringIO()
+    prom = metrics.PrometheusSink(str(tmp_path / "metrics.prom"))
+    for sink in (events.append, metrics.JsonLogSink(log), prom):
+        metrics.add_sink(sink)
+    try:
+        clear_index_cache()
+        res = api.detect_and_prepare()
+        api.detect_and_prepare(cuda_override="9.0")
+    finally:
+        metrics.clear_sinks()
+    assert res["recommendation"]["pip_tag"] == "cu121"
+
+    names = [(e["name"], e["labels"].get("strategy"), e["status"]) for e in events]
+    assert names[:2] == [("detect", "torch", "failure"), ("detect", "nvcc", "success")]
+    assert ("load_versions", None, "success") in names and ("command", None, "success") in names
+    assert ("map", None, "failure") in names  # 9.0 has no mapping
+    assert names[-1][0] == "detect_and_prepare"
+    assert [json.loads(line)["name"] for line in log.getvalue().splitlines()] == [e["name"] for e in events]
+
+    prom.flush()
+    text = (tmp_path / "metrics.prom").read_text()
+    assert 'torchsearch_detect_total{strategy="nvcc",result="success"} 1' in text
+    assert 'torchsearch_detect_total{strategy="torch",result="failure"} 1' in text
+    assert 'torchsearch_stage_duration_seconds_count{stage="detect_and_prepare"} 2' in text
+    assert 'torchsearch_stage_duration_seconds_bucket{stage="map",le="+Inf"} 2' in text
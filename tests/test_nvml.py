@@ -0,0 +1,116 @@
+import time
+
+import core.detector as detector
+from core import nvml
+
+
+class FakeNvmlLib:
+    """Stands in for ctypes.CDLL("libnvidia-ml.so.1"): same symbols, writes results through byref()."""
+
+    GPUS = [("NVIDIA A100-SXM4-80GB", 81920, 1234, 12, (8, 0)), ("NVIDIA H100 80GB HBM3", 81559, 0, None, (9, 0))]
+
+    def __init__(self):
+        self.calls = {}
+
+    def __getattr__(self, name):
+        fn = getattr(type(self), "_" + name, None)
+        if fn is None:
+            raise AttributeError(name)
+
+        def call(*args):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return fn(self, *args)
+        return call
+
+    def _nvmlInit_v2(self):
+        return 0
+
+    def _nvmlShutdown(self):
+        return 0
+
+    def _nvmlSystemGetDriverVersion(self, buf, size):
+        buf.value = b"535.104.05"
+        return 0
+
+    def _nvmlSystemGetCudaDriverVersion_v2(self, out):
+        out._obj.value = 12020
+        return 0
+
+    def _nvmlDeviceGetCount_v2(self, out):
+        out._obj.value = len(self.GPUS)
+        return 0
+
+    def _nvmlDeviceGetHandleByIndex_v2(self, index, out):
+        out._obj.value = 0x1000 + index.value
+        return 0
+
+    def _gpu(self, handle):
+        return self.GPUS[handle.value - 0x1000]
+
+    def _nvmlDeviceGetName(self, handle, buf, size):
+        buf.value = self._gpu(handle)[0].encode()
+        return 0
+
+    def _nvmlDeviceGetMemoryInfo(self, handle, out):
+        _, total, used, _, _ = self._gpu(handle)
+        out._obj.total, out._obj.used = total << 20, used << 20
+        return 0
+
+    def _nvmlDeviceGetUtilizationRates(self, handle, out):
+        util = self._gpu(handle)[3]
+        if util is None:
+            return nvml.NVML_ERROR_NOT_SUPPORTED
+        out._obj.gpu = util
+        return 0
+
+    def _nvmlDeviceGetCudaComputeCapability(self, handle, major, minor):
+        major._obj.value, minor._obj.value = self._gpu(handle)[4]
+        return 0
+
+
+def test_nvml_queries_through_fake_library(monkeypatch):
+    lib = FakeNvmlLib()
+    monkeypatch.setattr(nvml, "_load_library", lambda: lib)
+    monkeypatch.delitem(nvml._STATE, "nvml")
+    nv = nvml.get_nvml()
+    assert nv is not None and nvml.get_nvml() is nv
+    assert (nv.driver_version(), nv.cuda_driver_version()) == ("535.104.05", "12.2")
+    assert nv.devices() == [nvml.GpuInfo(0, "NVIDIA A100-SXM4-80GB", 81920, 1234, 12, "8.0"),
+                            nvml.GpuInfo(1, "NVIDIA H100 80GB HBM3", 81559, 0, None, "9.0")]
+
+    # detector answers from NVML without spawning nvidia-smi
+    monkeypatch.setattr(detector, "_run_cmd", lambda *a, **k: (_ for _ in ()).throw(AssertionError("spawned")))
+    assert detector.get_gpu_status().splitlines() == [
+        "GPU0: NVIDIA A100-SXM4-80GB, mem 81920 MiB used 1234 MiB, util 12 %",
+        "GPU1: NVIDIA H100 80GB HBM3, mem 81559 MiB used 0 MiB, util N/A %",
+    ]
+    assert detector.get_compute_capabilities() == ["8.0", "9.0"]
+    monkeypatch.setattr(detector, "_probe_torch_static", lambda: None)
+    monkeypatch.setattr(detector, "NVCC_CMD", ["nvcc-does-not-exist"])
+    monkeypatch.setattr(detector, "_run_cmd", lambda cmd, timeout=2.0: "")
+    assert detector.get_cuda_version() == {"source": "nvidia-smi", "version": None, "raw": "535.104.05\n535.104.05",
+                                              "max_cuda": "12.2"}
+
+    # warm queries only touch the live counters
+    assert lib.calls["nvmlDeviceGetName"] == 2 and lib.calls["nvmlInit_v2"] == 1
+    t0 = time.perf_counter()
+    for _ in range(100):
+        nv.devices()
+    assert (time.perf_counter() - t0) / 100 < 0.005
+    assert lib.calls["nvmlDeviceGetName"] == 2
+
+
+def test_missing_library_falls_back_to_nvidia_smi(monkeypatch):
+    def missing():
+        raise OSError("libnvidia-ml.so.1: cannot open shared object file")
+
+    monkeypatch.setattr(nvml, "_load_library", missing)
+    monkeypatch.delitem(nvml._STATE, "nvml")
+    assert nvml.get_nvml() is None
+    monkeypatch.setattr(detector, "_run_cmd", lambda cmd, timeout=2.0: "NVIDIA T4, 15360, 5, 0\n" if cmd is detector.GPU_QUERY_CMD else "")
+    assert detector.get_gpu_status() == "GPU0: NVIDIA T4, mem 15360 MiB used 5 MiB, util 0 %"
+
+    monkeypatch.setenv("TORCHSEARCH_NO_NVML", "1")
+    monkeypatch.setattr(nvml, "_load_library", lambda: FakeNvmlLib())
+    nvml.reset()
+    assert nvml.get_nvml() is None
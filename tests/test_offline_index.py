@@ -0,0 +1,76 @@
+import json
+import os
+import time
+
+from core.offline_index import OfflineIndex, sortable_version
+
+
+def _touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"")
+
+
+def test_ingest_query_and_incremental_reingest(tmp_path):
+    mirror = tmp_path / "whl"
+    plat = "manylinux_2_17_x86_64.manylinux2014_x86_64"
+    for name in (
+        f"torch-2.2.2+cu121-cp311-cp311-{plat}.whl",
+        f"torch-2.3.1+cu121-cp311-cp311-{plat}.whl",
+        "torch-2.3.1+cu121-cp311-cp311-win_amd64.whl",
+        f"torch-2.4.0+cu121-cp312-cp312-{plat}.whl",
+        "torch-2.3.1+cu118-cp311-cp311-linux_x86_64.whl",
+    ):
+        _touch(mirror / "cu121" / "torch" / name)
+    _touch(mirror / "cu121" / "torchaudio" / f"torchaudio-2.3.1+cu121-cp311-cp311-{plat}.whl")
+    # a mirrored page that only lists the file
+    vision = mirror / "cu121" / "torchvision"
+    vision.mkdir(parents=True)
+    (vision / "index.html").write_text(
+        '<a href="https://example.invalid/torchvision-0.18.1%2Bcu121-cp311-cp311-linux_x86_64.whl">'
+        "torchvision-0.18.1+cu121-cp311-cp311-linux_x86_64.whl</a>"
+    )
+
+    with OfflineIndex(str(tmp_path / "idx.sqlite")) as idx:
+        stats = idx.ingest(str(mirror))
+        assert stats["changed"] == stats["dirs"] == 5
+
+        rec = idx.newest_triple("cu121", "cp311", "linux_x86_64")
+        assert rec == {"torch": "2.3.1", "torchvision": "0.18.1", "torchaudio": "2.3.1", "pip_tag": "cu121"}
+        assert idx.newest("torch", "cu121", "cp312", "linux_x86_64")["version"] == "2.4.0"
+        assert idx.newest("torch", "cu121", "cp311", "linux_aarch64") is None
+
+        # nothing changed: no directory is re-parsed
+        assert idx.ingest(str(mirror))["changed"] == 0
+
+        new = mirror / "cu121" / "torch" / f"torch-2.10.0+cu121-cp311-cp311-{plat}.whl"
+        _touch(new)
+        future = time.time_ns() + 10**9
+        os.utime(new.parent, ns=(future, future))
+        stats = idx.ingest(str(mirror))
+        assert stats["changed"] == 1
+        assert idx.newest("torch", "cu121", "cp311", "linux_x86_64")["version"] == "2.10.0"
+        # no torchvision 0.25.x / torchaudio 2.10.x in the index: the triple stays on a pairing pip can install
+        assert idx.newest_triple("cu121", "cp311", "linux_x86_64")["torch"] == "2.3.1"
+        assert idx.newest_triple("cu118", "cp311", "linux_x86_64") is None
+
+
+def test_newest_triple_pairs_from_the_index(tmp_path):
+    mirror = tmp_path / "whl"
+    for name in ("torch-2.5.1", "torchvision-0.20.1", "torchvision-0.20.0", "torchvision-0.21.0", "torchaudio-2.5.1",
+                 "torch-3.0.0", "torchvision-1.0.0", "torchaudio-3.0.0"):
+        _touch(mirror / "cu124" / (name + "+cu124-cp311-cp311-linux_x86_64.whl"))
+    versions = tmp_path / "versions.json"
+    with OfflineIndex(str(tmp_path / "idx.sqlite")) as idx:
+        idx.ingest(str(mirror))
+        # 3.0.0 is outside the known release scheme and unmapped; 2.5.1 is paired by series, not by versions.json
+        versions.write_text(json.dumps({"12.4": {"torch": "2.4.1", "torchvision": "0.19.1", "torchaudio": "2.4.1", "pip_tag": "cu124"}}))
+        assert idx.newest_triple("cu124", "cp311", "linux_x86_64", versions_path=str(versions)) == {
+            "torch": "2.5.1", "torchvision": "0.20.1", "torchaudio": "2.5.1", "pip_tag": "cu124"}
+        # once the mapping knows the 3.0.0 pairing it is used
+        versions.write_text(json.dumps({"12.4": {"torch": "3.0.0", "torchvision": "1.0.0", "torchaudio": "3.0.0", "pip_tag": "cu124"}}))
+        assert idx.newest_triple("cu124", "cp311", "linux_x86_64", versions_path=str(versions))["torch"] == "3.0.0"
+
+
+def test_sortable_version_orders_like_versions():
+    versions = ["2.10.0", "2.9.1", "2.9.1rc1", "2.9", "0.18.1", "2.9.1.post1"]
+    assert sorted(versions, key=sortable_version) == ["0.18.1", "2.9", "2.9.1rc1", "2.9.1", "2.9.1.post1", "2.10.0"]
@@ -0,0 +1,56 @@
+import pytest
+
+from conftest import CUBLAS, FILES, METADATA, TORCH, VISION
+from core.prefetch import PrefetchError, TokenBucket, pinned_requirements, prefetch
+
+
+def test_prefetch_resolves_deps_and_resumes(wheel_server, tmp_path, monkeypatch):
+    monkeypatch.setenv("TORCHSEARCH_CACHE_DIR", str(tmp_path / "cache"))
+    url, ranges = wheel_server
+    dest = tmp_path / "wheels"
+    dest.mkdir()
+    (dest / (TORCH + ".part")).write_bytes(FILES[TORCH][:10000])
+    rec = {"torch": "2.3.1", "torchvision": "0.18.1", "torchaudio": "2.3.1", "pip_tag": "cu121"}
+    events = []
+
+    result = prefetch(rec, dest, url, "cp311", "linux_x86_64", per_host=2, progress=events.append)
+    assert sorted(p.rsplit("/", 1)[-1] for p in result["files"]) == sorted(FILES)
+    for name, body in FILES.items():
+        assert (dest / name).read_bytes() == body
+    assert (TORCH, "bytes=10000-") in ranges
+    assert result["resumed_bytes"] == 10000
+    assert result["bytes"] == sum(map(len, FILES.values())) - 10000
+    assert {e["filename"] for e in events if e["status"] == "done"} == set(FILES)
+
+    # a second run finds everything in place
+    ranges.clear()
+    assert prefetch(rec, dest, url, "cp311", "linux_x86_64")["bytes"] == 0
+    assert ranges == []
+
+
+def test_prefetch_rejects_corrupt_part_and_missing_wheels(wheel_server, tmp_path, monkeypatch):
+    monkeypatch.setenv("TORCHSEARCH_CACHE_DIR", str(tmp_path / "cache"))
+    url, _ = wheel_server
+    dest = tmp_path / "wheels"
+    dest.mkdir()
+    (dest / (VISION + ".part")).write_bytes(b"garbage")
+    rec = {"torch": None, "torchvision": "0.18.1", "torchaudio": None, "pip_tag": "cu121"}
+    with pytest.raises(PrefetchError, match="sha256 mismatch"):
+        prefetch(rec, dest, url, "cp311", "linux_x86_64")
+    assert not (dest / (VISION + ".part")).exists()
+    assert prefetch(rec, dest, url, "cp311", "linux_x86_64")["bytes"] == len(FILES[VISION])
+
+    with pytest.raises(PrefetchError, match="torch==9.9"):
+        prefetch(dict(rec, torch="9.9"), dest, url, "cp311", "linux_x86_64")
+
+
+def test_pinned_requirements_and_token_bucket(monkeypatch):
+    assert pinned_requirements(METADATA, "cp311", "linux_x86_64") == [("nvidia-cublas-cu12", "12.1.3.1")]
+    assert pinned_requirements(METADATA, "cp311", "win_amd64") == [("nvidia-nccl-cu12", "2.20.5")]
+
+    sleeps = []
+    monkeypatch.setattr("core.prefetch.time.sleep", sleeps.append)
+    bucket = TokenBucket(rate=1000, burst=1000)
+    bucket.consume(1000)
+    bucket.consume(500)
+    assert len(sleeps) == 1 and 0.4 < sleeps[0] <= 0.5
@@ -0,0 +1,72 @@
+import json
+import os
+import time
+
+import pytest
+
+from core.mapper import clear_index_cache, get_index
+from core.reload import VersionsWatcher, validate_versions
+from core.server import RecommendationServer
+
+
+def _write(path, torch_version):
+    data = {"12.1": {"torch": torch_version, "torchvision": "0.19.1", "torchaudio": "2.4.1", "pip_tag": "cu121"}}
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+def _wait(cond, timeout=3.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_watcher_swaps_valid_data_and_keeps_old_on_error(tmp_path, use_inotify):
+    path = tmp_path / "versions.json"
+    _write(path, "2.4.0")
+    errors = []
+    clear_index_cache()
+    watcher = VersionsWatcher(str(path), interval=0.02, on_error=errors.append, use_inotify=use_inotify).start()
+    try:
+        if use_inotify and watcher.backend != "inotify":
+            pytest.skip("inotify not available")
+        assert get_index(str(path)).lookup("12.1")["torch"] == "2.4.0"
+
+        _write(path, "2.4.1")
+        assert _wait(lambda: watcher.generation == 2)
+        assert get_index(str(path)).lookup("12.1")["torch"] == "2.4.1"
+
+        path.write_text('{"12.1": {"torch": ')   # truncated write
+        assert _wait(lambda: errors)
+        assert get_index(str(path)).lookup("12.1")["torch"] == "2.4.1"
+
+        _write(path, "2.5.0")
+        assert _wait(lambda: watcher.generation == 3)
+        assert get_index(str(path)) is watcher.index
+    finally:
+        watcher.stop()
+        clear_index_cache()
+
+
+def test_validate_and_server_watch(tmp_path):
+    with pytest.raises(ValueError):
+        validate_versions({"12.1": {"torchvision": "0.19.1"}})
+    with pytest.raises(ValueError):
+        validate_versions({"foo": {"torch": "2.4.1"}})
+
+    path = tmp_path / "versions.json"
+    _write(path, "2.4.0")
+    server = RecommendationServer(str(path), watch=True)
+    try:
+        server.watcher.interval = 0.02
+        assert json.loads(server.recommend("12.1")[1])["recommendation"]["torch"] == "2.4.0"
+        _write(path, "2.4.1")
+        assert _wait(lambda: json.loads(server.recommend("12.1")[1])["recommendation"]["torch"] == "2.4.1")
+    finally:
+        server.close()
+        clear_index_cache()
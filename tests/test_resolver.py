@@ -0,0 +1,118 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.resolver import WheelResolver
+from core.wheels import parse_wheel_filename, is_compatible, version_key
+
+PLAT = "manylinux_2_17_x86_64.manylinux2014_x86_64"
+
+
+def _json_page(project, files):
+    return json.dumps({
+        "meta": {"api-version": "1.0"},
+        "name": project,
+        "files": [{"filename": f, "url": f"/files/{f}", "hashes": {"sha256": "0" * 64}} for f in files],
+    }).encode()
+
+
+def _html_page(files):
+    links = "".join(f'<a href="/files/{f.replace("+", "%2B")}#sha256={"1" * 64}">{f}</a><br/>' for f in files)
+    return f"<!DOCTYPE html><html><body>{links}</body></html>".encode()
+
+
+PAGES = {
+    "/whl/cu121/torch/": ("json", _json_page("torch", [
+        "torch-2.2.2+cu121-cp311-cp311-linux_x86_64.whl",
+        "torch-2.3.1+cu121-cp311-cp311-linux_x86_64.whl",
+        "torch-2.3.1+cu121-cp312-cp312-linux_x86_64.whl",
+    ])),
+    "/whl/cu121/torchvision/": ("html", _html_page([
+        f"torchvision-0.17.2+cu121-cp311-cp311-{PLAT}.whl",
+        "torchvision-0.18.1+cu121-cp311-cp311-linux_x86_64.whl",
+    ])),
+    "/whl/cu121/torchaudio/": ("json", _json_page("torchaudio", [
+        "torchaudio-2.3.1+cu121-cp311-cp311-linux_x86_64.whl",
+    ])),
+}
+
+
+@pytest.fixture
+def index_server():
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            hits.append((self.path, self.headers.get("If-None-Match")))
+            kind, body = PAGES.get(self.path, (None, b""))
+            etag = f'"{hash(body)}"'
+            if kind is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/vnd.pypi.simple.v1+json" if kind == "json" else "text/html")
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/whl", hits
+    server.shutdown()
+    server.server_close()
+
+
+def test_wheel_helpers():
+    w = parse_wheel_filename("torch-2.2.2%2Bcu121-cp311-cp311-manylinux_2_17_x86_64.manylinux2014_x86_64.whl")
+    assert (w.name, w.version, w.local, w.python) == ("torch", "2.2.2", "cu121", "cp311")
+    assert is_compatible(w, "cp311", "linux_x86_64")
+    assert not is_compatible(w, "cp312", "linux_x86_64")
+    assert not is_compatible(w, "cp311", "win_amd64")
+    assert version_key("2.10.0") > version_key("2.9.1") > version_key("2.9.1rc1")
+
+
+def test_verify_and_correct_against_local_index(index_server, tmp_path):
+    url, hits = index_server
+    resolver = WheelResolver(index_url=url, cache_dir=tmp_path, max_age=0)
+    rec = {"torch": "2.3.1", "torchvision": "0.18.1", "torchaudio": "2.3.1", "pip_tag": "cu121"}
+    res = resolver.verify(rec, python_tag="cp311", platform="linux_x86_64")
+    assert res["ok"] and not res["corrected"]
+    assert res["packages"]["torchvision"]["files"] == ["torchvision-0.18.1+cu121-cp311-cp311-linux_x86_64.whl"]
+
+    # 2.2.2's torchaudio is missing from the fixture index; the newest complete cu121 triple in the mapping is 2.3.1
+    res = resolver.verify({**rec, "torch": "2.2.2", "torchvision": "0.17.2", "torchaudio": "2.2.2"},
+                          python_tag="cp311", platform="linux_x86_64")
+    assert not res["ok"] and not res["packages"]["torchaudio"]["available"]
+    assert res["corrected"] and res["recommendation"]["torch"] == "2.3.1"
+
+    # the fallback comes from the caller's versions.json, not the bundled one
+    versions = tmp_path / "versions.json"
+    versions.write_text(json.dumps({"12.1": {"torch": "2.2.2", "torchvision": "0.17.2", "torchaudio": "2.2.2", "pip_tag": "cu121"}}))
+    res = resolver.verify({**rec, "torch": "2.2.2", "torchvision": "0.17.2", "torchaudio": "2.2.2"},
+                          python_tag="cp311", platform="linux_x86_64", versions_path=str(versions))
+    assert not res["corrected"] and "no mapped torch/torchvision/torchaudio triple is fully available" in res["warnings"]
+    resolver.close()
+
+    # a fresh resolver revalidates from the disk cache with If-None-Match and gets 304s
+    hits.clear()
+    resolver = WheelResolver(index_url=url, cache_dir=tmp_path, max_age=0)
+    assert resolver.available_versions("cu121", "torch", "cp311", "linux_x86_64") == ["2.2.2", "2.3.1"]
+    assert [path for path, _ in hits] == ["/whl/cu121/torch/"]
+    assert hits[0][1] is not None
+    resolver.close()
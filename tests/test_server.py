@@ -0,0 +1,90 @@
+import asyncio
+import http.client
+import json
+import socket
+import threading
+
+from core.server import RecommendationServer
+
+
+def _start_server(versions_path=None):
+    loop = asyncio.new_event_loop()
+    server = RecommendationServer(versions_path)
+    addr = loop.run_until_complete(server.start("127.0.0.1", 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    return loop, server, thread, addr
+
+
+def _stop_server(loop, server, thread):
+    async def shutdown():
+        server.close()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run_coroutine_threadsafe(shutdown(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+def test_recommend_over_keep_alive_connection():
+    loop, server, thread, (host, port) = _start_server()
+    try:
+        conn = http.client.HTTPConnection(host, port, timeout=5)
+        conn.request("GET", "/recommend?cuda=11.8.89")
+        resp = conn.getresponse()
+        data = json.loads(resp.read())
+        assert resp.status == 200
+        assert data["recommendation"]["pip_tag"] == "cu118"
+        assert data["pip_command"].startswith("pip install torch==")
+        assert "cudatoolkit=11.8" in data["conda_command"]
+
+        # same socket, POST body
+        conn.request("POST", "/recommend", body=json.dumps({"cuda": "12.1", "extras": ["numpy"]}),
+                     headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        data = json.loads(resp.read())
+        assert resp.status == 200 and data["pip_command"].split(" --extra-index-url")[0].endswith("numpy")
+
+        conn.request("GET", "/recommend?cuda=abc")
+        resp = conn.getresponse()
+        resp.read()
+        assert resp.status == 400
+
+        conn.request("GET", "/stats")
+        stats = json.loads(conn.getresponse().read())
+        assert stats["requests"] == 3
+        assert stats["latency_ms"]["p99"] >= stats["latency_ms"]["p50"] >= 0
+        conn.close()
+    finally:
+        _stop_server(loop, server, thread)
+
+
+def _raw_request(host, port, data):
+    with socket.create_connection((host, port), timeout=5) as sock:
+        sock.sendall(data)
+        return sock.recv(65536).split(b"\r\n", 1)[0]
+
+
+def test_rejects_bad_content_length_and_extras():
+    loop, server, thread, (host, port) = _start_server()
+    try:
+        for length in (b"abc", b"-5", b"+5"):
+            status = _raw_request(host, port, b"POST /recommend HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n{}")
+            assert status == b"HTTP/1.1 400 Bad Request", length
+        assert _raw_request(host, port, b"POST /recommend HTTP/1.1\r\n\r\n{}") == b"HTTP/1.1 400 Bad Request"
+        assert _raw_request(host, port, b"POST /recommend HTTP/1.1\r\nContent-Length: 999999\r\n\r\n") == \
+            b"HTTP/1.1 413 Payload Too Large"
+
+        conn = http.client.HTTPConnection(host, port, timeout=5)
+        for extras in ([{}], [1], "numpy"):
+            conn.request("POST", "/recommend", body=json.dumps({"cuda": "12.1", "extras": extras}))
+            resp = conn.getresponse()
+            resp.read()
+            assert resp.status == 400, extras
+        conn.close()
+    finally:
+        _stop_server(loop, server, thread)
@@ -0,0 +1,69 @@
+import csv
+import os
+import zipfile
+from importlib import metadata
+
+from core.store import WheelStore, remove_installed
+
+
+def _make_wheel(path, version="1.0"):
+    dist = f"torchdemo-{version}.dist-info"
+    files = {
+        "torchdemo/__init__.py": f"VERSION = {version!r}\n",
+        "torchdemo/_C.so": "\0" * 4096,
+        f"torchdemo-{version}.data/scripts/tdemo": "#!python\nprint('hi')\n",
+        f"{dist}/METADATA": f"Metadata-Version: 2.1\nName: torchdemo\nVersion: {version}\n",
+        f"{dist}/WHEEL": "Wheel-Version: 1.0\nRoot-Is-Purelib: false\nTag: py3-none-any\n",
+        f"{dist}/entry_points.txt": "[console_scripts]\ntorchdemo-run = torchdemo.cli:main\n",
+        f"{dist}/RECORD": "",
+    }
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+    return path
+
+
+def _scheme(root):
+    return {k: str(root / k) for k in ("purelib", "platlib", "scripts", "data", "include")}
+
+
+def test_store_links_into_several_envs(tmp_path, monkeypatch):
+    monkeypatch.setenv("TORCHSEARCH_NO_CACHE", "1")
+    wheel = _make_wheel(tmp_path / "torchdemo-1.0-py3-none-any.whl")
+    store = WheelStore(tmp_path / "store")
+    digest = store.add(wheel)
+    assert store.add(wheel) == digest
+
+    results = [store.install(digest, _scheme(tmp_path / env), "/envs/python") for env in ("a", "b")]
+    assert results[0]["linked"] == 5 and results[0]["copied"] == 1
+    so = [tmp_path / env / "platlib" / "torchdemo" / "_C.so" for env in ("a", "b")]
+    assert os.stat(so[0]).st_ino == os.stat(so[1]).st_ino == os.stat(store.path_for(digest) / "torchdemo" / "_C.so").st_ino
+
+    site = tmp_path / "a" / "platlib"
+    assert (tmp_path / "a" / "scripts" / "tdemo").read_text().startswith("#!/envs/python\n")
+    assert "from torchdemo.cli import main" in (tmp_path / "a" / "scripts" / "torchdemo-run").read_text()
+    dist = next(metadata.distributions(path=[str(site)]))
+    assert dist.version == "1.0"
+    assert dist.read_text("INSTALLER") == "torchsearch\n"
+    paths = {str(f) for f in dist.files}
+    assert {"torchdemo/_C.so", "../scripts/tdemo", "../scripts/torchdemo-run", "torchdemo-1.0.dist-info/RECORD"} <= paths
+    with open(site / "torchdemo-1.0.dist-info" / "RECORD", newline="") as f:
+        rows = {r[0]: r for r in csv.reader(f)}
+    assert rows["torchdemo/__init__.py"][1].startswith("sha256=") and rows["torchdemo-1.0.dist-info/RECORD"][1:] == ["", ""]
+
+
+def test_upgrade_replaces_previous_install(tmp_path, monkeypatch):
+    monkeypatch.setenv("TORCHSEARCH_NO_CACHE", "1")
+    store = WheelStore(tmp_path / "store")
+    scheme = _scheme(tmp_path / "env")
+    store.install(store.add(_make_wheel(tmp_path / "torchdemo-1.0-py3-none-any.whl")), scheme)
+    store.install(store.add(_make_wheel(tmp_path / "torchdemo-2.0-py3-none-any.whl", "2.0")), scheme)
+    site = tmp_path / "env" / "platlib"
+    assert sorted(p.name for p in site.glob("*.dist-info")) == ["torchdemo-2.0.dist-info"]
+    assert (site / "torchdemo" / "__init__.py").read_text() == "VERSION = '2.0'\n"
+
+    assert remove_installed(site, "TorchDemo") == "2.0"
+    assert list(site.iterdir()) == []
+    assert not (tmp_path / "env" / "scripts" / "tdemo").exists()
+    # the store itself is untouched
+    assert len(list((tmp_path / "store").glob("*/*/torchdemo/_C.so"))) == 2
@@ -0,0 +1,50 @@
+import json
+import os
+import stat
+
+from core import toolkits
+
+
+def _toolkit(root, files):
+    for rel, content in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    return root
+
+
+def test_discover_toolkits_reads_versions_without_nvcc(tmp_path, monkeypatch):
+    new = _toolkit(tmp_path / "cuda-12.1", {
+        "version.json": json.dumps({"cuda": {"name": "CUDA SDK", "version": "12.1.1"}}),
+        "bin/nvcc": "#!/bin/sh\nexit 1\n",
+    })
+    (new / "bin" / "nvcc").chmod(stat.S_IRWXU)
+    os.symlink(new, tmp_path / "cuda")
+    _toolkit(tmp_path / "cuda-10.2", {"version.txt": "CUDA Version 10.2.89\n"})
+    conda = _toolkit(tmp_path / "env", {"lib/libcudart.so.11.8.89": "", "conda-meta/python-3.11.json": "{}"})
+    os.symlink("libcudart.so.11.8.89", conda / "lib" / "libcudart.so.11")
+    _toolkit(tmp_path / "meta-only", {"conda-meta/cuda-cudart-12.4.127-0.json": "{}"})
+    (tmp_path / "empty").mkdir()
+    monkeypatch.setenv("PATH", str(new / "bin"))
+
+    roots = [(str(tmp_path / "cuda"), "CUDA_HOME"), (str(conda), "conda"), (str(tmp_path / "cuda-12.1"), "/usr/local/cuda-12.1"),
+             (str(tmp_path / "cuda-10.2"), "/usr/local/cuda-10.2"), (str(tmp_path / "meta-only"), "CUDA_PATH"),
+             (str(tmp_path / "empty"), "/opt/cuda"), (str(tmp_path / "missing"), "/usr/local/cuda")]
+    found = toolkits.discover_toolkits(roots, max_workers=4)
+
+    assert [(t.version, t.source) for t in found] == [
+        ("12.4.127", "conda-meta"), ("12.1.1", "version.json"), ("11.8.89", "libcudart"), ("10.2.89", "version.txt")]
+    cuda121 = found[1]
+    assert cuda121.root == os.path.realpath(new)
+    assert cuda121.origins == ("CUDA_HOME", "/usr/local/cuda-12.1")
+    assert cuda121.has_nvcc and cuda121.active
+    assert not any(t.active for t in found if t is not cuda121)
+
+    rows = toolkits.recommend_for_toolkits(found)
+    assert [(r["cuda_version"], r["recommendation"]["pip_tag"]) for r in rows] == [
+        ("12.4", "cu121"), ("12.1", "cu121"), ("11.8", "cu118"), ("10.2", "cu102")]
+
+
+def test_candidate_roots_from_environment():
+    roots = toolkits.candidate_roots({"CUDA_HOME": "/opt/cu", "CUDA_PATH_V12_1": "/x/v12.1", "CONDA_PREFIX": "/envs/a"})
+    assert roots[:3] == [("/opt/cu", "CUDA_HOME"), ("/x/v12.1", "CUDA_PATH_V12_1"), ("/envs/a", "conda")]
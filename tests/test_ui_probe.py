@@ -0,0 +1,43 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("tkinter")
+
+from core.background import run_daemon
+from ui.app import App, SessionProbe
+
+
+def test_session_probe_memoizes_until_refresh():
+    calls = []
+
+    def probe():
+        calls.append(1)
+        return f"12.{len(calls)}"
+
+    p = SessionProbe(run_daemon, probe)
+    first = p.start()
+    assert p.start() is first
+    assert p.result() == "12.1" and p.result() == "12.1"
+    assert len(calls) == 1
+    assert p.refresh().result() == "12.2"
+    assert p.result() == "12.2" and len(calls) == 2
+
+    # concurrent callers share a single run
+    slow = SessionProbe(run_daemon, lambda: (time.sleep(0.05), calls.append(1))[1])
+    started = []
+    threads = [threading.Thread(target=lambda: started.append(slow.start())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(f) for f in started}) == 1
+    started[0].result()
+    assert len(calls) == 3
+
+
+def test_compute_match_uses_given_gpu_status():
+    result = App._compute_match("12.1", lambda: "GPU0: prefetched")
+    assert result["gpu_info"] == "GPU0: prefetched"
+    assert result["pip_tag"] == "cu121"
@@ -1,12 +1,51 @@
 # ui/app.py
 import tkinter as tk
 from tkinter import messagebox, scrolledtext
+import queue
 import re
+import threading
+from concurrent.futures import Future
 from core.cuda_detector import get_nvcc_version
 from core.version_mapper import get_torch_versions
 from core.command_builder import build_install_command, format_result_message, build_result_dict
 from core.clipboard import copy_to_clipboard
+from core.background import run_daemon
 from core.detector import get_gpu_status, get_cuda_version
+from core.gpu_monitor import GpuMonitor
+
+# how often the Tk loop drains finished background jobs (~one frame)
+POLL_MS = 16
+# live GPU monitor sampling interval
+MONITOR_INTERVAL_S = 1.0
+
+
+class SessionProbe:
+    """A detection call started speculatively and memoized for the session.
+
+    start() runs fn once through submit (fn -> Future); later calls return the
+    same future, so every consumer shares one subprocess run. refresh() drops
+    the memo and probes again. Safe to call from any thread.
+    """
+
+    def __init__(self, submit, fn):
+        self._submit = submit
+        self._fn = fn
+        self._future = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._future is None:
+                self._future = self._submit(self._fn)
+            return self._future
+
+    def refresh(self):
+        with self._lock:
+            self._future = self._submit(self._fn)
+            return self._future
+
+    def result(self):
+        return self.start().result()
 
 
 class App:
@@ -17,7 +56,32 @@ class App:
         self.root.resizable(False, False)
         self.last_command = ""
 
+        # detection / matching run on daemon threads (a hung probe never blocks
+        # exit); results come back through self._results and are applied on the
+        # Tk thread by _poll_results
+        self._results = queue.Queue()
+        self._jobs = {}  # kind -> (token, future, on_done)
+        self._next_token = 0
+        # nvcc / GPU status are probed in the background right after the window
+        # is drawn and reused by both buttons until the user asks for a refresh
+        self._probes = {
+            "nvcc": SessionProbe(run_daemon, get_nvcc_version),
+            "gpu": SessionProbe(run_daemon, get_gpu_status),
+        }
+
+        self._monitor = None
+        self._gpu_lines = []  # rows currently shown in gpu_text while monitoring
+        self._monitor_seq = -1
+
         self.setup_ui()
+        self._idle_text = {"detect": self.auto_btn.cget("text"), "match": self.go_btn.cget("text")}
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(POLL_MS, self._poll_results)
+        self.root.after_idle(self._prefetch)
+
+    def _prefetch(self):
+        for probe in self._probes.values():
+            probe.start()
 
     def setup_ui(self):
         # 标题
@@ -38,6 +102,9 @@ class App:
         self.auto_btn = tk.Button(frame, text="🔍 自动检测 nvcc", command=self.auto_detect, width=15)
         self.auto_btn.grid(row=0, column=2, padx=5)
 
+        self.refresh_btn = tk.Button(frame, text="🔄 重新检测", command=self.refresh_detection, width=15)
+        self.refresh_btn.grid(row=1, column=1, pady=10)
+
         self.go_btn = tk.Button(frame, text="🚀 开始匹配", command=self.run_match, width=15)
         self.go_btn.grid(row=1, column=2, pady=10)
 
@@ -55,6 +122,9 @@ class App:
         self.clear_btn = tk.Button(btn_frame, text="🗑 清空", command=self.clear_all, width=15)
         self.clear_btn.pack(side="left", padx=5)
 
+        self.monitor_btn = tk.Button(btn_frame, text="📈 实时监控", command=self.toggle_monitor, width=12)
+        self.monitor_btn.pack(side="left", padx=5)
+
         result_frame = tk.Frame(self.root)
         result_frame.pack(pady=10, padx=20, fill="both", expand=True)
 
@@ -100,9 +170,135 @@ class App:
         self.gpu_text = tk.Text(self.result_container, height=4, state='disabled')
         self.gpu_text.pack(fill='both', expand=True, pady=2)
 
+    # ----- background jobs -------------------------------------------------
+
+    def _busy_button(self, kind):
+        return {"detect": self.auto_btn, "match": self.go_btn}[kind]
+
+    def _set_busy(self, kind, busy):
+        btn = self._busy_button(kind)
+        btn.config(text="⏳ 检测中..." if busy and kind == "detect" else "⏳ 匹配中..." if busy else self._idle_text[kind])
+
+    def _submit(self, kind, fn, on_done, *args):
+        """Run fn(*args) on a daemon thread; on_done(result) is called on the Tk thread.
+
+        Submitting a job of the same kind supersedes the previous one, whose
+        result is dropped when it eventually arrives (a running thread cannot
+        be stopped, only ignored).
+        """
+        self._track(kind, run_daemon(lambda: fn(*args)), on_done)
+
+    def _track(self, kind, future, on_done):
+        """Deliver future's outcome to on_done on the Tk thread; no thread waits for it."""
+        self._cancel(kind)
+        self._next_token += 1
+        token = self._next_token
+        self._jobs[kind] = (token, future, on_done)
+        future.add_done_callback(lambda f: self._results.put((kind, token, f)))
+        self._set_busy(kind, True)
+
+    def _cancel(self, kind):
+        if self._jobs.pop(kind, None) is not None:
+            self._set_busy(kind, False)
+
+    def _poll_results(self):
+        try:
+            while True:
+                kind, token, future = self._results.get_nowait()
+                job = self._jobs.get(kind)
+                if job is None or job[0] != token or future.cancelled():
+                    continue  # stale: cancelled, cleared or superseded by a newer run
+                del self._jobs[kind]
+                self._set_busy(kind, False)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = e
+                job[2](result)
+        except queue.Empty:
+            pass
+        self.root.after(POLL_MS, self._poll_results)
+
+    def on_close(self):
+        self.stop_monitor()
+        for kind in list(self._jobs):
+            self._cancel(kind)
+        self.root.destroy()
+
+    # ----- live GPU monitor -------------------------------------------------
+
+    def toggle_monitor(self):
+        if self._monitor is not None:
+            self.stop_monitor()
+            return
+        self._monitor = GpuMonitor(interval=MONITOR_INTERVAL_S).start()
+        if not self._monitor.running:
+            self._monitor = None
+            messagebox.showwarning("⚠️ 失败", "无法启动 nvidia-smi 实时监控。")
+            return
+        self.monitor_btn.config(text="⏹ 停止监控")
+        self._gpu_lines = []
+        self._monitor_seq = -1
+        self.gpu_text.config(state='normal')
+        self.gpu_text.delete(1.0, tk.END)
+        self.gpu_text.config(state='disabled')
+        self._refresh_monitor(self._monitor)
+
+    def stop_monitor(self):
+        monitor, self._monitor = self._monitor, None
+        if monitor is not None:
+            monitor.stop()
+            self.monitor_btn.config(text="📈 实时监控")
+
+    def _refresh_monitor(self, monitor):
+        if monitor is not self._monitor:
+            return  # stopped or restarted since this refresh was scheduled
+        if monitor.seq != self._monitor_seq:
+            self._monitor_seq = monitor.seq
+            self._update_gpu_rows(monitor.format_lines())
+        if not monitor.running:
+            self.stop_monitor()
+            return
+        self.root.after(int(MONITOR_INTERVAL_S * 1000 / 2), self._refresh_monitor, monitor)
+
+    def _update_gpu_rows(self, lines):
+        """Rewrite only the rows of gpu_text that changed since the last refresh."""
+        old = self._gpu_lines
+        if lines == old:
+            return
+        self.gpu_text.config(state='normal')
+        for i, line in enumerate(lines):
+            row = i + 1
+            if i < len(old):
+                if old[i] != line:
+                    self.gpu_text.delete(f"{row}.0", f"{row}.end")
+                    self.gpu_text.insert(f"{row}.0", line)
+            else:
+                self.gpu_text.insert(tk.END, ("\n" if i else "") + line)
+        if len(old) > len(lines):
+            self.gpu_text.delete(f"{len(lines)}.end" if lines else "1.0", tk.END)
+        self.gpu_text.config(state='disabled')
+        self._gpu_lines = list(lines)
+
+    # ----- actions -----------------------------------------------------------
+
     def auto_detect(self):
-        ver = get_nvcc_version()
-        if ver:
+        future = self._probes["nvcc"].start()
+        if future.done():
+            # warm session: answer from the prefetched result without a thread hop
+            self._cancel("detect")
+            self._on_detect_done(future.exception() or future.result())
+            return
+        self._track("detect", future, self._on_detect_done)
+
+    def refresh_detection(self):
+        """Discard the memoized probes, run them again and show the new CUDA version."""
+        for probe in self._probes.values():
+            probe.refresh()
+        self.auto_detect()
+
+    def _on_detect_done(self, ver):
+        if ver and not isinstance(ver, Exception):
             self.cuda_entry.delete(0, tk.END)
             self.cuda_entry.insert(0, ver)
             messagebox.showinfo("✅ 成功", f"检测到 CUDA 版本: {ver}")
@@ -114,11 +310,29 @@ class App:
         if not self.is_valid_cuda_version(cuda_input):
             messagebox.showerror("❌ 错误", "请输入有效的 CUDA 版本，如 11.8")
             return
-
+        # start the match only once the prefetched GPU status is in, instead of
+        # parking a thread on it
+        gpu = self._probes["gpu"].start()
+        match = Future()
+
+        def compute(done):
+            status = None if done.exception() else done.result()
+            job = run_daemon(lambda: self._compute_match(cuda_input, lambda: status))
+            job.add_done_callback(lambda f: match.set_exception(f.exception()) if f.exception() else match.set_result(f.result()))
+
+        gpu.add_done_callback(compute)
+        self._track("match", match, self._on_match_done)
+
+    @staticmethod
+    def _compute_match(cuda_input, gpu_status=get_gpu_status):
+        """Worker-thread part of run_match: mapping, commands and GPU status.
+
+        gpu_status is called for the status text (the app passes its prefetched
+        probe). Returns a result dict, or an ("error", title, message) tuple.
+        """
         versions = get_torch_versions(cuda_input)
         if not versions:
-            messagebox.showerror("❌ 不支持", f"暂不支持 CUDA {cuda_input} 的版本映射。\n请参考 PyTorch 官网。")
-            return
+            return ("error", "❌ 不支持", f"暂不支持 CUDA {cuda_input} 的版本映射。\n请参考 PyTorch 官网。")
 
         # Support both old tuple return (torch_ver, tv_ver, ta_ver, cuda_tag)
         # and new dict-based return {"torch":..., "torchvision":..., "torchaudio":..., "pip_tag":...}
@@ -131,13 +345,11 @@ class App:
             try:
                 torch_ver, tv_ver, ta_ver, cuda_tag = versions
             except Exception:
-                messagebox.showerror("❌ 错误", "版本映射格式不正确。")
-                return
+                return ("error", "❌ 错误", "版本映射格式不正确。")
 
         # Validate extracted values
         if not (torch_ver and (tv_ver is not None) and (ta_ver is not None)):
-            messagebox.showerror("❌ 不支持", "未能从映射中获取完整的版本信息。")
-            return
+            return ("error", "❌ 不支持", "未能从映射中获取完整的版本信息。")
 
         pip_cmd = build_install_command(torch_ver, tv_ver, ta_ver, cuda_tag)
         conda_cmd = None
@@ -150,17 +362,26 @@ class App:
         # get GPU status to show to user
         gpu_info = None
         try:
-            gpu_info = get_gpu_status()
+            gpu_info = gpu_status()
         except Exception:
             gpu_info = None
 
-        result_dict = build_result_dict(cuda_input, torch_ver, tv_ver, ta_ver, cuda_tag, pip_cmd, conda_cmd, gpu_info)
+        return build_result_dict(cuda_input, torch_ver, tv_ver, ta_ver, cuda_tag, pip_cmd, conda_cmd, gpu_info)
 
-        self.display_result(result_dict)
-        self.last_command = pip_cmd
-        self.last_conda = conda_cmd
+    def _on_match_done(self, result):
+        if isinstance(result, Exception):
+            messagebox.showerror("❌ 错误", f"匹配失败: {result}")
+            return
+        if isinstance(result, tuple):
+            _, title, message = result
+            messagebox.showerror(title, message)
+            return
+
+        self.display_result(result)
+        self.last_command = result["pip_cmd"]
+        self.last_conda = result["conda_cmd"]
         self.copy_btn.config(state="normal")
-        if conda_cmd:
+        if result["conda_cmd"]:
             self.copy_conda_btn.config(state="normal")
 
     def is_valid_cuda_version(self, version: str) -> bool:
@@ -189,7 +410,9 @@ class App:
             self.conda_entry.insert(0, conda_cmd)
             self.conda_entry.config(state='readonly')
 
-            # set gpu info
+            # set gpu info (the live monitor owns the box while it is running)
+            if self._monitor is not None:
+                return
             gpu = d.get('gpu_info') or ''
             self.gpu_text.config(state='normal')
             self.gpu_text.delete(1.0, tk.END)
@@ -243,6 +466,9 @@ class App:
             messagebox.showerror("❌ 失败", "剪贴板操作失败，请手动复制。")
 
     def clear_all(self):
+        # drop any in-flight detection/match so a late result can't repopulate the form
+        for kind in list(self._jobs):
+            self._cancel(kind)
         self.cuda_entry.delete(0, tk.END)
         # clear structured fields
         self.torch_val.config(text='')
@@ -258,6 +484,8 @@ class App:
         self.gpu_text.config(state='normal')
         self.gpu_text.delete(1.0, tk.END)
         self.gpu_text.config(state='disabled')
+        self._gpu_lines = []
+        self._monitor_seq = -1
         self.copy_btn.config(state="disabled")
         self.copy_conda_btn.config(state="disabled")
         self.last_command = ""